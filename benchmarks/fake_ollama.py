@@ -0,0 +1,249 @@
+import hashlib
+import json
+import math
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+EMBED_DIM = 768
+
+
+def fake_vector(text: str, dim: int = EMBED_DIM) -> list:
+    """Deterministic unit vector for a text; texts sharing words land close together."""
+    vector = [0.0] * dim
+    for word in text.lower().split():
+        rng = random.Random(hashlib.md5(word.encode("utf-8")).digest())
+        for _ in range(8):
+            vector[rng.randrange(dim)] += rng.uniform(-1.0, 1.0)
+    norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+    return [v / norm for v in vector]
+
+
+class FakeOllama:
+    """Local stand-in for the Ollama HTTP API with configurable latency.
+
+    Implements /api/embed, /api/chat and /api/generate (streaming and not),
+    enough for langchain_ollama. Latencies are in seconds:
+    `embed_latency` per request plus `embed_item_latency` per input,
+    `load_latency` once per model until `keep_alive` expires, `prefill_latency`
+    before the first token plus `prefill_token_latency` per prompt word not
+    shared with the model's previous prompt (a stand-in for its KV cache),
+    and `token_latency` per generated token.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, embed_latency: float = 0.005,
+                 embed_item_latency: float = 0.001, load_latency: float = 0.0, prefill_latency: float = 0.05,
+                 prefill_token_latency: float = 0.0, token_latency: float = 0.01, answer_tokens: int = 48, think: bool = True):
+        self.embed_latency = embed_latency
+        self.embed_item_latency = embed_item_latency
+        self.load_latency = load_latency
+        self.prefill_latency = prefill_latency
+        self.prefill_token_latency = prefill_token_latency
+        self.token_latency = token_latency
+        self.answer_tokens = answer_tokens
+        self.think = think
+        self.requests = 0
+        self.aborted = 0    # streamed answers the client hung up on
+        self._loaded = {}
+        self._prompts = {}  # last prompt (as words) per model
+        self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer((host, port), self._handler())
+        self.server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def unload(self):
+        """Forget every loaded model, as if their keep-alive had expired."""
+        with self._lock:
+            self._loaded.clear()
+
+    def _load(self, model: str, keep_alive=None) -> float:
+        """Simulate loading a model; returns the load time paid."""
+        now = time.monotonic()
+        with self._lock:
+            expires = self._loaded.get(model)
+            cold = expires is None or expires < now
+            ttl = 300.0 if keep_alive is None else _seconds(keep_alive)
+            self._loaded[model] = now + (ttl if ttl >= 0 else float("inf"))
+        if cold and self.load_latency:
+            time.sleep(self.load_latency)
+            return self.load_latency
+        return 0.0
+
+    def _prefill(self, model: str, prompt: str) -> tuple:
+        """Returns (words evaluated, seconds): only the part after the prefix shared with the last prompt."""
+        words = prompt.split()
+        with self._lock:
+            previous = self._prompts.get(model, [])
+            self._prompts[model] = words
+        cached = 0
+        for old, new in zip(previous, words):
+            if old != new:
+                break
+            cached += 1
+        evaluated = len(words) - cached
+        return evaluated, self.prefill_latency + self.prefill_token_latency * evaluated
+
+    def _answer_tokens(self, prompt: str, limit) -> list:
+        rng = random.Random(hashlib.md5(prompt.encode("utf-8")).digest())
+        words = [w for w in prompt.split() if w.isalpha()] or ["answer"]
+        count = self.answer_tokens if limit in (None, -1) else min(self.answer_tokens, int(limit))
+        tokens = []
+        if self.think and count:
+            tokens += ["<think>", "Looking", " at", " the", " context", ".", "</think>", "\n\n"]
+        tokens += [" " + rng.choice(words) for _ in range(count)]
+        return tokens
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                if self.path.startswith("/api/version"):
+                    self._json({"version": "0.0.0-fake"})
+                elif self.path.startswith("/api/tags") or self.path.startswith("/api/ps"):
+                    self._json({"models": []})
+                else:
+                    self._json({"error": "not found"}, 404)
+
+            def do_HEAD(self):
+                self.send_response(200)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def do_POST(self):
+                with fake._lock:
+                    fake.requests += 1
+                length = int(self.headers.get("Content-Length") or 0)
+                body = json.loads(self.rfile.read(length) or b"{}")
+                if self.path.startswith("/api/embed"):
+                    self._embed(body)
+                elif self.path.startswith("/api/chat"):
+                    self._generate(body, chat=True)
+                elif self.path.startswith("/api/generate"):
+                    self._generate(body, chat=False)
+                elif self.path.startswith("/api/show"):
+                    self._json({"modelfile": "", "parameters": "", "template": "", "details": {}})
+                else:
+                    self._json({"error": "not found"}, 404)
+
+            def _embed(self, body):
+                inputs = body.get("input") or []
+                if isinstance(inputs, str):
+                    inputs = [inputs]
+                load = fake._load(body.get("model", ""), body.get("keep_alive"))
+                time.sleep(fake.embed_latency + fake.embed_item_latency * len(inputs))
+                self._json({
+                    "model": body.get("model"),
+                    "embeddings": [fake_vector(t) for t in inputs],
+                    "load_duration": int(load * 1e9),
+                })
+
+            def _generate(self, body, chat):
+                model = body.get("model", "")
+                if chat:
+                    prompt = "\n".join(str(m.get("content", "")) for m in body.get("messages") or [])
+                else:
+                    prompt = body.get("prompt") or ""
+                options = body.get("options") or {}
+                load = fake._load(model, body.get("keep_alive"))
+                # An empty request only loads the model, like the real server
+                empty = not prompt.strip()
+                tokens = [] if empty else fake._answer_tokens(prompt, options.get("num_predict"))
+                evaluated, prefill = (0, 0.0) if empty else fake._prefill(model, prompt)
+                time.sleep(prefill)
+                final = {
+                    "model": model, "created_at": _now(), "done": True, "done_reason": "load" if empty else "stop",
+                    "total_duration": int((load + prefill + fake.token_latency * len(tokens)) * 1e9),
+                    "load_duration": int(load * 1e9),
+                    "prompt_eval_count": evaluated, "prompt_eval_duration": int(prefill * 1e9),
+                    "eval_count": len(tokens), "eval_duration": int(fake.token_latency * len(tokens) * 1e9),
+                }
+                if chat:
+                    final["message"] = {"role": "assistant", "content": ""}
+                else:
+                    final["response"] = ""
+
+                if not body.get("stream", True):
+                    time.sleep(fake.token_latency * len(tokens))
+                    if chat:
+                        final["message"]["content"] = "".join(tokens)
+                    else:
+                        final["response"] = "".join(tokens)
+                    self._json(final)
+                    return
+
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-ndjson")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                try:
+                    for token in tokens:
+                        time.sleep(fake.token_latency)
+                        part = {"model": model, "created_at": _now(), "done": False}
+                        if chat:
+                            part["message"] = {"role": "assistant", "content": token}
+                        else:
+                            part["response"] = token
+                        self._chunk(json.dumps(part).encode("utf-8") + b"\n")
+                    self._chunk(json.dumps(final).encode("utf-8") + b"\n")
+                    self._chunk(b"")
+                except (BrokenPipeError, ConnectionResetError):
+                    with fake._lock:
+                        fake.aborted += 1
+                    self.close_connection = True
+
+            def _chunk(self, data: bytes):
+                self.wfile.write(f"{len(data):X}\r\n".encode("ascii") + data + b"\r\n")
+                self.wfile.flush()
+
+            def _json(self, payload, status=200):
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        return Handler
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _seconds(keep_alive) -> float:
+    if isinstance(keep_alive, (int, float)):
+        return float(keep_alive)
+    text = str(keep_alive).strip()
+    units = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+    for suffix in ("ms", "s", "m", "h"):
+        if text.endswith(suffix):
+            return float(text[:-len(suffix)]) * units[suffix]
+    return float(text)
@@ -0,0 +1,305 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from .fake_ollama import FakeOllama
+from .synthetic_pdf import WORDS, write_pdf
+
+
+def percentiles(samples: list) -> dict:
+    """p50/p95/p99 (nearest rank), mean and count of a list of seconds."""
+    if not samples:
+        return {"count": 0}
+    ordered = sorted(samples)
+
+    def rank(p):
+        return ordered[min(len(ordered) - 1, max(0, round(p / 100 * len(ordered) + 0.5) - 1))]
+
+    return {
+        "count": len(ordered),
+        "mean_s": sum(ordered) / len(ordered),
+        "p50_s": rank(50),
+        "p95_s": rank(95),
+        "p99_s": rank(99),
+        "max_s": ordered[-1],
+    }
+
+
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True,
+                                       stderr=subprocess.DEVNULL).strip()
+    except Exception:
+        return None
+
+
+def questions(count: int, seed: int = 1) -> list:
+    import random
+    rng = random.Random(seed)
+    return [f"What does the manual say about {rng.choice(WORDS)} {rng.choice(WORDS)} "
+            f"in section {rng.randint(1, 9)}.{rng.randint(1, 9)}?" for _ in range(count)]
+
+
+def timed(fn, *args, **kwargs):
+    started = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - started
+
+
+def dir_size(path: str) -> int:
+    return sum(os.path.getsize(os.path.join(root, f)) for root, _, files in os.walk(path) for f in files)
+
+
+def compare_stores(chunks, embedding, chroma_path, tmp, qs, k, batch_size, workers) -> dict:
+    """Size and recall@k against the Chroma index for each quantized store variant."""
+    from loc_gist.rag.embedding import get_vector_store, index_docs
+    from loc_gist.rag.quantized import store_config_from_settings, write_store_config
+
+    chroma = get_vector_store(embedding, chroma_path)
+    vectors = [embedding.embed_query(q) for q in qs]
+    baseline = [chroma._collection.query(query_embeddings=[v], n_results=k)["ids"][0] for v in vectors]
+    report = {"chroma": {"bytes": dir_size(chroma_path), "bytes_per_chunk": dir_size(chroma_path) / len(chunks)}}
+    for name, settings in (("int8", {"vector_store": "int8"}),
+                           ("int8_rescore", {"vector_store": "int8", "vector_rescore": True}),
+                           ("float16", {"vector_store": "float16"})):
+        path = os.path.join(tmp, f"db-{name}")
+        os.makedirs(path)
+        write_store_config(path, store_config_from_settings(settings))
+        store = index_docs(chunks, embedding, path, batch_size=batch_size, workers=workers)
+        latencies, hits = [], 0
+        for v, expected in zip(vectors, baseline):
+            result, elapsed = timed(store._collection.query, query_embeddings=[v], n_results=k)
+            latencies.append(elapsed)
+            hits += len(set(result["ids"][0]) & set(expected))
+        size = dir_size(path)
+        report[name] = {
+            "bytes": size, "bytes_per_chunk": size / len(chunks),
+            "size_vs_chroma": report["chroma"]["bytes"] / size,
+            f"recall_at_{k}": hits / max(1, sum(len(e) for e in baseline)),
+            "query": percentiles(latencies),
+        }
+    return report
+
+
+def bench_lexical(count, qs, k, seed) -> dict:
+    """Build, save/load and search latency of a lexical index over `count` synthetic chunks."""
+    import random
+    from loc_gist.rag.lexical import LexicalIndex, load_lexical_index
+
+    rng = random.Random(seed)
+    index = LexicalIndex()
+    started = time.perf_counter()
+    for start in range(0, count, 1000):
+        ids = [f"chunk-{i}" for i in range(start, min(start + 1000, count))]
+        index.add(ids, [" ".join(rng.choice(WORDS) for _ in range(120)) for _ in ids])
+    build_s = time.perf_counter() - started
+    with tempfile.TemporaryDirectory(prefix="locgist-lexical-") as path:
+        _, save_s = timed(index.save, path)
+        index, load_s = timed(load_lexical_index, path)
+        # The synthetic vocabulary is small, so every query term matches most chunks
+        latencies = [timed(index.search, q, k)[1] for q in qs]
+    return {"chunks": count, "build_s": build_s, "save_s": save_s, "load_s": load_s,
+            "search": percentiles(latencies)}
+
+
+def drain(stream):
+    for _ in stream:
+        pass
+    return stream
+
+
+def run(args) -> dict:
+    fake = FakeOllama(
+        embed_latency=args.embed_ms / 1000, embed_item_latency=args.embed_item_ms / 1000,
+        prefill_latency=args.prefill_ms / 1000, prefill_token_latency=args.prefill_word_ms / 1000,
+        token_latency=args.token_ms / 1000,
+        answer_tokens=args.answer_tokens, load_latency=args.load_ms / 1000,
+    ).start()
+    # Must be set before the Ollama clients are created
+    os.environ["OLLAMA_HOST"] = fake.url
+
+    from loc_gist.rag.pdf_reader import load_documents, split_documents
+    from loc_gist.rag.chunking import chunking_config
+    from loc_gist.rag.embedding import get_embedding, get_vector_store, index_docs
+    from loc_gist.rag.core import init_chain
+    from loc_gist.rag.api import query_rag, stream_rag
+    from loc_gist.rag.warmup import warm_models
+    from loc_gist.rag.conversation import Conversation
+
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="locgist-bench-") as tmp:
+        pdf_path = write_pdf(os.path.join(tmp, "synthetic.pdf"), args.pages, seed=args.seed)
+
+        docs, elapsed = timed(load_documents, pdf_path, workers=args.extract_workers)
+        results["load_documents"] = {
+            "seconds": elapsed, "pages": len(docs), "pages_per_s": len(docs) / elapsed,
+            "peak_rss_mb": peak_rss_mb(),
+        }
+
+        chunking = chunking_config({"chunker": args.chunker, "chunk_tokens": args.chunk_tokens,
+                                    "chunk_overlap": args.chunk_overlap})
+        chunks, elapsed = timed(split_documents, docs, chunking=chunking)
+        results["split_documents"] = {
+            "seconds": elapsed, "chunks": len(chunks), "chunks_per_s": len(chunks) / elapsed,
+            "peak_rss_mb": peak_rss_mb(),
+        }
+
+        # The embedding cache is bypassed so every run pays for every chunk
+        embedding = get_embedding(cache=False)
+        db_path = os.path.join(tmp, "db")
+        _, elapsed = timed(index_docs, chunks, embedding, db_path, batch_size=args.batch_size, workers=args.workers)
+        results["index_docs"] = {
+            "seconds": elapsed, "chunks": len(chunks), "chunks_per_s": len(chunks) / elapsed,
+            "embed_requests": fake.requests, "index_bytes": dir_size(db_path), "peak_rss_mb": peak_rss_mb(),
+        }
+
+        if args.quantized:
+            results["quantized_store"] = compare_stores(chunks, embedding, db_path, tmp, questions(args.queries, seed=args.seed),
+                                                        args.top_k, args.batch_size, args.workers)
+
+        if args.lexical_chunks:
+            # k as the hybrid retriever over-fetches it
+            results["lexical_search"] = bench_lexical(args.lexical_chunks, questions(args.queries, seed=args.seed),
+                                                      max(args.top_k * 4, 20), args.seed)
+
+        chain = init_chain(get_vector_store(embedding, db_path), model="fake-model", top_k=args.top_k,
+                           max_tokens=args.answer_tokens, db_path=db_path, lexical_weight=args.lexical_weight)
+        qs = questions(args.queries, seed=args.seed)
+        chain.embedding = embedding
+
+        if args.load_ms:
+            # First question with the model unloaded, then again after a warm-up
+            fake.unload()
+            cold = drain(stream_rag(chain, qs[0]))
+            fake.unload()
+            _, warmup_s = timed(warm_models, chain)
+            warm = drain(stream_rag(chain, qs[0]))
+            results["cold_start"] = {
+                "cold_first_token_s": cold.first_token_s, "cold_model_load_s": cold.load_s,
+                "warmup_s": warmup_s, "warm_first_token_s": warm.first_token_s, "warm_model_load_s": warm.load_s,
+            }
+
+        latencies = [timed(chain.retrieve, q)[1] for q in qs]
+        results["retrieval"] = {**percentiles(latencies), "peak_rss_mb": peak_rss_mb()}
+
+        latencies = [timed(query_rag, chain, q)[1] for q in qs]
+        results["query_rag"] = {**percentiles(latencies), "peak_rss_mb": peak_rss_mb()}
+
+        ttft, ttfa = [], []
+        for q in qs:
+            stream = drain(stream_rag(chain, q))
+            ttft.append(stream.first_token_s)
+            ttfa.append(stream.first_answer_s)
+        results["time_to_first_token"] = percentiles([t for t in ttft if t is not None])
+        results["time_to_first_answer_token"] = percentiles([t for t in ttfa if t is not None])
+
+        if args.cancel_after:
+            # Stop an answer after a few tokens; the fake server should see the request aborted
+            cancel = threading.Event()
+            stream = stream_rag(chain, qs[0] + " (cancelled)", cancel_event=cancel)
+            for tokens, _ in enumerate(stream, 1):
+                if tokens == args.cancel_after:
+                    cancel.set()
+                    cancelled_at = time.perf_counter()
+            stopped_s = time.perf_counter() - cancelled_at
+            time.sleep(args.token_ms / 1000 * 2)  # the server notices on its next write
+            results["cancellation"] = {
+                "cancelled": stream.cancelled, "tokens_streamed": stream.tokens, "stop_s": stopped_s,
+                "server_aborted": fake.aborted,
+            }
+
+        if args.turns:
+            # Same questions asked one by one, then as turns of one conversation
+            turns = [qs[i % len(qs)] for i in range(args.turns)]
+            stateless = [drain(stream_rag(chain, q)) for q in turns]
+            conversation = Conversation()
+            chat = []
+            for q in turns:
+                history = conversation.history_tokens()
+                chat.append((drain(stream_rag(chain, q, conversation=conversation)), history))
+            # With a stable prefix only the new turn is evaluated, however long the history gets
+            results["conversation_prefill"] = {
+                "stateless_prefill_s": [s.prefill_s for s in stateless],
+                "conversation_prefill_s": [s.prefill_s for s, _ in chat],
+                "conversation_evaluated_tokens": [s.prompt_tokens for s, _ in chat],
+                "conversation_history_tokens": [history for _, history in chat],
+            }
+
+    fake.stop()
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "params": vars(args),
+        },
+        "results": results,
+    }
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="LocGist indexing/query benchmarks against a fake Ollama server")
+    parser.add_argument("--pages", type=int, default=50, help="pages in the synthetic pdf")
+    parser.add_argument("--queries", type=int, default=20, help="questions for the retrieval/query benchmarks")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--embed-ms", type=float, default=5.0, help="fake latency per embedding request")
+    parser.add_argument("--embed-item-ms", type=float, default=1.0, help="fake latency per embedded text")
+    parser.add_argument("--prefill-ms", type=float, default=50.0, help="fake latency before the first token")
+    parser.add_argument("--prefill-word-ms", type=float, default=0.0,
+                        help="fake prefill latency per prompt word not cached from the previous prompt")
+    parser.add_argument("--turns", type=int, default=0,
+                        help="also compare prefill of this many stateless questions vs conversation turns")
+    parser.add_argument("--token-ms", type=float, default=5.0, help="fake latency per generated token")
+    parser.add_argument("--load-ms", type=float, default=0.0,
+                        help="fake model load time; when set, cold vs warmed-up first token is measured")
+    parser.add_argument("--answer-tokens", type=int, default=32)
+    parser.add_argument("--cancel-after", type=int, default=0,
+                        help="stop one answer after this many pieces and check the request was aborted")
+    parser.add_argument("--chunker", choices=("structured", "recursive"), default="structured")
+    parser.add_argument("--chunk-tokens", type=int, default=256)
+    parser.add_argument("--chunk-overlap", type=int, default=32)
+    parser.add_argument("--batch-size", type=int, default=32, help="chunks per embedding request")
+    parser.add_argument("--workers", type=int, default=4, help="concurrent embedding requests")
+    parser.add_argument("--extract-workers", type=int, default=1, help="pdf extraction processes (0 = cores)")
+    parser.add_argument("--top-k", type=int, default=4)
+    parser.add_argument("--lexical-weight", type=float, default=0.0)
+    parser.add_argument("--lexical-chunks", type=int, default=0,
+                        help="also measure lexical (BM25) search over this many synthetic chunks, e.g. 100000")
+    parser.add_argument("--quantized", action="store_true", help="also compare quantized vector stores with Chroma")
+    parser.add_argument("-o", "--output", help="write the JSON report here (default: stdout)")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.extract_workers == 0:
+        args.extract_workers = None
+    report = run(args)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    print(text if not args.output else f"Report written to {args.output}", file=sys.__stdout__)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,62 @@
+import random
+
+WORDS = (
+    "system pump valve pressure sensor module error code clause warranty service interval "
+    "maintenance procedure filter torque voltage calibration firmware reset operator safety "
+    "manual section table figure appendix replace inspect install remove verify limit"
+).split()
+
+
+def page_text(page: int, lines: int = 40, seed: int = 0) -> list:
+    """Deterministic pseudo-technical text for one page."""
+    rng = random.Random(seed * 100_003 + page)
+    out = [f"Section {page // 10 + 1}.{page % 10 + 1} Part PN-{rng.randint(1000, 9999)}"]
+    for _ in range(lines - 1):
+        out.append(" ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 14))))
+    return out
+
+
+def _escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def write_pdf(path: str, pages: int, lines_per_page: int = 40, seed: int = 0):
+    """Write a text-only pdf with `pages` pages, without any pdf library."""
+    objects = []  # index i holds object number i + 1
+
+    def add(body: bytes) -> int:
+        objects.append(body)
+        return len(objects)
+
+    catalog = add(b"")  # filled in once the page tree exists
+    pages_obj = add(b"")
+    font = add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+    kids = []
+    for number in range(pages):
+        ops = ["BT", "/F1 10 Tf", "12 TL", "50 760 Td"]
+        for line in page_text(number, lines_per_page, seed):
+            ops.append(f"({_escape(line)}) Tj T*")
+        ops.append("ET")
+        stream = "\n".join(ops).encode("latin-1")
+        content = add(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        kids.append(add(
+            b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 %d 0 R >> >> /Contents %d 0 R >>" % (pages_obj, font, content)
+        ))
+    objects[catalog - 1] = b"<< /Type /Catalog /Pages %d 0 R >>" % pages_obj
+    objects[pages_obj - 1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+        b" ".join(b"%d 0 R" % k for k in kids), len(kids))
+
+    with open(path, "wb") as f:
+        f.write(b"%PDF-1.4\n")
+        offsets = []
+        for number, body in enumerate(objects, start=1):
+            offsets.append(f.tell())
+            f.write(b"%d 0 obj\n" % number + body + b"\nendobj\n")
+        xref = f.tell()
+        f.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+        for offset in offsets:
+            f.write(b"%010d 00000 n \n" % offset)
+        f.write(b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (
+            len(objects) + 1, catalog, xref))
+    return path
@@ -1,4 +1,11 @@
-from .app import main
+import sys
+
 
 if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        # Headless CLI; avoids importing Tk/ttkbootstrap
+        from .cli import main as cli_main
+        sys.exit(cli_main())
+
+    from .app import main
     main()
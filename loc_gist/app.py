@@ -1,5 +1,9 @@
+import time
+
+_STARTED = time.perf_counter()
+
 from .ui.window import Window
 
 def main():
-    window = Window()
+    window = Window(started_at=_STARTED)
     window.run()
@@ -0,0 +1,304 @@
+import argparse
+import contextlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from loc_gist.rag.db_helper import is_db_exists
+from loc_gist.rag.progress import Progress
+from loc_gist.rag.settings import DEFAULT_SETTINGS
+
+
+def _add_settings_args(parser):
+    parser.add_argument("--model", default=DEFAULT_SETTINGS["model"])
+    parser.add_argument("--temperature", type=float, default=DEFAULT_SETTINGS["temperature"])
+    parser.add_argument("--top-k", type=int, default=DEFAULT_SETTINGS["top_k"])
+    parser.add_argument("--max-tokens", type=int, default=DEFAULT_SETTINGS["max_tokens"])
+    parser.add_argument("--ctx-window", type=int, default=DEFAULT_SETTINGS["ctx_window"])
+    parser.add_argument("--lexical-weight", type=float, default=DEFAULT_SETTINGS["lexical_weight"])
+    parser.add_argument("--rerank-model", default=DEFAULT_SETTINGS["rerank_model"],
+                        help='rerank candidates with this Ollama model or "cross-encoder:<name>"')
+    parser.add_argument("--rerank-fetch-k", type=int, default=DEFAULT_SETTINGS["rerank_fetch_k"],
+                        help="candidates fetched for reranking")
+    parser.add_argument("--rerank-budget", type=float, default=DEFAULT_SETTINGS["rerank_budget_s"],
+                        help="seconds allowed for reranking before falling back to retriever order")
+    parser.add_argument("--context-share", type=float, default=DEFAULT_SETTINGS["context_share"],
+                        help="share of the context window retrieved passages may fill")
+    parser.add_argument("--keep-alive", default=DEFAULT_SETTINGS["keep_alive"],
+                        help='how long Ollama keeps the models loaded, e.g. "30m" or -1 for forever')
+    parser.add_argument("--embedding-model", default=DEFAULT_SETTINGS["embedding_model"],
+                        help="must match the model the databases were built with")
+
+
+def _settings(args) -> dict:
+    return {
+        "model": args.model,
+        "temperature": args.temperature,
+        "top_k": args.top_k,
+        "max_tokens": args.max_tokens,
+        "ctx_window": args.ctx_window,
+        "lexical_weight": args.lexical_weight,
+        "rerank_model": args.rerank_model,
+        "rerank_fetch_k": args.rerank_fetch_k,
+        "rerank_budget_s": args.rerank_budget,
+        "context_share": args.context_share,
+        "keep_alive": args.keep_alive,
+        "embedding_model": args.embedding_model,
+    }
+
+
+def _log(msg):
+    print(msg, file=sys.stderr)
+
+
+def _emit(text):
+    # Results go to the real stdout; library print() chatter is sent to stderr in main()
+    print(text, file=sys.__stdout__, flush=True)
+
+
+def cmd_index(args):
+    """Index a pdf (new database or added to an existing one) or sync a folder."""
+    from loc_gist.rag.api import index_db, add_to_db, sync_db
+
+    settings = {"embed_batch_size": args.batch_size, "embed_workers": args.workers,
+                "vector_store": args.vector_store, "vector_rescore": args.rescore,
+                "chunker": args.chunker, "chunk_tokens": args.chunk_tokens, "chunk_overlap": args.chunk_overlap,
+                "embedding_model": args.embedding_model}
+    if args.extract_workers is not None:
+        settings["extract_workers"] = args.extract_workers
+    progress = Progress(log=_log)
+    if os.path.isdir(args.path):
+        db_name = args.db or os.path.basename(os.path.normpath(args.path))
+        _, message = sync_db(args.path, db_name, progress=progress, settings=settings)
+    else:
+        db_name = args.db or os.path.splitext(os.path.basename(args.path))[0]
+        if is_db_exists(db_name):
+            _, message = add_to_db([args.path], db_name, progress=progress, settings=settings)
+        else:
+            message = f"Indexed {db_name} at {index_db(args.path, db_name, progress=progress, settings=settings)}"
+    _emit(message)
+    return 0
+
+
+def cmd_list(args):
+    from loc_gist.rag.catalog import load_catalog
+
+    catalog = load_catalog(rescan=args.rescan)
+    for db in sorted(catalog):
+        if args.json:
+            _emit(json.dumps({"name": db, **catalog[db]}, ensure_ascii=False))
+        elif args.long:
+            entry = catalog[db]
+            _emit(f"{db}\t{entry['chunks']} chunks\t{len(entry['files'])} file(s)\t"
+                  f"{entry['size_bytes'] / 2 ** 20:.1f} MB\t{entry['embedding_model']}\t{entry.get('built_at') or '-'}")
+        else:
+            _emit(db)
+    return 0
+
+
+def cmd_compact(args):
+    """Reclaim the space of deleted and replaced chunks."""
+    from loc_gist.rag.api import compact_db
+
+    freed, message = compact_db(args.db)
+    _emit(message)
+    return 0 if freed is not None else 1
+
+
+def cmd_delete(args):
+    from loc_gist.rag.api import delete_db
+
+    if not is_db_exists(args.db):
+        raise SystemExit(f"Database '{args.db}' does not exist.")
+    if not args.yes:
+        answer = input(f"Delete '{args.db}' and everything indexed in it? [y/N] ").strip().lower()
+        if answer not in ("y", "yes"):
+            _log("Nothing deleted.")
+            return 1
+    ok, message = delete_db(args.db)
+    _emit(message)
+    return 0 if ok else 1
+
+
+def _load_chain(args):
+    from loc_gist.rag.api import chain_dbs
+
+    chain, status = chain_dbs(args.db.split(","), settings=_settings(args))
+    if chain is None:
+        raise SystemExit(f"{args.db}: {status}")
+    return chain
+
+
+def cmd_ask(args):
+    from loc_gist.rag.api import answer_rag
+
+    chain = _load_chain(args)
+    result = answer_rag(chain, args.question)
+    if args.json:
+        _emit(json.dumps(result, ensure_ascii=False))
+    else:
+        _emit(result["answer"])
+        _log(f"[{result['timings']['total_s']:.2f}s] {result['note'] or ''}".rstrip())
+    return 0
+
+
+def cmd_chat(args):
+    """Interactive conversation: follow-up questions see the earlier turns."""
+    from loc_gist.rag.api import stream_rag
+    from loc_gist.rag.conversation import Conversation
+
+    chain = _load_chain(args)
+    conversation = Conversation()
+    _log('Ask a question; Ctrl-C stops an answer, "/new" starts over, an empty line or Ctrl-D quits.')
+    while True:
+        try:
+            question = input("> ").strip()
+        except EOFError:
+            break
+        if not question:
+            break
+        if question == "/new":
+            conversation.clear()
+            _log("Started a new conversation.")
+            continue
+        stream = stream_rag(chain, question, conversation=conversation)
+        try:
+            for kind, text in stream:
+                if kind == "answer":
+                    print(text, end="", file=sys.__stdout__, flush=True)
+        except KeyboardInterrupt:
+            # The stopped turn is not added to the conversation
+            stream.close()
+        _emit("")
+        _log(f"[{stream.summary()}]")
+    return 0
+
+
+def cmd_batch(args):
+    """Answer every question of a JSONL file, writing one JSON result per line."""
+    from loc_gist.rag.api import answer_rag
+    from loc_gist.rag.warmup import warm_models
+
+    chain = _load_chain(args)
+    # Load the models once up front rather than inside every concurrent first question
+    warm_models(chain, log=_log)
+    with open(args.input, "r", encoding="utf-8") as f:
+        items = [json.loads(line) for line in f if line.strip()]
+
+    def run(indexed):
+        i, item = indexed
+        question = item["question"] if isinstance(item, dict) else str(item)
+        try:
+            result = answer_rag(chain, question)
+        except Exception as e:
+            result = {"question": question, "error": str(e)}
+        result["id"] = item.get("id", i) if isinstance(item, dict) else i
+        return result
+
+    out = open(args.output, "w", encoding="utf-8") if args.output else sys.__stdout__
+    started = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, args.concurrency)) as pool:
+            for n, result in enumerate(pool.map(run, enumerate(items)), start=1):
+                out.write(json.dumps(result, ensure_ascii=False) + "\n")
+                out.flush()
+                _log(f"[{n}/{len(items)}] {result['id']}")
+    finally:
+        if out is not sys.__stdout__:
+            out.close()
+    _log(f"Answered {len(items)} question(s) in {time.perf_counter() - started:.1f}s")
+    return 0
+
+
+def cmd_serve(args):
+    from loc_gist.server import QueryServer
+
+    QueryServer(args.host, args.port, settings=_settings(args),
+                max_concurrency=args.concurrency, max_queue=args.queue).run()
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="loc_gist", description="LocGist headless RAG tools")
+    parser.add_argument("--metrics-out", help="write per-stage timing metrics (JSON) here on exit")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("index", help="index a pdf or re-sync a folder of pdfs")
+    p.add_argument("path")
+    p.add_argument("--db", help="database name (default: file or folder name)")
+    p.add_argument("--batch-size", type=int, default=32, help="chunks per embedding request")
+    p.add_argument("--workers", type=int, default=4, help="concurrent embedding requests")
+    p.add_argument("--extract-workers", type=int, help="pdf extraction processes (default: cores)")
+    p.add_argument("--vector-store", choices=("chroma", "int8", "float16"), default="chroma",
+                   help="vector storage for a new database (int8/float16 = quantized, memory-mapped)")
+    p.add_argument("--rescore", action="store_true",
+                   help="quantized stores: keep float32 vectors on disk to re-score the top candidates")
+    p.add_argument("--chunker", choices=("structured", "recursive"), default="structured",
+                   help="how a new database splits pages: by headings/paragraphs/tables, or recursively by size")
+    p.add_argument("--chunk-tokens", type=int, default=256, help="chunk size in (estimated) tokens for a new database")
+    p.add_argument("--chunk-overlap", type=int, default=32, help="tokens shared by consecutive chunks")
+    p.add_argument("--embedding-model", default=DEFAULT_SETTINGS["embedding_model"],
+                   help="embedding model a new database is built with")
+    p.set_defaults(func=cmd_index)
+
+    p = sub.add_parser("list", help="list databases")
+    p.add_argument("-l", "--long", action="store_true",
+                   help="with chunk and file counts, size, embedding model and build time")
+    p.add_argument("--json", action="store_true", help="print each database's catalog entry as JSON")
+    p.add_argument("--rescan", action="store_true", help="rebuild the catalog from the database folders")
+    p.set_defaults(func=cmd_list)
+
+    p = sub.add_parser("compact", help="reclaim the space of deleted and replaced chunks")
+    p.add_argument("db")
+    p.set_defaults(func=cmd_compact)
+
+    p = sub.add_parser("delete", help="delete a database")
+    p.add_argument("db")
+    p.add_argument("-y", "--yes", action="store_true", help="don't ask for confirmation")
+    p.set_defaults(func=cmd_delete)
+
+    p = sub.add_parser("ask", help="answer a single question")
+    p.add_argument("db", help="database name, or several separated by commas")
+    p.add_argument("question")
+    p.add_argument("--json", action="store_true", help="print the full result as JSON")
+    _add_settings_args(p)
+    p.set_defaults(func=cmd_ask)
+
+    p = sub.add_parser("chat", help="hold a conversation with follow-up questions")
+    p.add_argument("db", help="database name, or several separated by commas")
+    _add_settings_args(p)
+    p.set_defaults(func=cmd_chat)
+
+    p = sub.add_parser("batch", help="answer a JSONL file of {\"id\", \"question\"} objects")
+    p.add_argument("db", help="database name, or several separated by commas")
+    p.add_argument("input")
+    p.add_argument("-o", "--output", help="output JSONL file (default: stdout)")
+    p.add_argument("-c", "--concurrency", type=int, default=2, help="questions answered in parallel")
+    _add_settings_args(p)
+    p.set_defaults(func=cmd_batch)
+
+    p = sub.add_parser("serve", help="serve knowledge bases over a local HTTP API")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8765)
+    p.add_argument("-c", "--concurrency", type=int, default=1, help="queries generating at once")
+    p.add_argument("--queue", type=int, default=16, help="queries allowed to wait before 503")
+    _add_settings_args(p)
+    p.set_defaults(func=cmd_serve)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    with contextlib.redirect_stdout(sys.stderr):
+        try:
+            return args.func(args)
+        finally:
+            if args.metrics_out:
+                from loc_gist.rag.metrics import metrics
+                _log(f"Metrics written to {metrics.export(args.metrics_out)}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1 +1,19 @@
-from .api import query_rag, index_db, chain_db
+"""Local RAG pipeline.
+
+The public API lives in `api`, which pulls in langchain, Chroma and the Ollama
+clients. It is imported on first attribute access so light modules such as
+`db_helper`, `metrics` and `progress` can be used without that cost.
+"""
+
+_API_NAMES = ("query_rag", "stream_rag", "answer_rag", "index_db", "add_to_db", "sync_db",
+              "chain_db", "chain_dbs", "configure_chain_db", "list_dbs", "db_info", "compact_db", "delete_db")
+
+
+def __getattr__(name):
+    if name in _API_NAMES:
+        from . import api
+        return getattr(api, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+__all__ = list(_API_NAMES)
@@ -0,0 +1,145 @@
+import contextlib
+import socket
+import threading
+import weakref
+
+import httpcore
+import httpx
+
+_streams = weakref.WeakSet()
+_lock = threading.Lock()
+
+
+class AbortableTransport(httpx.BaseTransport):
+    """httpx transport whose connections can be cut from another thread with `abort_requests`.
+
+    A blocked read only wakes up when its socket is shut down; closing the
+    client or response from another thread leaves it waiting, e.g. for the
+    first token while Ollama is still evaluating a long prompt.
+    """
+
+    def __init__(self):
+        # httpx's own pool settings, over sockets we keep track of
+        self.pool = httpcore.ConnectionPool(max_connections=100, max_keepalive_connections=20, keepalive_expiry=5.0,
+                                            network_backend=_TrackingBackend())
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        core_request = httpcore.Request(
+            method=request.method,
+            url=httpcore.URL(scheme=request.url.raw_scheme, host=request.url.raw_host, port=request.url.port,
+                             target=request.url.raw_path),
+            headers=request.headers.raw,
+            content=request.stream,
+            extensions=request.extensions,
+        )
+        with _httpx_errors():
+            response = self.pool.handle_request(core_request)
+        return httpx.Response(status_code=response.status, headers=response.headers,
+                              stream=_ResponseStream(response.stream), extensions=response.extensions)
+
+    def close(self):
+        self.pool.close()
+
+
+def abort_requests(thread_id: int) -> int:
+    """Shut down the connections last written to by thread `thread_id`; returns how many.
+
+    The request being made on that thread fails with a read error, and the
+    server sees the client disconnect.
+    """
+    with _lock:
+        streams = [stream for stream in _streams if stream.owner == thread_id]
+    for stream in streams:
+        try:
+            stream.get_extra_info("socket").shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+    return len(streams)
+
+
+class _TrackedStream(httpcore.NetworkStream):
+    def __init__(self, stream):
+        self._stream = stream
+        self.owner = None  # thread that sent the latest request on this connection
+
+    def read(self, max_bytes, timeout=None):
+        return self._stream.read(max_bytes, timeout)
+
+    def write(self, buffer, timeout=None):
+        self.owner = threading.get_ident()
+        self._stream.write(buffer, timeout)
+
+    def close(self):
+        with _lock:
+            _streams.discard(self)
+        self._stream.close()
+
+    def start_tls(self, ssl_context, server_hostname=None, timeout=None):
+        return self._stream.start_tls(ssl_context, server_hostname, timeout)
+
+    def get_extra_info(self, info):
+        return self._stream.get_extra_info(info)
+
+
+class _TrackingBackend(httpcore.NetworkBackend):
+    def __init__(self):
+        self._backend = httpcore.SyncBackend()
+
+    def connect_tcp(self, host, port, timeout=None, local_address=None, socket_options=None):
+        return _track(self._backend.connect_tcp(host, port, timeout, local_address, socket_options))
+
+    def connect_unix_socket(self, path, timeout=None, socket_options=None):
+        return _track(self._backend.connect_unix_socket(path, timeout, socket_options))
+
+    def sleep(self, seconds):
+        self._backend.sleep(seconds)
+
+
+def _track(stream):
+    stream = _TrackedStream(stream)
+    with _lock:
+        _streams.add(stream)
+    return stream
+
+
+class _ResponseStream(httpx.SyncByteStream):
+    def __init__(self, stream):
+        self._stream = stream
+
+    def __iter__(self):
+        with _httpx_errors():
+            yield from self._stream
+
+    def close(self):
+        self._stream.close()
+
+
+# Most specific first, so e.g. a read timeout stays a read timeout
+_ERRORS = [
+    (httpcore.ConnectTimeout, httpx.ConnectTimeout),
+    (httpcore.ReadTimeout, httpx.ReadTimeout),
+    (httpcore.WriteTimeout, httpx.WriteTimeout),
+    (httpcore.PoolTimeout, httpx.PoolTimeout),
+    (httpcore.TimeoutException, httpx.TimeoutException),
+    (httpcore.ConnectError, httpx.ConnectError),
+    (httpcore.ReadError, httpx.ReadError),
+    (httpcore.WriteError, httpx.WriteError),
+    (httpcore.NetworkError, httpx.NetworkError),
+    (httpcore.ProxyError, httpx.ProxyError),
+    (httpcore.UnsupportedProtocol, httpx.UnsupportedProtocol),
+    (httpcore.LocalProtocolError, httpx.LocalProtocolError),
+    (httpcore.RemoteProtocolError, httpx.RemoteProtocolError),
+    (httpcore.ProtocolError, httpx.ProtocolError),
+]
+
+
+@contextlib.contextmanager
+def _httpx_errors():
+    """Raise httpcore errors as the httpx ones callers (e.g. the ollama client) expect."""
+    try:
+        yield
+    except Exception as exc:
+        for core_error, httpx_error in _ERRORS:
+            if isinstance(exc, core_error):
+                raise httpx_error(str(exc)) from exc
+        raise
@@ -0,0 +1,95 @@
+import math
+import re
+import threading
+import time
+from collections import OrderedDict
+
+MAX_ANSWERS = 256
+ANSWER_TTL_S = 3600
+
+
+def normalize_question(question: str) -> str:
+    """Lower-case and collapse whitespace/punctuation so trivial variants match."""
+    return " ".join(re.findall(r"\w+", question.lower()))
+
+
+def _cosine(a, b):
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+
+class CachedAnswer:
+    def __init__(self, answer: str, elapsed_s: float, question_vector=None):
+        self.answer = answer
+        self.elapsed_s = elapsed_s
+        self.question_vector = question_vector
+        self.created_at = time.time()
+
+
+class AnswerCache:
+    """In-process LRU/TTL cache of generated answers.
+
+    Entries are keyed by a scope (databases, their versions and the chain
+    settings), the retrieved chunk IDs and the normalized question. With a
+    `similarity_threshold`, a question whose embedding is close enough to a
+    cached question in the same scope is also a hit.
+    """
+
+    def __init__(self, max_entries: int = MAX_ANSWERS, ttl_s: float = ANSWER_TTL_S):
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(scope: tuple, chunk_ids, question: str) -> tuple:
+        return scope, tuple(chunk_ids), normalize_question(question)
+
+    def lookup(self, key: tuple, question_vector=None, similarity_threshold: float | None = None):
+        with self._lock:
+            self._expire()
+            entry = self._entries.get(key)
+            if entry is None and question_vector is not None and similarity_threshold:
+                entry = self._nearest(key[0], question_vector, similarity_threshold)
+            if entry is None:
+                self.misses += 1
+                return None
+            if key in self._entries:
+                self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def store(self, key: tuple, answer: str, elapsed_s: float, question_vector=None):
+        with self._lock:
+            self._entries[key] = CachedAnswer(answer, elapsed_s, question_vector)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, db_name: str | None = None):
+        """Drop every entry, or only those answered from `db_name`."""
+        with self._lock:
+            if db_name is None:
+                self._entries.clear()
+                return
+            # scope[0] is the tuple of databases the answer was retrieved from
+            for key in [k for k in self._entries if db_name in k[0][0]]:
+                del self._entries[key]
+
+    def _expire(self):
+        cutoff = time.time() - self.ttl_s
+        for key in [k for k, e in self._entries.items() if e.created_at < cutoff]:
+            del self._entries[key]
+
+    def _nearest(self, scope, question_vector, threshold):
+        best, best_score = None, threshold
+        for (entry_scope, _, _), entry in self._entries.items():
+            if entry_scope != scope or entry.question_vector is None:
+                continue
+            score = _cosine(question_vector, entry.question_vector)
+            if score >= best_score:
+                best, best_score = entry, score
+        return best
@@ -1,5 +1,25 @@
-from loc_gist.rag.core import init_model, init_db
-from .db_helper import get_db_path, create_db, is_db_exists, get_all_dbs
+import os
+import shutil
+import sqlite3
+import time
+from pathlib import Path
+
+from loc_gist.rag.core import init_model, init_multi_model, init_db, update_db, configure_chain
+from .answer_cache import AnswerCache
+from .chain import doc_id
+from .catalog import EMBED_MODEL, catalog_entry, forget_db, list_catalog, record_db, refresh_db_stats
+from .db_helper import get_db_path, create_db, is_db_exists, db_size
+from .manifest import MANIFEST_FILE
+from .metrics import incr
+from .chunking import chunking_config
+from .quantized import read_store_config, store_config_from_settings, write_store_config
+from .registry import get_registry
+from .settings import DEFAULT_SETTINGS, SETTING_KEYS, SETTING_TYPES
+from .streaming import RagStream
+
+CHROMA_SQLITE_FILE = "chroma.sqlite3"
+
+_answer_cache = AnswerCache()
 
 
 def chain_db(db_name, settings: dict | None = None):
@@ -10,35 +30,334 @@ def chain_db(db_name, settings: dict | None = None):
     db_path = get_db_path(db_name)
 
     settings = settings or {}
-    chain = init_model(
-        db_path,
-        model=settings.get("model", "qwen3:4b"),
-        temperature=settings.get("temperature", 0.0),
-        ctx_window=settings.get("ctx_window", 8192),
-        top_k=settings.get("top_k", 3),
-        max_tokens=settings.get("max_tokens"),
-    )
+    mismatch = _embedding_mismatch([db_name], settings)
+    if mismatch:
+        return None, mismatch
+    chain = init_model(db_path, **_chain_options(settings))
     if chain is None:
         return None, "Failed to initialize RAG chain."
+    chain.db_name = db_name
+    chain.db_names = (db_name,)
+    chain.settings = dict(settings)
 
     return chain, "RAG chain initialized"
 
 
+def chain_dbs(db_names, settings: dict | None = None):
+    """Initialize one RAG chain that retrieves from several databases in parallel."""
+    names = list(dict.fromkeys(db_names))
+    if len(names) == 1:
+        return chain_db(names[0], settings=settings)
+    if not names:
+        return None, "No database selected."
+    missing = [name for name in names if not is_db_exists(name)]
+    if missing:
+        return None, f"Database(s) do not exist: {', '.join(missing)}"
+
+    settings = settings or {}
+    mismatch = _embedding_mismatch(names, settings)
+    if mismatch:
+        return None, mismatch
+    chain = init_multi_model({name: get_db_path(name) for name in names}, **_chain_options(settings))
+    if chain is None:
+        return None, "Failed to initialize RAG chain."
+    chain.db_name = " + ".join(names)
+    chain.db_names = tuple(names)
+    chain.settings = dict(settings)
+
+    return chain, f"RAG chain initialized over {len(names)} databases"
+
+
+def configure_chain_db(chain, settings: dict | None = None):
+    """Apply new generation/retrieval settings to an existing chain without rebuilding it."""
+    settings = settings or {}
+    configure_chain(chain, **_chain_options(settings))
+    chain.settings = dict(settings)
+    return chain, "RAG chain reconfigured"
+
+
+def _embedding_mismatch(db_names, settings: dict) -> str | None:
+    """Why the databases can't be searched with the configured embedding model, if they can't.
+
+    Query vectors from another model live in a different space, so retrieval
+    would quietly return unrelated chunks.
+    """
+    model = settings.get("embedding_model") or EMBED_MODEL
+    for name in db_names:
+        built_with = _built_with(name)
+        if built_with != model:
+            return (f"Database '{name}' was built with embedding model '{built_with}', not '{model}'. "
+                    f"Set embedding_model to '{built_with}' or re-index it.")
+    return None
+
+
+def _built_with(db_name: str) -> str:
+    entry = catalog_entry(db_name) or {}
+    return entry.get("embedding_model") or read_store_config(get_db_path(db_name)).get("embedding_model") or EMBED_MODEL
+
+
+def _new_db_config(settings: dict | None) -> dict:
+    """store.json of a new knowledge base: its vector store, embedding model and how its files are chunked."""
+    return {**store_config_from_settings(settings), "chunking": chunking_config(settings),
+            "embedding_model": (settings or {}).get("embedding_model") or EMBED_MODEL}
+
+
+def _chain_options(settings: dict) -> dict:
+    options = {key: settings.get(key, default) for key, default in DEFAULT_SETTINGS.items()}
+    options["embedding_model"] = options["embedding_model"] or EMBED_MODEL
+    return options
+
+
 def query_rag(chain, question):
     """Queries the RAG chain and return response."""
-    response = chain.invoke(question)
+    started = time.perf_counter()
+    docs = chain.retrieve(question)
+    key, vector, hit = _probe_answer_cache(chain, question, docs)
+    incr("query.count")
+    if hit is not None:
+        incr("answer_cache.hit")
+        print(f"Answer cache hit, saved ~{hit.elapsed_s:.2f}s")
+        return hit.answer
+    response = chain.invoke(question, docs=docs)
+    if key is not None:
+        elapsed = time.perf_counter() - started
+        _answer_cache.store(key, response, elapsed, vector)
+        incr("answer_cache.miss")
+        print(f"Answer cache miss, generated in {elapsed:.2f}s")
     return response
 
 
-def index_db(file_path, db_name):
-    """Index new pdf and return the database path."""
+def stream_rag(chain, question, conversation=None, cancel_event=None):
+    """Streams the RAG chain response as ("think" | "answer", text) pieces.
+
+    The returned RagStream records time-to-first-token once iterated, and its
+    `note` says whether the answer came from the answer cache. With a
+    Conversation the question is answered as its next turn (never cached).
+    Setting `cancel_event` ends the stream and aborts the request to Ollama,
+    also while it is still evaluating the prompt; a cancelled answer is neither cached nor added to the
+    conversation.
+    """
+    if conversation is not None:
+        return _stream_turn(chain, question, conversation, cancel_event)
+    started = time.perf_counter()
+    docs = chain.retrieve(question)
+    key, vector, hit = _probe_answer_cache(chain, question, docs)
+    incr("query.count")
+    if hit is not None:
+        incr("answer_cache.hit")
+        stream = RagStream(iter([hit.answer]), started_at=started, record=False, cancel_event=cancel_event)
+        stream.note = f"Answer cache hit, saved ~{hit.elapsed_s:.2f}s"
+        return stream
+    stats = {}
+    chunks = chain.stream(question, docs=docs, stats=stats)
+    if key is not None:
+        incr("answer_cache.miss")
+        chunks = _store_when_complete(chunks, key, vector, started)
+    stream = RagStream(chunks, started_at=started, stats=stats, cancel_event=cancel_event)
+    stream.note = "Answer cache miss" if key is not None else None
+    return stream
+
+
+def _stream_turn(chain, question, conversation, cancel_event=None):
+    started = time.perf_counter()
+    docs = chain.retrieve(conversation.retrieval_query(question))
+    incr("query.count")
+    user_message = chain.build_turn(question, docs, reserved=conversation.history_tokens())
+    stats = {}
+    chunks = chain.stream_messages(conversation.messages(user_message), stats=stats)
+    stream = RagStream(_add_turn_when_complete(chunks, chain, conversation, question, user_message),
+                       started_at=started, stats=stats, cancel_event=cancel_event)
+    stream.note = f"conversation turn {len(conversation) + 1}"
+    return stream
+
+
+def _add_turn_when_complete(chunks, chain, conversation, question, user_message):
+    parts = []
+    for chunk in chunks:
+        parts.append(chunk)
+        yield chunk
+    conversation.add(question, user_message, "".join(parts))
+    ctx_window = chain.packer.ctx_window if chain.packer else chain.settings.get("ctx_window", 8192)
+    conversation.summarise_in_background(chain.llm, ctx_window)
+
+
+def answer_rag(chain, question, conversation=None):
+    """Answers a question and returns the answer, model thoughts and timings as a dict."""
+    started = time.perf_counter()
+    stream = stream_rag(chain, question, conversation=conversation)
+    answer, thoughts = [], []
+    for kind, text in stream:
+        (thoughts if kind == "think" else answer).append(text)
+    return {
+        "question": question,
+        "answer": "".join(answer).strip(),
+        "thoughts": "".join(thoughts).strip(),
+        "timings": {
+            "first_token_s": stream.first_token_s,
+            "first_answer_s": stream.first_answer_s,
+            "model_load_s": stream.load_s,
+            "prefill_s": stream.prefill_s,
+            "total_s": time.perf_counter() - started,
+        },
+        "note": stream.note,
+    }
+
+
+def get_answer_cache():
+    """The process-wide answer cache shared by query_rag and stream_rag."""
+    return _answer_cache
+
+
+def _probe_answer_cache(chain, question, docs):
+    """Return (key, question vector, cached answer or None); key is None when disabled."""
+    settings = getattr(chain, "settings", None) or {}
+    if not settings.get("answer_cache", True) or getattr(chain, "db_name", None) is None:
+        return None, None, None
+    names = chain.db_names or (chain.db_name,)
+    paths = [path for _, path in chain.stores.values()] if chain.stores else [chain.db_path]
+    options = _chain_options(settings)
+    # Every chain setting, with defaults filled in, so answers never cross settings
+    scope = (names, tuple(_db_version(path) for path in paths), tuple(options[k] for k in SETTING_KEYS))
+    key = AnswerCache.key(scope, [doc_id(d) for d in docs], question)
+    threshold = settings.get("answer_cache_similarity")
+    vector = None
+    if threshold and chain.embedding is not None:
+        vector = chain.embedding.embed_query(question)
+    return key, vector, _answer_cache.lookup(key, vector, threshold)
+
+
+def _store_when_complete(chunks, key, vector, started):
+    parts = []
+    for chunk in chunks:
+        parts.append(chunk)
+        yield chunk
+    # Only reached when the stream ran to completion
+    _answer_cache.store(key, "".join(parts), time.perf_counter() - started, vector)
+
+
+def _db_version(db_path):
+    """Changes whenever the knowledge base is re-indexed, even by another process."""
+    try:
+        return os.stat(os.path.join(db_path, MANIFEST_FILE)).st_mtime_ns
+    except (OSError, TypeError):
+        return 0
+
+
+def index_db(file_path, db_name, progress=None, settings: dict | None = None):
+    """Index new pdf and return the database path.
+
+    Pass a Progress to receive stage updates; if its job is cancelled the
+    half-built database is removed and IndexCancelled is raised. `settings`
+    may set embed_batch_size, embed_workers and insert_batch_size,
+    vector_store ("chroma", "int8" or "float16") with vector_rescore/vector_ivf,
+    and chunker ("structured" or "recursive") with chunk_tokens/chunk_overlap.
+    """
     if is_db_exists(db_name):
         return f"Database '{db_name}' already exists."
+    config = _new_db_config(settings)
+    started = time.perf_counter()
     db_path = create_db(db_name)
-    init_db(file_path, db_path)
+    try:
+        write_store_config(db_path, config)
+        init_db(file_path, db_path, progress=progress, settings=settings)
+    except BaseException:
+        get_registry().close_store(db_path)
+        shutil.rmtree(db_path, ignore_errors=True)
+        forget_db(os.path.basename(db_path))
+        raise
+    finally:
+        _invalidate_answers(db_path)
+    record_db(db_path, time.perf_counter() - started)
     return db_path
 
 
-def list_dbs():
-    """List all available databases."""
-    return get_all_dbs()
+def add_to_db(file_paths, db_name, progress=None, settings: dict | None = None):
+    """Add pdfs to an existing database; unchanged files are skipped."""
+    if not is_db_exists(db_name):
+        return None, f"Database '{db_name}' does not exist."
+    db_path = get_db_path(db_name)
+    started = time.perf_counter()
+    try:
+        summary = update_db(list(file_paths), db_path, progress=progress, settings=settings)
+    finally:
+        _invalidate_answers(db_path)
+    record_db(db_path, time.perf_counter() - started)
+    return summary, _describe_update(db_name, summary)
+
+
+def sync_db(folder, db_name, progress=None, settings: dict | None = None):
+    """Re-sync a database with every pdf in a folder.
+
+    New and changed files are (re-)indexed, and chunks of files that were
+    removed from the folder are deleted. The database is created if missing.
+    """
+    if is_db_exists(db_name):
+        db_path = get_db_path(db_name)
+    else:
+        config = _new_db_config(settings)
+        db_path = create_db(db_name)
+        write_store_config(db_path, config)
+    files = sorted(str(p) for p in Path(folder).rglob("*") if p.suffix.lower() == ".pdf")
+    started = time.perf_counter()
+    try:
+        summary = update_db(files, db_path, progress=progress, settings=settings, remove_missing_under=folder)
+    finally:
+        _invalidate_answers(db_path)
+    record_db(db_path, time.perf_counter() - started)
+    return summary, _describe_update(db_name, summary)
+
+
+def _invalidate_answers(db_path):
+    # Answers are scoped by folder name, which create_db may have normalized ("My Docs" -> "my_docs")
+    _answer_cache.invalidate(os.path.basename(db_path))
+
+
+def _describe_update(db_name, summary):
+    return (f"Updated '{db_name}': {summary['added']} added, {summary['updated']} changed, "
+            f"{summary['unchanged']} unchanged, {summary['removed']} removed ({summary['chunks']} new chunks)")
+
+
+def list_dbs(rescan: bool = False):
+    """List all available databases (from the catalog; `rescan` rebuilds it from the folders)."""
+    return list_catalog(rescan)
+
+
+def db_info(db_name: str) -> dict | None:
+    """Catalog entry of a database: embedding model, chunking, chunk count, source files, size and build time."""
+    return catalog_entry(db_name)
+
+
+def compact_db(db_name: str):
+    """Reclaim the space left by deleted and replaced chunks; returns (bytes freed, status)."""
+    if not is_db_exists(db_name):
+        return None, f"Database '{db_name}' does not exist."
+    db_path = get_db_path(db_name)
+    quantized = read_store_config(db_path).get("backend") == "quantized"
+    # Opened before measuring: opening may create the store's sidecar files
+    collection = get_registry().vector_store(db_path, _built_with(db_name))._collection if quantized else None
+    before = db_size(db_path)
+    if quantized:
+        dropped = collection.compact()
+        collection.optimize()
+        detail = f"dropped {dropped} stale row(s)"
+    else:
+        sqlite_path = os.path.join(db_path, CHROMA_SQLITE_FILE)
+        with sqlite3.connect(sqlite_path) as db:
+            db.execute("VACUUM")
+            db.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        detail = "vacuumed the Chroma database"
+    refresh_db_stats(db_path)
+    freed = max(0, before - db_size(db_path))
+    return freed, f"Compacted '{db_name}': {detail}, {freed / 2 ** 20:.2f} MB freed"
+
+
+def delete_db(db_name: str):
+    """Close and remove a database and its catalog entry; returns (ok, status)."""
+    if not is_db_exists(db_name):
+        return False, f"Database '{db_name}' does not exist."
+    db_path = get_db_path(db_name)
+    get_registry().close_store(db_path)
+    _invalidate_answers(db_path)
+    shutil.rmtree(db_path)
+    forget_db(db_name)
+    return True, f"Deleted '{db_name}'"
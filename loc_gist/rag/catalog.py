@@ -0,0 +1,145 @@
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+from .db_helper import db_size, get_all_dbs, get_db_root
+from .manifest import MANIFEST_FILE
+
+CATALOG_FILE = "catalog.json"
+# Embedding model a knowledge base is built with unless the settings name another
+EMBED_MODEL = "nomic-embed-text"
+
+_lock = threading.Lock()
+_cached = (None, None)  # (catalog file mtime, catalog)
+
+
+def catalog_path() -> str:
+    return str(Path(get_db_root()) / CATALOG_FILE)
+
+
+def catalog_version():
+    """Changes whenever the catalog is rewritten (by this or another process); None if there is none."""
+    try:
+        return os.stat(catalog_path()).st_mtime_ns
+    except OSError:
+        return None
+
+
+def load_catalog(rescan: bool = False) -> dict:
+    """{db name: entry} of every knowledge base, read from catalog.json.
+
+    The parsed file is reused until its mtime changes. The catalog is rebuilt
+    from the database folders when it is missing or `rescan` is set, which
+    also picks up databases copied in or indexed by an older version.
+    """
+    with _lock:
+        catalog = None if rescan else _read()
+        if catalog is None:
+            catalog = _scan()
+            _save(catalog)
+        return catalog
+
+
+def list_catalog(rescan: bool = False) -> list:
+    return sorted(load_catalog(rescan))
+
+
+def catalog_entry(db_name: str) -> dict | None:
+    return load_catalog().get(db_name)
+
+
+def record_db(db_path: str, build_s: float | None = None) -> dict:
+    """Refresh a knowledge base's catalog entry from its folder after it was (re-)indexed."""
+    entry = describe_db(db_path)
+    entry["built_at"] = time.strftime("%Y-%m-%dT%H:%M:%S%z")
+    entry["build_s"] = None if build_s is None else round(build_s, 2)
+    with _lock:
+        catalog = dict(_read() or _scan())
+        catalog[os.path.basename(db_path)] = entry
+        _save(catalog)
+    return entry
+
+
+def refresh_db_stats(db_path: str) -> dict:
+    """Refresh a catalog entry's size and counts without marking it rebuilt (e.g. after compaction)."""
+    name = os.path.basename(db_path)
+    entry = describe_db(db_path)
+    with _lock:
+        catalog = dict(_read() or _scan())
+        for key in ("built_at", "build_s"):
+            entry[key] = catalog.get(name, {}).get(key)
+        catalog[name] = entry
+        _save(catalog)
+    return entry
+
+
+def forget_db(db_name: str):
+    with _lock:
+        catalog = dict(_read() or {})
+        if catalog.pop(db_name, None) is not None:
+            _save(catalog)
+
+
+def describe_db(db_path: str) -> dict:
+    """Catalog entry computed from a database folder's store.json and manifest."""
+    # Imported here: quantized pulls in numpy, which listing databases doesn't need
+    from .quantized import read_store_config
+
+    config = read_store_config(db_path)
+    try:
+        with open(os.path.join(db_path, MANIFEST_FILE), "r", encoding="utf-8") as f:
+            files = json.load(f).get("files", {})
+    except (OSError, ValueError):
+        files = {}
+    return {
+        "embedding_model": config.get("embedding_model") or EMBED_MODEL,
+        "vector_store": config.get("dtype") if config.get("backend") == "quantized" else "chroma",
+        "chunking": config.get("chunking"),
+        "chunks": sum(len(entry.get("chunk_ids", ())) for entry in files.values()),
+        "files": sorted(files),
+        "size_bytes": db_size(db_path),
+        "built_at": None,
+        "build_s": None,
+    }
+
+
+def _scan() -> dict:
+    """Catalog rebuilt from the database folders; call with _lock held."""
+    old = _read() or {}
+    catalog = {}
+    for name in get_all_dbs():
+        entry = describe_db(os.path.join(get_db_root(), name))
+        # Build times can't be recovered from disk, so keep the ones we had
+        for key in ("built_at", "build_s"):
+            entry[key] = old.get(name, {}).get(key)
+        catalog[name] = entry
+    return catalog
+
+
+def _read():
+    """The catalog on disk; call with _lock held."""
+    global _cached
+    version = catalog_version()
+    if version is not None and _cached[0] == version:
+        return _cached[1]
+    try:
+        with open(catalog_path(), "r", encoding="utf-8") as f:
+            catalog = json.load(f).get("dbs", {})
+    except (OSError, ValueError):
+        return None
+    _cached = (version, catalog)
+    return catalog
+
+
+def _save(catalog: dict):
+    """Write the catalog atomically; call with _lock held."""
+    global _cached
+    path = catalog_path()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"version": 1, "dbs": catalog}, f, indent=2)
+    os.replace(tmp, path)
+    _cached = (catalog_version(), catalog)
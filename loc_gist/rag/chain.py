@@ -0,0 +1,78 @@
+import hashlib
+
+from langchain_core.output_parsers import StrOutputParser
+
+from .conversation import TURN_TEMPLATE
+from .metrics import GENERATION, PROMPT_BUILD, RETRIEVE, span
+
+
+class RagChain:
+    """RAG pipeline split into its retrieval and generation steps.
+
+    Behaves like the LCEL chain it wraps (`invoke`/`stream` take the question),
+    but also lets callers retrieve first and pass the documents in, e.g. to
+    look the answer up in a cache before paying for generation.
+    """
+
+    def __init__(self, retriever, prompt, llm, vector_store=None, embedding=None, packer=None):
+        self.retriever = retriever
+        self.prompt = prompt
+        self.llm = llm
+        self.packer = packer
+        self.vector_store = vector_store
+        self.embedding = embedding
+        self.db_name = None
+        self.db_path = None
+        self.db_names = ()
+        self.stores = None          # {db name: (vector store, db path)} when searching several
+        self.settings = {}
+        self.answer_chain = llm | StrOutputParser()
+
+    def rebind(self, llm=None, retriever=None, packer=None):
+        """Swap the LLM, retriever and/or context packer; in-flight calls finish with the old ones."""
+        if retriever is not None:
+            self.retriever = retriever
+        if packer is not None:
+            self.packer = packer
+        if llm is not None:
+            self.llm = llm
+            self.answer_chain = llm | StrOutputParser()
+
+    def retrieve(self, question):
+        with span(RETRIEVE):
+            return self.retriever.invoke(question)
+
+    def build_prompt(self, question, docs):
+        with span(PROMPT_BUILD):
+            context = self.packer.pack(docs, question) if self.packer else docs
+            return self.prompt.invoke({"context": context, "question": question})
+
+    def invoke(self, question, docs=None):
+        docs = self.retrieve(question) if docs is None else docs
+        prompt = self.build_prompt(question, docs)
+        # Without streaming the first token can't be seen, so this includes prefill
+        with span(GENERATION):
+            return self.answer_chain.invoke(prompt)
+
+    def build_turn(self, question, docs, reserved: int = 0) -> str:
+        """The user message of a conversation turn; `reserved` tokens of history shrink the context budget."""
+        with span(PROMPT_BUILD):
+            context = self.packer.pack(docs, question, reserved=reserved) if self.packer else docs
+            return TURN_TEMPLATE.format(context=context, question=question)
+
+    def stream(self, question, docs=None, stats: dict | None = None):
+        """Yield the answer text as it streams; `stats` receives Ollama's final timings (load_duration etc.)."""
+        docs = self.retrieve(question) if docs is None else docs
+        return self.stream_messages(self.build_prompt(question, docs), stats=stats)
+
+    def stream_messages(self, prompt, stats: dict | None = None):
+        """Stream an already built prompt (a prompt value or a list of messages)."""
+        for chunk in self.llm.stream(prompt):
+            if stats is not None and chunk.response_metadata.get("done"):
+                stats.update(chunk.response_metadata)
+            yield chunk.content
+
+
+def doc_id(doc) -> str:
+    """Stable identifier of a retrieved chunk (its store ID, else a content hash)."""
+    return getattr(doc, "id", None) or hashlib.sha256(doc.page_content.encode("utf-8")).hexdigest()[:16]
@@ -0,0 +1,296 @@
+import re
+import time
+from functools import lru_cache
+
+from langchain_core.documents import Document
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from .context import estimate_tokens
+
+# Chunk size and overlap in estimated tokens (see context.CHARS_PER_TOKEN).
+# nomic-embed-text accepts far more, but smaller chunks retrieve more precisely
+CHUNK_TOKENS = 256
+CHUNK_OVERLAP_TOKENS = 32
+DEFAULT_CHUNKER = "structured"
+# How knowledge bases indexed before chunking was configurable were split (1000/200 characters)
+LEGACY_CHUNKING = {"chunker": "recursive", "chunk_tokens": 250, "chunk_overlap": 50}
+
+# A line shorter than this share of the page's full line width that ends a
+# sentence is taken as the end of a paragraph
+PARAGRAPH_END_WIDTH = 0.75
+MAX_HEADING_CHARS = 80
+
+_NUMBERED_HEADING = re.compile(r"^(?:\d+(?:\.\d+)*\.?|[IVXLC]+\.|[A-Z]\.)\s+[A-Z]")
+_KEYWORD_HEADING = re.compile(r"^(?:chapter|section|part|appendix)\s+\w", re.IGNORECASE)
+_BULLET = re.compile(r"^(?:[•▪◦‣*-]|\(?[a-z0-9]{1,3}[.)])\s")
+_CELL_GAP = re.compile(r"\S(?:\s{2,}|\t|\s*\|\s*)(?=\S)")
+_NUMBER = re.compile(r"^[-+(]?[$€£]?\d[\d,.]*%?\)?$")
+_SENTENCE_END = re.compile(r"(?<=[.!?])[\"')\]]*\s+(?=[\"'(\[]?[A-Z0-9])")
+_WORD = re.compile(r"\S+")
+
+HEADING, TABLE, TEXT = "heading", "table", "text"
+
+
+class StructuredChunker:
+    """Token-sized chunks that follow the layout of the page text.
+
+    The text is read as headings, paragraphs and tables (runs of lines with
+    column gaps or mostly numbers). A heading always starts a new chunk and is
+    recorded as the chunks' `section`; paragraphs are split at sentence
+    boundaries and tables at row boundaries only when they don't fit, and a
+    chunk would rather end before a paragraph than cut it while under half
+    full. Consecutive chunks of a section share `chunk_overlap` tokens of
+    whole sentences or rows. Every chunk is a contiguous span of the page with
+    its `start_index`, so the context packer can merge neighbours again.
+    """
+
+    name = "structured"
+
+    def __init__(self, chunk_tokens: int = CHUNK_TOKENS, chunk_overlap: int = CHUNK_OVERLAP_TOKENS,
+                 length_function=estimate_tokens):
+        self.chunk_tokens = max(16, int(chunk_tokens))
+        self.chunk_overlap = max(0, min(int(chunk_overlap), self.chunk_tokens // 2))
+        self.length_function = length_function
+
+    def split_documents(self, documents) -> list:
+        chunks = []
+        for doc in documents:
+            text = doc.page_content
+            for start, end, section in self._spans(text):
+                metadata = dict(doc.metadata or {}, start_index=start)
+                if section:
+                    metadata["section"] = section
+                chunks.append(Document(page_content=text[start:end], metadata=metadata))
+        return chunks
+
+    def _spans(self, text):
+        """(start, end, section) of each chunk of `text`."""
+        spans = []
+        section = None
+        current = []
+        for unit in self._units(text):
+            start, end, tokens, kind, block = unit
+            if kind == HEADING:
+                if any(u[3] != HEADING for u in current):
+                    spans.append((current[0][0], current[-1][1], section))
+                    current = []
+                section = text[start:end]
+            else:
+                # A heading stays with the text after it, even if that overfills the chunk slightly
+                while any(u[3] != HEADING for u in current) and _size(current) + tokens > self.chunk_tokens:
+                    keep, carry = self._break(current, block)
+                    spans.append((keep[0][0], keep[-1][1], section))
+                    current = carry or self._overlap(keep, block, tokens)
+            current.append(unit)
+        if current:
+            spans.append((current[0][0], current[-1][1], section))
+        return spans
+
+    def _break(self, current, block):
+        """Split `current` before the start of `block` if that keeps the chunk at least half full."""
+        cut = len(current)
+        while cut and current[cut - 1][4] == block:
+            cut -= 1
+        if 0 < cut < len(current) and _size(current[:cut]) * 2 >= self.chunk_tokens:
+            return current[:cut], current[cut:]
+        return current, []
+
+    def _overlap(self, keep, block, next_tokens):
+        """The last sentences/rows of `keep` (up to chunk_overlap tokens) when the break cuts `block` in two."""
+        tail = []
+        budget = min(self.chunk_overlap, self.chunk_tokens - next_tokens)
+        for unit in reversed(keep):
+            if unit[4] != block or unit[2] > budget:
+                break
+            tail.insert(0, unit)
+            budget -= unit[2]
+        return tail
+
+    def _units(self, text):
+        """Smallest pieces a chunk may break between: (start, end, tokens, kind, block number)."""
+        units = []
+        for number, (kind, start, end) in enumerate(_blocks(text)):
+            if kind == HEADING:
+                pieces = [(start, end)]
+            elif kind == TABLE:
+                pieces = list(_lines(text, start, end))
+            elif self.length_function(text[start:end]) <= self.chunk_tokens:
+                pieces = [(start, end)]
+            else:
+                pieces = list(_sentences(text, start, end))
+            for piece_start, piece_end in pieces:
+                tokens = self.length_function(text[piece_start:piece_end])
+                if tokens <= self.chunk_tokens:
+                    units.append((piece_start, piece_end, tokens, kind, number))
+                    continue
+                # Small windows, so chunks still fill up and can overlap
+                window = max(self.chunk_overlap, self.chunk_tokens // 8)
+                for word_start, word_end in _word_windows(text, piece_start, piece_end, window,
+                                                          self.length_function):
+                    units.append((word_start, word_end, self.length_function(text[word_start:word_end]), kind,
+                                  number))
+        return units
+
+
+class RecursiveChunker:
+    """LangChain's recursive character splitter, sized in estimated tokens instead of characters."""
+
+    name = "recursive"
+
+    def __init__(self, chunk_tokens: int = CHUNK_TOKENS, chunk_overlap: int = CHUNK_OVERLAP_TOKENS,
+                 length_function=estimate_tokens):
+        self.chunk_tokens = int(chunk_tokens)
+        self.chunk_overlap = int(chunk_overlap)
+        self.splitter = RecursiveCharacterTextSplitter(
+            chunk_size=self.chunk_tokens,
+            chunk_overlap=self.chunk_overlap,
+            length_function=length_function,
+            is_separator_regex=False,
+        )
+
+    def split_documents(self, documents) -> list:
+        # The splitter's add_start_index assumes the overlap is counted in characters,
+        # so offsets (which let the context packer merge neighbours) are found here
+        chunks = []
+        for doc in documents:
+            offset = 0
+            for chunk in self.splitter.split_documents([doc]):
+                start = doc.page_content.find(chunk.page_content, offset)
+                if start >= 0:
+                    chunk.metadata["start_index"] = start
+                    offset = start + 1
+                chunks.append(chunk)
+        return chunks
+
+
+CHUNKERS = {StructuredChunker.name: StructuredChunker, RecursiveChunker.name: RecursiveChunker}
+
+
+def chunking_config(settings: dict | None) -> dict:
+    """Chunking for a new knowledge base from the `chunker`, `chunk_tokens` and `chunk_overlap` settings."""
+    settings = settings or {}
+    chunker = settings.get("chunker") or DEFAULT_CHUNKER
+    if chunker not in CHUNKERS:
+        raise ValueError(f"Unknown chunker '{chunker}', expected {' or '.join(CHUNKERS)}")
+    tokens = int(settings.get("chunk_tokens") or CHUNK_TOKENS)
+    overlap = settings.get("chunk_overlap")
+    overlap = CHUNK_OVERLAP_TOKENS if overlap is None else int(overlap)
+    if not 0 <= overlap < tokens:
+        raise ValueError(f"chunk_overlap must be between 0 and chunk_tokens ({tokens}), got {overlap}")
+    return {"chunker": chunker, "chunk_tokens": tokens, "chunk_overlap": overlap}
+
+
+def describe(config: dict | None) -> str:
+    config = config or LEGACY_CHUNKING
+    return f"{config['chunker']}, {config['chunk_tokens']} tokens, {config['chunk_overlap']} overlap"
+
+
+def get_chunker(config: dict | None = None):
+    """The chunker a knowledge base's `chunking` config describes (LEGACY_CHUNKING when there is none)."""
+    config = config or LEGACY_CHUNKING
+    return _chunker(config["chunker"], int(config["chunk_tokens"]), int(config["chunk_overlap"]))
+
+
+@lru_cache(maxsize=8)
+def _chunker(name, chunk_tokens, chunk_overlap):
+    return CHUNKERS[name](chunk_tokens, chunk_overlap)
+
+
+def split_pages(config: dict | None, pages) -> list:
+    """Process-pool worker: split each page, returning (chunks, seconds) per page."""
+    chunker = get_chunker(config)
+    results = []
+    for page in pages:
+        started = time.perf_counter()
+        chunks = chunker.split_documents([page])
+        results.append((chunks, time.perf_counter() - started))
+    return results
+
+
+def _size(units) -> int:
+    return sum(unit[2] for unit in units)
+
+
+def _blocks(text):
+    """(kind, start, end) of the headings, tables and paragraphs of a page, in order."""
+    lines = [(start, end, text[start:end]) for start, end in _lines(text, 0, len(text), keep_blank=True)]
+    widths = sorted(len(line) for _, _, line in lines if line)
+    full_width = widths[int(len(widths) * 0.9)] if widths else 0
+    rows = [bool(line) and _is_table_row(line) for _, _, line in lines]
+
+    blocks = []
+    previous = None
+    for i, (start, end, line) in enumerate(lines):
+        if not line:
+            previous = None
+            continue
+        if rows[i] and ((i and rows[i - 1]) or (i + 1 < len(rows) and rows[i + 1])):
+            kind = TABLE  # a lone line with gaps is just text
+        elif _is_heading(line):
+            kind = HEADING
+        else:
+            kind = TEXT
+        joins = (previous is not None and kind == blocks[-1][0] != HEADING
+                 and not (kind == TEXT and _ends_paragraph(previous, line, full_width)))
+        if joins:
+            blocks[-1][2] = end
+        else:
+            blocks.append([kind, start, end])
+        previous = line
+    return [tuple(block) for block in blocks]
+
+
+def _lines(text, start, end, keep_blank: bool = False):
+    """(start, end) of each line in text[start:end], without surrounding whitespace."""
+    offset = start
+    for raw in text[start:end].splitlines(keepends=True):
+        stripped = raw.strip()
+        if stripped or keep_blank:
+            lead = offset + len(raw) - len(raw.lstrip())
+            yield (lead, lead + len(stripped)) if stripped else (offset, offset)
+        offset += len(raw)
+
+
+def _sentences(text, start, end):
+    offset = start
+    for match in _SENTENCE_END.finditer(text, start, end):
+        yield offset, match.start()
+        offset = match.end()
+    if offset < end:
+        yield offset, end
+
+
+def _word_windows(text, start, end, limit, length_function):
+    """Split a span with no usable sentence break into runs of whole words under `limit` tokens."""
+    window_start = window_end = None
+    for match in _WORD.finditer(text, start, end):
+        if window_start is not None and length_function(text[window_start:match.end()]) > limit:
+            yield window_start, window_end
+            window_start = None
+        if window_start is None:
+            window_start = match.start()
+        window_end = match.end()
+    if window_start is not None:
+        yield window_start, window_end
+
+
+def _is_heading(line: str) -> bool:
+    if len(line) > MAX_HEADING_CHARS or line[-1] in ".,;:" or not any(c.isalpha() for c in line):
+        return False
+    if _NUMBERED_HEADING.match(line) or _KEYWORD_HEADING.match(line):
+        return len(line.split()) <= 12
+    letters = [c for c in line if c.isalpha()]
+    return len(letters) >= 3 and all(c.isupper() for c in letters)
+
+
+def _is_table_row(line: str) -> bool:
+    if len(_CELL_GAP.findall(line)) >= 2:
+        return True
+    cells = line.split()
+    return len(cells) >= 3 and sum(bool(_NUMBER.match(c)) for c in cells) * 2 >= len(cells)
+
+
+def _ends_paragraph(previous: str, line: str, full_width: int) -> bool:
+    if _BULLET.match(line):
+        return True
+    return previous[-1] in ".!?:\"'”)" and len(previous) < full_width * PARAGRAPH_END_WIDTH
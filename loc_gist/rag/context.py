@@ -0,0 +1,137 @@
+import os
+
+# Share of the context window the retrieved context may fill
+CONTEXT_SHARE = 0.6
+# No tokenizer endpoint is available for local models, so counts are estimated;
+# ~4 characters per token holds for English text with Llama/Qwen tokenizers
+CHARS_PER_TOKEN = 4
+# Tokens reserved for the template, the question and chat formatting
+PROMPT_OVERHEAD_TOKENS = 64
+# Suffix/prefix overlap searched when chunks carry no start_index (the splitter overlaps 200 chars)
+MIN_OVERLAP_CHARS = 20
+MAX_OVERLAP_CHARS = 400
+# Don't bother adding a truncated block smaller than this
+MIN_BLOCK_TOKENS = 32
+
+
+def estimate_tokens(text: str) -> int:
+    return max(1, -(-len(text) // CHARS_PER_TOKEN))
+
+
+class ContextPacker:
+    """Turns retrieved chunks into the smallest context string that keeps them all.
+
+    Duplicate chunks are dropped, overlapping or adjacent chunks from the same
+    page are merged back into one passage, and passages are added in retrieval
+    rank order until `share` of the context window (minus the answer's
+    `max_tokens`) is used.
+    """
+
+    def __init__(self, ctx_window: int = 8192, max_tokens: int | None = None, share: float = CONTEXT_SHARE,
+                 count_tokens=estimate_tokens):
+        self.ctx_window = ctx_window
+        self.max_tokens = max_tokens
+        self.share = min(1.0, max(0.05, share))
+        self.count_tokens = count_tokens
+
+    def budget(self, question: str = "", reserved: int = 0) -> int:
+        """Tokens available for the context of `question`, with `reserved` tokens already in use (e.g. history)."""
+        room = (self.ctx_window - (self.max_tokens or 0) - PROMPT_OVERHEAD_TOKENS - self.count_tokens(question)
+                - reserved)
+        return max(0, min(int(self.ctx_window * self.share), room))
+
+    def pack(self, docs, question: str = "", reserved: int = 0) -> str:
+        budget = self.budget(question, reserved)
+        parts, used = [], 0
+        blocks = merge_chunks(docs)
+        for block in blocks:
+            text = f"[{block.label}]\n{block.text}"
+            tokens = self.count_tokens(text)
+            if used + tokens > budget:
+                # Keep the start of a passage that doesn't fit, if enough room is left
+                room = budget - used
+                if room < MIN_BLOCK_TOKENS:
+                    continue
+                text = text[:(room - 1) * CHARS_PER_TOKEN].rsplit(" ", 1)[0] + " ..."
+                tokens = self.count_tokens(text)
+            parts.append(text)
+            used += tokens
+        print(f"Packed {len(docs)} chunk(s) into {len(parts)}/{len(blocks)} passage(s), "
+              f"~{used} of {budget} context tokens")
+        return "\n\n".join(parts)
+
+
+class _Block:
+    __slots__ = ("key", "label", "rank", "start", "end", "text")
+
+    def __init__(self, key, label, rank, start, text):
+        self.key = key
+        self.label = label
+        self.rank = rank
+        self.start = start
+        self.end = None if start is None else start + len(text)
+        self.text = text
+
+    def absorb(self, other) -> bool:
+        """Merge `other` into this block if their text overlaps (or, with offsets, touches)."""
+        if self.start is not None and other.start is not None:
+            if other.start > self.end + 2:
+                return False
+            if other.start >= self.end:
+                # Adjacent: only the whitespace stripped by the splitter lies between them
+                self.text += " " + other.text
+                self.end = other.end
+            elif other.end > self.end:
+                self.text += other.text[self.end - other.start:]
+                self.end = other.end
+        elif other.text in self.text:
+            pass
+        elif overlap := _overlap(self.text, other.text):
+            self.text += other.text[overlap:]
+        elif overlap := _overlap(other.text, self.text):
+            self.text = other.text + self.text[overlap:]
+        else:
+            return False
+        self.rank = min(self.rank, other.rank)
+        return True
+
+
+def merge_chunks(docs) -> list:
+    """Dedupe chunks and merge neighbours from the same page; returns blocks in rank order."""
+    groups = {}
+    seen = set()
+    for rank, doc in enumerate(docs):
+        text = doc.page_content.strip()
+        if not text or text in seen:
+            continue
+        seen.add(text)
+        metadata = doc.metadata or {}
+        key = (metadata.get("source"), metadata.get("page"))
+        groups.setdefault(key, []).append(_Block(key, _label(metadata), rank, metadata.get("start_index"), text))
+
+    merged = []
+    for blocks in groups.values():
+        # Document order within the page; without offsets keep rank order and rely on text overlap
+        if all(b.start is not None for b in blocks):
+            blocks.sort(key=lambda b: b.start)
+        current = blocks[0]
+        for block in blocks[1:]:
+            if not current.absorb(block):
+                merged.append(current)
+                current = block
+        merged.append(current)
+    return sorted(merged, key=lambda b: b.rank)
+
+
+def _overlap(left: str, right: str) -> int:
+    """Length of the longest suffix of `left` that is a prefix of `right`."""
+    for size in range(min(len(left), len(right), MAX_OVERLAP_CHARS), MIN_OVERLAP_CHARS - 1, -1):
+        if left.endswith(right[:size]):
+            return size
+    return 0
+
+
+def _label(metadata) -> str:
+    source = os.path.basename(str(metadata.get("source") or "document"))
+    page = metadata.get("page_label") or (metadata["page"] + 1 if isinstance(metadata.get("page"), int) else None)
+    return f"{source} p.{page}" if page is not None else source
@@ -0,0 +1,134 @@
+import re
+import threading
+import time
+
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+
+from .context import estimate_tokens
+
+# Share of the context window the history may fill before older turns are summarised
+HISTORY_SHARE = 0.4
+# Turns kept word for word when the older ones are folded into the summary
+KEEP_TURNS = 2
+SUMMARY_MAX_TOKENS = 256
+
+SYSTEM_PROMPT = """You answer questions about the user's documents.
+Answer based ONLY on the context given with each question and on the conversation so far.
+Do not make up any information. Small talk is allowed."""
+TURN_TEMPLATE = """Context:
+{context}
+
+Question: {question}"""
+SUMMARY_PROMPT = """Summarise this conversation in a few sentences. Keep the names, numbers and facts
+the user may refer back to, and leave out pleasantries.
+
+{transcript}
+
+Summary: /no_think"""
+
+_THINK = re.compile(r"<think>.*?</think>", re.DOTALL)
+
+
+class Conversation:
+    """Chat history laid out so that each turn's prompt extends the previous one.
+
+    The messages are append-only: the fixed system prompt, the running
+    summary, then every kept turn exactly as it was sent (its retrieved
+    context included) and answered. Ollama can reuse the KV cache of that
+    unchanged prefix and only prefill the new turn. Once the history fills
+    `history_share` of the context window, all but the last `keep_turns`
+    turns are folded into the summary in one go, so the prefix changes rarely.
+    """
+
+    def __init__(self, system_prompt: str = SYSTEM_PROMPT, history_share: float = HISTORY_SHARE,
+                 keep_turns: int = KEEP_TURNS):
+        self.system_prompt = system_prompt
+        self.history_share = history_share
+        self.keep_turns = max(0, keep_turns)
+        self.summary = None
+        self.turns = []             # (question, user message as sent, answer)
+        self.summarised_turns = 0
+        self._lock = threading.RLock()
+        self._summary_thread = None
+
+    def __len__(self):
+        return self.summarised_turns + len(self.turns)
+
+    def clear(self):
+        with self._lock:
+            self.summary = None
+            self.turns = []
+            self.summarised_turns = 0
+
+    def retrieval_query(self, question: str) -> str:
+        """Follow-ups like "and its price?" retrieve better together with the previous question."""
+        self.wait_for_summary()
+        with self._lock:
+            return f"{self.turns[-1][0]}\n{question}" if self.turns else question
+
+    def history_tokens(self) -> int:
+        self.wait_for_summary()
+        with self._lock:
+            return sum(estimate_tokens(m.content) for m in self._history())
+
+    def messages(self, user_message: str) -> list:
+        """The prompt for a new turn: the history followed by `user_message`."""
+        self.wait_for_summary()
+        with self._lock:
+            return self._history() + [HumanMessage(content=user_message)]
+
+    def add(self, question: str, user_message: str, answer: str):
+        with self._lock:
+            self.turns.append((question, user_message, _THINK.sub("", answer).strip()))
+
+    def _history(self) -> list:
+        messages = [SystemMessage(content=self.system_prompt)]
+        if self.summary:
+            messages.append(SystemMessage(content=f"Summary of the earlier conversation:\n{self.summary}"))
+        for _, user_message, answer in self.turns:
+            messages += [HumanMessage(content=user_message), AIMessage(content=answer)]
+        return messages
+
+    def needs_summary(self, ctx_window: int) -> bool:
+        return len(self.turns) > self.keep_turns and self.history_tokens() > ctx_window * self.history_share
+
+    def summarise(self, llm, ctx_window: int) -> bool:
+        """Fold all but the last `keep_turns` turns into the summary if the history is too long."""
+        with self._lock:
+            if not self.needs_summary(ctx_window):
+                return False
+            cut = len(self.turns) - self.keep_turns
+            older = self.turns[:cut]
+            started = time.perf_counter()
+            transcript = "\n".join(f"User: {q}\nAssistant: {a}" for q, _, a in older)
+            if self.summary:
+                transcript = f"Earlier summary: {self.summary}\n{transcript}"
+            try:
+                summarizer = llm.model_copy(update={"num_predict": SUMMARY_MAX_TOKENS, "temperature": 0.0})
+                summary = _THINK.sub("", summarizer.invoke(SUMMARY_PROMPT.format(transcript=transcript)).content).strip()
+            except Exception as e:
+                # Without a model keep the questions, which is what follow-ups refer to most
+                print(f"Conversation summary failed, keeping questions only: {e}")
+                summary = " ".join([self.summary or ""] + [f"Asked: {q}" for q, _, _ in older]).strip()
+            self.summary = summary
+            self.turns = self.turns[cut:]
+            self.summarised_turns += cut
+            print(f"Summarised {cut} older turn(s) in {time.perf_counter() - started:.2f}s, "
+                  f"history now ~{self.history_tokens()} tokens")
+            return True
+
+    def summarise_in_background(self, llm, ctx_window: int):
+        """Run `summarise` on a daemon thread; the next turn's history waits for it to finish."""
+        self.wait_for_summary()
+        if self.needs_summary(ctx_window):
+            # Set before it starts, so a turn that begins right away already waits for it
+            self._summary_thread = threading.Thread(target=self.summarise, args=(llm, ctx_window),
+                                                    name="conversation-summary", daemon=True)
+            self._summary_thread.start()
+
+    def wait_for_summary(self):
+        """Block until a background summary, if any, has replaced the turns it folds."""
+        thread = self._summary_thread
+        # Not from the summary thread itself, which reads the history while holding the lock
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
@@ -1,48 +1,129 @@
 import os
-from langchain_ollama import ChatOllama
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.runnables import RunnablePassthrough
-from langchain_core.output_parsers import StrOutputParser
 
-from .pdf_reader import load_documents, split_documents
-from .embedding import get_embedding, get_vector_store, index_docs
-
-
-def init_model(db_path, model="qwen3:4b", temperature: float = 0.0, ctx_window: int = 8192, top_k: int = 3, max_tokens: int | None = None):
-    embedding_function = get_embedding()
+from .chain import RagChain
+from .pdf_reader import iter_pages, iter_chunks, get_extract_pool
+from .embedding import (add_docs, delete_docs,
+                        EMBED_BATCH_SIZE, EMBED_WORKERS, INSERT_BATCH_SIZE)
+from .embed_cache import CachedEmbeddings
+from .manifest import Manifest, iter_chunk_ids
+from .progress import Progress
+from .registry import get_registry
+from .hybrid import HybridRetriever
+from .multi import MultiRetriever
+from .lexical import load_lexical_index
+from .rerank import RerankingRetriever, RERANK_FETCH_K, RERANK_BUDGET_S
+from .context import ContextPacker, CONTEXT_SHARE
+from .chunking import describe
+from .catalog import EMBED_MODEL
+from .db_helper import db_size
+from .quantized import read_store_config
+from .warmup import KEEP_ALIVE
+
+
+def init_model(db_path, model="qwen3:4b", temperature: float = 0.0, ctx_window: int = 8192, top_k: int = 3, max_tokens: int | None = None,
+               lexical_weight: float = 0.0, rerank_model: str | None = None, rerank_fetch_k: int = RERANK_FETCH_K,
+               rerank_budget_s: float = RERANK_BUDGET_S, context_share: float = CONTEXT_SHARE, keep_alive=KEEP_ALIVE,
+               embedding_model: str = EMBED_MODEL):
+    registry = get_registry()
+    embedding_function = registry.embedding(embedding_model, keep_alive=keep_alive)
 
     if not os.path.exists(db_path):
         return None
     else:
         print("Loading existing DB...")
-        vector_store = get_vector_store(embedding_function, db_path)
+        vector_store = registry.vector_store(db_path, embedding_model)
 
-    rag_chain = init_chain(vector_store, model=model, temperature=temperature, ctx_window=ctx_window, top_k=top_k, max_tokens=max_tokens)
+    rag_chain = init_chain(vector_store, model=model, temperature=temperature, ctx_window=ctx_window, top_k=top_k, max_tokens=max_tokens,
+                           db_path=db_path, lexical_weight=lexical_weight, rerank_model=rerank_model,
+                           rerank_fetch_k=rerank_fetch_k, rerank_budget_s=rerank_budget_s, context_share=context_share,
+                           keep_alive=keep_alive)
+    rag_chain.embedding = embedding_function
+    rag_chain.db_path = db_path
 
     return rag_chain
 
 
-def init_chain(vector_store, model: str = "qwen3:4b", temperature: float = 0.0, ctx_window: int = 8192, top_k: int = 3, max_tokens: int | None = None):
-    """Creates the RAG chain."""
-    # Initialize the LLM
-    llm_kwargs = dict(
-        model=model,
-        temperature=temperature,  # Lower temperature => more factual
-        num_ctx=ctx_window,       # Context window size
+def init_multi_model(db_paths: dict, model="qwen3:4b", temperature: float = 0.0, ctx_window: int = 8192, top_k: int = 3,
+                     max_tokens: int | None = None, lexical_weight: float = 0.0, rerank_model: str | None = None,
+                     rerank_fetch_k: int = RERANK_FETCH_K, rerank_budget_s: float = RERANK_BUDGET_S,
+                     context_share: float = CONTEXT_SHARE, keep_alive=KEEP_ALIVE, embedding_model: str = EMBED_MODEL):
+    """Like init_model, but retrieves from every database in `db_paths` ({name: path}) at once."""
+    registry = get_registry()
+    if not all(os.path.exists(path) for path in db_paths.values()):
+        return None
+    stores = {name: (registry.vector_store(path, embedding_model), path) for name, path in db_paths.items()}
+
+    rag_chain = init_chain(None, model=model, temperature=temperature, ctx_window=ctx_window, top_k=top_k, max_tokens=max_tokens,
+                           lexical_weight=lexical_weight, rerank_model=rerank_model, rerank_fetch_k=rerank_fetch_k,
+                           rerank_budget_s=rerank_budget_s, context_share=context_share, stores=stores,
+                           keep_alive=keep_alive)
+    rag_chain.embedding = registry.embedding(embedding_model, keep_alive=keep_alive)
+    rag_chain.stores = stores
+    return rag_chain
+
+
+def configure_chain(rag_chain, model: str = "qwen3:4b", temperature: float = 0.0, ctx_window: int = 8192, top_k: int = 3, max_tokens: int | None = None,
+                    lexical_weight: float = 0.0, rerank_model: str | None = None, rerank_fetch_k: int = RERANK_FETCH_K,
+                    rerank_budget_s: float = RERANK_BUDGET_S, context_share: float = CONTEXT_SHARE, keep_alive=KEEP_ALIVE,
+                    embedding_model: str = EMBED_MODEL):
+    """Rebinds the LLM, retriever and context packing parameters of an existing chain in place.
+
+    The embedding model can't change here: the chain's vector stores were opened with theirs.
+    """
+    get_registry().embedding(embedding_model, keep_alive=keep_alive)
+    rag_chain.rebind(
+        llm=get_registry().llm(model, ctx_window, temperature, max_tokens, keep_alive),
+        retriever=init_retriever(rag_chain.vector_store, top_k, db_path=rag_chain.db_path, lexical_weight=lexical_weight,
+                                 rerank_model=rerank_model, rerank_fetch_k=rerank_fetch_k, rerank_budget_s=rerank_budget_s,
+                                 stores=rag_chain.stores),
+        packer=ContextPacker(ctx_window, max_tokens, share=context_share),
     )
-    if max_tokens is not None:
-        # Limit generation length if provided
-        llm_kwargs["num_predict"] = max_tokens
+    print(f"Chain reconfigured: {model}, temperature: {temperature}, top_k: {top_k}, max_tokens: {max_tokens}")
+    return rag_chain
 
-    llm = ChatOllama(**llm_kwargs)
+
+def init_retriever(vector_store, top_k: int = 3, db_path: str | None = None, lexical_weight: float = 0.0,
+                   rerank_model: str | None = None, rerank_fetch_k: int = RERANK_FETCH_K,
+                   rerank_budget_s: float = RERANK_BUDGET_S, stores: dict | None = None):
+    """Vector similarity retriever, fused with BM25 results when `lexical_weight` > 0.
+
+    With `stores` ({name: (vector store, db path)}) it searches all of them in
+    parallel instead. With a `rerank_model` it over-fetches `rerank_fetch_k`
+    candidates and keeps the `top_k` the reranker scores highest.
+    """
+    k = int(top_k) if top_k else 3
+    fetch_k = max(k, int(rerank_fetch_k)) if rerank_model else k
+    if stores:
+        retriever = MultiRetriever(stores, k=fetch_k, lexical_weight=lexical_weight)
+    elif lexical_weight and db_path:
+        retriever = HybridRetriever(vector_store, db_path, k=fetch_k, lexical_weight=lexical_weight)
+    else:
+        retriever = vector_store.as_retriever(
+            search_type="similarity",  # Or "mmr"
+            search_kwargs={'k': fetch_k}  # Retrieve top-k relevant chunks
+        )
+    if rerank_model:
+        reranker = get_registry().reranker(rerank_model)
+        retriever = RerankingRetriever(retriever, reranker, k=k, budget_s=rerank_budget_s)
+    return retriever
+
+
+def init_chain(vector_store, model: str = "qwen3:4b", temperature: float = 0.0, ctx_window: int = 8192, top_k: int = 3, max_tokens: int | None = None,
+               db_path: str | None = None, lexical_weight: float = 0.0, rerank_model: str | None = None,
+               rerank_fetch_k: int = RERANK_FETCH_K, rerank_budget_s: float = RERANK_BUDGET_S,
+               context_share: float = CONTEXT_SHARE, stores: dict | None = None, keep_alive=KEEP_ALIVE):
+    """Creates the RAG chain."""
+    # Initialize the LLM (lower temperature => more factual); the registry
+    # shares one Ollama client per model and context window size
+    llm = get_registry().llm(model, ctx_window, temperature, max_tokens, keep_alive)
     print(
         f"Initialized ChatOllama: {model}, temperature: {temperature}, context window: {ctx_window}, max_tokens: {max_tokens}")
 
     # Create the retriever
-    retriever = vector_store.as_retriever(
-        search_type="similarity",  # Or "mmr"
-        search_kwargs={'k': int(top_k) if top_k else 3}  # Retrieve top-k relevant chunks
-    )
+    retriever = init_retriever(vector_store, top_k, db_path=db_path, lexical_weight=lexical_weight,
+                               rerank_model=rerank_model, rerank_fetch_k=rerank_fetch_k, rerank_budget_s=rerank_budget_s,
+                               stores=stores)
     print("Retriever initialized.")
 
     # Define the prompt template
@@ -55,22 +136,118 @@ Note: Do not make up any information. Small talk is allowed.'
     prompt = ChatPromptTemplate.from_template(template)
     print("Prompt template created.")
 
-    # Define the RAG chain using LCEL
-    rag_chain = (
-        {"context": retriever, "question": RunnablePassthrough()}
-        | prompt
-        | llm
-        | StrOutputParser()
-    )
+    # Dedupes/merges the retrieved chunks and keeps them within the context budget
+    packer = ContextPacker(ctx_window, max_tokens, share=context_share)
+
+    rag_chain = RagChain(retriever, prompt, llm, vector_store=vector_store, packer=packer)
     print("RAG chain created.")
     return rag_chain
 
 
-def init_db(file_path, db_path):
+def init_db(file_path, db_path, progress=None, settings: dict | None = None):
     """Create a new vector store and index documents."""
-    docs = load_documents(file_path)
-    chunks = split_documents(docs)
-
-    print("Attempting to index documents...")
-    embedding = get_embedding()
-    index_docs(chunks, embedding, db_path)
+    return update_db([file_path], db_path, progress=progress, settings=settings)
+
+
+def update_db(file_paths, db_path, progress=None, settings: dict | None = None, remove_missing_under: str | None = None):
+    """Add or re-index source files in a knowledge base, skipping unchanged ones.
+
+    Files are tracked in the database manifest; a changed file has its old chunks
+    removed before the new ones are added. If `remove_missing_under` is a folder,
+    manifest entries under it that are not in `file_paths` are removed as deleted.
+    Returns a dict of counts per outcome. Text extraction and chunking run on a
+    process pool of `settings["extract_workers"]` processes (default: one per
+    core; 1 disables it). Files are chunked the way the knowledge base's
+    store.json says, so every file of a knowledge base is split alike.
+    """
+    settings = settings or {}
+    progress = progress or Progress()
+    manifest = Manifest(db_path)
+    # Files added later are embedded with the model the knowledge base was built with
+    embedding_model = read_store_config(db_path).get("embedding_model") or EMBED_MODEL
+    embedding = get_registry().embedding(embedding_model)
+    summary = {"added": 0, "updated": 0, "unchanged": 0, "removed": 0, "chunks": 0}
+
+    # BM25 index kept in step with Chroma; a private copy so live queries are unaffected
+    lexical = load_lexical_index(db_path, get_registry().vector_store(db_path, embedding_model), shared=False)
+
+    extract_workers = settings.get("extract_workers")
+    pool = get_extract_pool(extract_workers) if extract_workers != 1 else None
+    try:
+        _update_files(file_paths, db_path, manifest, embedding, lexical, summary, progress, settings, pool,
+                      remove_missing_under)
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+        lexical.save(db_path)
+
+    # Quantized stores (re)build their IVF index once they are large enough
+    collection = get_registry().vector_store(db_path, embedding_model)._collection
+    if hasattr(collection, "optimize"):
+        collection.optimize()
+    manifest.save()
+    progress.log(f"[SYS]: {os.path.basename(db_path)}: {collection.count()} chunks "
+                 f"({describe(read_store_config(db_path).get('chunking'))}), "
+                 f"index size {db_size(db_path) / 2 ** 20:.1f} MB")
+    if isinstance(embedding, CachedEmbeddings):
+        progress.log(f"[SYS]: {embedding.cache.stats()}")
+    return summary
+
+
+def _update_files(file_paths, db_path, manifest, embedding, lexical, summary, progress, settings, pool,
+                  remove_missing_under):
+    def remove_chunks(ids):
+        delete_docs(ids, embedding, db_path)
+        lexical.remove(ids)
+
+    chunking = read_store_config(db_path).get("chunking")
+    wanted = {Manifest.key(p) for p in file_paths}
+    if remove_missing_under is not None:
+        root = Manifest.key(remove_missing_under)
+        for key in [k for k in manifest.files if k.startswith(root + os.sep) and k not in wanted]:
+            progress.check()
+            remove_chunks(manifest.remove(key))
+            manifest.save()
+            summary["removed"] += 1
+            progress.log(f"Removed deleted file {os.path.basename(key)}")
+
+    for file_path in file_paths:
+        progress.check()
+        status, digest = manifest.status(file_path)
+        name = os.path.basename(file_path)
+        if status == "unchanged":
+            summary["unchanged"] += 1
+            progress.log(f"Skipped unchanged file {name}")
+            continue
+
+        if status == "changed":
+            remove_chunks(manifest.chunk_ids(file_path))
+
+        # Pages are loaded, split, embedded and persisted as a stream so peak
+        # memory stays bounded by the batch window, not the document size.
+        progress.update("load")
+        chunks = iter_chunks(iter_pages(file_path, progress=progress, pool=pool), progress=progress,
+                             chunking=chunking, pool=pool)
+        print("Attempting to index documents...")
+        chunk_ids = []
+        ids = (chunk_ids.append(cid) or cid for cid in iter_chunk_ids(file_path, digest))
+        try:
+            _, count = add_docs(
+                chunks, embedding, db_path, ids=ids,
+                batch_size=settings.get("embed_batch_size", EMBED_BATCH_SIZE),
+                workers=settings.get("embed_workers", EMBED_WORKERS),
+                insert_batch_size=settings.get("insert_batch_size", INSERT_BATCH_SIZE),
+                progress=progress,
+                on_batch=lambda batch: lexical.add([c.id for c in batch], [c.page_content for c in batch]),
+            )
+        except BaseException:
+            # Drop the partially written file so a retry starts clean
+            remove_chunks(chunk_ids)
+            if manifest.remove(Manifest.key(file_path)):
+                manifest.save()
+            raise
+        manifest.record(file_path, digest, chunk_ids)
+        manifest.save()
+        summary["added" if status == "new" else "updated"] += 1
+        summary["chunks"] += count
+        progress.log(f"Indexed {count} chunks from {name} into {db_path}")
@@ -1,13 +1,16 @@
 from pathlib import Path
 
 DB_DIR = ".chroma_db"
+CACHE_DIR = ".cache"
 
 
-def get_db_path(db_name: str) -> str:
-    base_path = Path(__file__).resolve().parent.parent  # root of project
-    store_path = base_path / DB_DIR / db_name
+def get_db_root() -> str:
+    """Folder holding every database (and the catalog)."""
+    return str(Path(__file__).resolve().parent.parent / DB_DIR)  # under the root of project
+
 
-    return str(store_path)
+def get_db_path(db_name: str) -> str:
+    return str(Path(get_db_root()) / db_name)
 
 
 def is_db_exists(db_name: str) -> bool:
@@ -18,8 +21,7 @@ def is_db_exists(db_name: str) -> bool:
 
 def create_db(db_name: str) -> str:
     """Create a new database folder."""
-    db_path = Path(__file__).resolve().parent.parent / DB_DIR / \
-        db_name.strip().lower().replace(" ", "_")
+    db_path = Path(get_db_root()) / db_name.strip().lower().replace(" ", "_")
     if not db_path.exists():
         db_path.mkdir(parents=True, exist_ok=True)
         print(f"Database '{db_name}' created successfully.")
@@ -28,11 +30,29 @@ def create_db(db_name: str) -> str:
 
 def get_all_dbs() -> list:
     """List top-level folders in the specified db folder."""
-    base_path = Path(__file__).resolve().parent.parent  # root of project
-    db_folder = base_path / DB_DIR
+    db_folder = Path(get_db_root())
 
     if not db_folder.is_dir():
         return []
 
     dbs = [d.name for d in db_folder.iterdir() if d.is_dir()]
     return dbs
+
+
+def get_cache_path(file_name: str) -> str:
+    """Path of a file in the shared cache folder, creating the folder if needed."""
+    cache_dir = Path(__file__).resolve().parent.parent / CACHE_DIR
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    return str(cache_dir / file_name)
+
+
+def db_size(db_path: str) -> int:
+    """Bytes used on disk by a database folder."""
+    total = 0
+    for path in Path(db_path).rglob("*"):
+        try:
+            if path.is_file():
+                total += path.stat().st_size
+        except OSError:
+            pass  # removed while we were walking
+    return total
@@ -0,0 +1,129 @@
+import hashlib
+import sqlite3
+import threading
+import time
+from array import array
+from contextlib import contextmanager
+
+from langchain_core.embeddings import Embeddings
+
+from .metrics import incr
+
+# Roughly 600 MB of nomic-embed-text (768-dim float32) vectors
+MAX_CACHE_ENTRIES = 200_000
+
+
+def _key(model: str, text: str) -> str:
+    return hashlib.sha256(f"{model}\0{text}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """Persistent embedding cache keyed by (model name, chunk text hash) with LRU eviction."""
+
+    def __init__(self, path: str, max_entries: int = MAX_CACHE_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "key TEXT PRIMARY KEY, model TEXT NOT NULL, vector BLOB NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_last_used ON embeddings(last_used)")
+        self._conn.commit()
+        self._count = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def get_many(self, model: str, texts: list) -> list:
+        """Return cached vectors (or None) for each text, marking hits as recently used."""
+        keys = [_key(model, t) for t in texts]
+        found = {}
+        with self._lock:
+            for start in range(0, len(keys), 500):
+                part = keys[start:start + 500]
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(part))})", part
+                ).fetchall()
+                found.update((k, array("f", v).tolist()) for k, v in rows)
+            if found:
+                now = time.time()
+                self._conn.executemany("UPDATE embeddings SET last_used=? WHERE key=?", [(now, k) for k in found])
+                self._conn.commit()
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        incr("embed_cache.hit", len(found))
+        incr("embed_cache.miss", len(keys) - len(found))
+        return [found.get(k) for k in keys]
+
+    def put_many(self, model: str, texts: list, vectors: list):
+        now = time.time()
+        rows = [(_key(model, t), model, array("f", v).tobytes(), now) for t, v in zip(texts, vectors)]
+        with self._lock:
+            before = self._conn.total_changes
+            self._conn.executemany("INSERT OR IGNORE INTO embeddings VALUES (?, ?, ?, ?)", rows)
+            self._count += self._conn.total_changes - before
+            overflow = self._count - self.max_entries
+            if overflow > 0:
+                self._conn.execute(
+                    "DELETE FROM embeddings WHERE key IN "
+                    "(SELECT key FROM embeddings ORDER BY last_used LIMIT ?)", (overflow,)
+                )
+                self._count -= overflow
+                self.evictions += overflow
+            self._conn.commit()
+
+    def reset_stats(self):
+        with self._lock:
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> str:
+        total = self.hits + self.misses
+        rate = (self.hits / total * 100) if total else 0.0
+        return (f"Embedding cache: {self.hits} hit(s), {self.misses} miss(es) ({rate:.0f}% hit rate), "
+                f"{self.evictions} evicted, {self._count}/{self.max_entries} entries")
+
+
+_handoff = threading.local()
+
+
+@contextmanager
+def precomputed(texts, vectors):
+    """Serve these vectors to CachedEmbeddings on this thread, e.g. while a vector
+    store re-embeds chunks the indexer has already embedded."""
+    previous = getattr(_handoff, "vectors", None)
+    _handoff.vectors = dict(zip(texts, vectors))
+    try:
+        yield
+    finally:
+        _handoff.vectors = previous
+
+
+class CachedEmbeddings(Embeddings):
+    """Wraps an embedding client and only sends cache misses to it; queries are not cached."""
+
+    def __init__(self, embedding, model_name: str, cache: EmbeddingCache):
+        self.embedding = embedding
+        self.model_name = model_name
+        self.cache = cache
+
+    def embed_documents(self, texts):
+        texts = list(texts)
+        handed = getattr(_handoff, "vectors", None)
+        if handed and all(t in handed for t in texts):
+            return [handed[t] for t in texts]
+        vectors = self.cache.get_many(self.model_name, texts)
+        missing = [i for i, v in enumerate(vectors) if v is None]
+        if missing:
+            new_texts = [texts[i] for i in missing]
+            new_vectors = self.embedding.embed_documents(new_texts)
+            self.cache.put_many(self.model_name, new_texts, new_vectors)
+            for i, vector in zip(missing, new_vectors):
+                vectors[i] = vector
+        return vectors
+
+    def embed_query(self, text):
+        # Questions are rarely asked twice; keep them out of the chunk cache and its counters
+        return self.embedding.embed_query(text)
@@ -1,47 +1,211 @@
+import threading
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import chromadb
 from langchain_community.vectorstores import Chroma
 from langchain_ollama import OllamaEmbeddings
 
+from .catalog import EMBED_MODEL
+from .db_helper import get_cache_path
+from .embed_cache import CachedEmbeddings, EmbeddingCache, precomputed
+from .metrics import EMBED_BATCH, PERSIST, span
+from .quantized import QuantizedVectorStore, read_store_config
+
+# Chunks per embedding request, concurrent requests, and chunks per Chroma insert
+EMBED_BATCH_SIZE = 32
+EMBED_WORKERS = 4
+INSERT_BATCH_SIZE = 256
+EMBED_CACHE_FILE = "embeddings.sqlite3"
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
 
-def get_embedding(model_name="nomic-embed-text"):
-    """Initializes the Ollama embedding function."""
+def get_embedding_cache():
+    """Returns the shared on-disk embedding cache."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = EmbeddingCache(get_cache_path(EMBED_CACHE_FILE))
+        return _cache
+
+
+def get_embedding(model_name=EMBED_MODEL, cache: bool = True):
+    """Initializes the Ollama embedding function.
+
+    Unless `cache` is False, the client is wrapped so chunks that were embedded
+    before with the same model are served from the on-disk cache.
+    """
     # Ensure Ollama server is running (ollama serve)
     embeddings = OllamaEmbeddings(model=model_name)
     print(f"Initialized Ollama embeddings with model: {model_name}")
+    if cache:
+        return CachedEmbeddings(embeddings, model_name, get_embedding_cache())
     return embeddings
 
 
-def get_vector_store(embedding, dir):
-    """Initializes or loads the Chroma vector store."""
+def open_chroma_client(dir):
+    """A Chroma client on a knowledge base folder; whoever opens it closes it (client.close())."""
+    return chromadb.PersistentClient(path=dir)
+
+
+def get_vector_store(embedding, dir, client=None):
+    """Initializes or loads the knowledge base's vector store (Chroma unless its store.json says otherwise).
+
+    A Chroma store uses `client` if given (see open_chroma_client), else a client of its own.
+    """
+    config = read_store_config(dir)
+    if config.get("backend") == "quantized":
+        vectorstore = QuantizedVectorStore(embedding, dir, dtype=config.get("dtype", "int8"),
+                                           rescore=config.get("rescore", False), ivf=config.get("ivf", True))
+        print(f"Quantized ({vectorstore._collection.dtype}) vector store loaded from: {dir}")
+        return vectorstore
     vectorstore = Chroma(
         persist_directory=dir,
-        embedding_function=embedding
+        embedding_function=embedding,
+        client=client or open_chroma_client(dir),
     )
     print(f"Vector store initialized/loaded from: {dir}")
     return vectorstore
 
 
-def index_docs(chunks, embedding, dir):
+def index_docs(chunks, embedding, dir, ids=None, batch_size: int = EMBED_BATCH_SIZE, workers: int = EMBED_WORKERS,
+               insert_batch_size: int = INSERT_BATCH_SIZE, progress=None):
     """Indexes document chunks into the Chroma vector store."""
-    print(f"Indexing {len(chunks)} chunks...")
-    vectorstore = Chroma.from_documents(
-        documents=chunks,
-        embedding=embedding,
-        persist_directory=dir
-    )
+    print("Indexing chunks...")
+    vectorstore, count = add_docs(chunks, embedding, dir, ids=ids, batch_size=batch_size, workers=workers,
+                                  insert_batch_size=insert_batch_size, progress=progress)
     # vectorstore.persist()  # Auto-persisted
-    print(f"Indexing complete. Data saved to: {dir}")
+    print(f"Indexing complete. {count} chunks saved to: {dir}")
     return vectorstore
 
 
-def add_docs(chunks, embedding, dir):
-    """Adds new document chunks to an existing Chroma vector store."""
-    print(f"Adding {len(chunks)} new chunks to the vector store...")
-    vectorstore = Chroma(
-        persist_directory=dir,
-        embedding_function=embedding
-    )
+def embed_batches(embedding, batches, workers: int = EMBED_WORKERS, progress=None):
+    """Embeds batches of chunks concurrently, yielding (batch, vectors) in input order.
+
+    At most `workers` batches are in flight, so memory stays bounded for lazy inputs.
+    """
+    workers = max(1, int(workers))
+    in_flight = deque()
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="embed") as pool:
+        try:
+            for batch in batches:
+                if progress:
+                    progress.check()
+                texts = [c.page_content for c in batch]
+                in_flight.append((batch, pool.submit(_timed_embed, embedding, texts)))
+                if len(in_flight) >= workers:
+                    done, future = in_flight.popleft()
+                    yield done, future.result()
+            while in_flight:
+                if progress:
+                    progress.check()
+                done, future = in_flight.popleft()
+                yield done, future.result()
+        finally:
+            for _, future in in_flight:
+                future.cancel()
+
+
+def _timed_embed(embedding, texts):
+    with span(EMBED_BATCH):
+        return embedding.embed_documents(texts)
+
+
+def persist_batch(vectorstore, chunks, vectors, ids=None):
+    """Writes already-embedded chunks to the vector store without re-embedding them.
+
+    The store upserts by ID; its (cached) embedding function is handed the
+    vectors instead of calling Ollama again.
+    """
+    ids = ids or [getattr(c, "id", None) or str(uuid.uuid4()) for c in chunks]
+    for chunk, chunk_id in zip(chunks, ids):
+        chunk.id = chunk_id
+    texts = [c.page_content for c in chunks]
+    with span(PERSIST), precomputed(texts, vectors):
+        vectorstore.add_texts(texts, metadatas=[c.metadata for c in chunks], ids=ids)
+    return ids
+
+
+def _open_store(dir):
+    """The knowledge base's vector store from the shared registry, opened with the model it was built with."""
+    # Imported here: the registry builds on this module
+    from .registry import get_registry
+
+    return get_registry().vector_store(dir, read_store_config(dir).get("embedding_model") or EMBED_MODEL)
+
+
+def add_docs(chunks, embedding, dir, ids=None, batch_size: int = EMBED_BATCH_SIZE, workers: int = EMBED_WORKERS,
+             insert_batch_size: int = INSERT_BATCH_SIZE, progress=None, on_batch=None):
+    """Adds document chunks to a new or existing Chroma vector store.
+
+    `chunks` may be any iterable, including a lazy generator: chunks are embedded
+    in batches of `batch_size` with up to `workers` batches in flight and written
+    to Chroma in inserts of at most `insert_batch_size`, so only a fixed-size
+    window is held in memory. Chunk IDs come from `ids`, else from each
+    chunk's `id`, else are random. `on_batch(chunks)` is called after each insert.
+    Writes go through the registry's open store, so query chains see them.
+    Returns (vectorstore, number of chunks added).
+    """
+    vectorstore = _open_store(dir)
+    total = len(chunks) if hasattr(chunks, "__len__") else None
+    if ids is not None:
+        chunks = _with_ids(chunks, ids)
+    embedded = 0
+    persisted = 0
+    pending_chunks, pending_vectors = [], []
+
+    def flush():
+        nonlocal persisted, pending_chunks, pending_vectors
+        if not pending_chunks:
+            return
+        persist_batch(vectorstore, pending_chunks, pending_vectors)
+        if on_batch:
+            on_batch(pending_chunks)
+        persisted += len(pending_chunks)
+        pending_chunks, pending_vectors = [], []
+        if progress:
+            progress.update("persist", persisted, total)
+
+    for batch, vectors in embed_batches(embedding, batched(chunks, batch_size), workers=workers, progress=progress):
+        embedded += len(batch)
+        if progress:
+            progress.update("embed", embedded, total)
+        pending_chunks.extend(batch)
+        pending_vectors.extend(vectors)
+        if len(pending_chunks) >= insert_batch_size:
+            flush()
+    flush()
+    print(f"Added {persisted} chunks to the vector store.")
+    return vectorstore, persisted
+
+
+def batched(items, size: int):
+    """Groups any iterable into lists of at most `size` items."""
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _with_ids(chunks, ids):
+    for chunk, chunk_id in zip(chunks, ids):
+        chunk.id = chunk_id
+        yield chunk
+
 
-    vectorstore.add_documents(chunks)
-    vectorstore.persist()  # Ensure data is saved
-    print("New chunks added persisted.")
+def delete_docs(ids, embedding, dir, batch_size: int = INSERT_BATCH_SIZE):
+    """Removes chunks by ID from an existing Chroma vector store."""
+    ids = list(ids)
+    vectorstore = _open_store(dir)
+    for start in range(0, len(ids), batch_size):
+        vectorstore.delete(ids=ids[start:start + batch_size])
+    print(f"Removed {len(ids)} chunks from the vector store.")
     return vectorstore
@@ -0,0 +1,51 @@
+from langchain_core.documents import Document
+
+from .lexical import load_lexical_index
+
+# Reciprocal rank fusion constant; larger values flatten the rank weighting
+RRF_K = 60
+
+
+class HybridRetriever:
+    """Fuses vector similarity and BM25 results with weighted reciprocal rank fusion.
+
+    `lexical_weight` is the share given to the BM25 ranking (0 = vector only,
+    1 = lexical only). Both sides over-fetch `fetch_k` candidates before fusion.
+    """
+
+    def __init__(self, vector_store, db_path: str, k: int = 3, lexical_weight: float = 0.4,
+                 fetch_k: int | None = None):
+        self.vector_store = vector_store
+        self.db_path = db_path
+        self.k = k
+        self.lexical_weight = min(1.0, max(0.0, lexical_weight))
+        self.fetch_k = fetch_k or max(k * 4, 20)
+
+    def invoke(self, query: str):
+        collection = self.vector_store._collection
+        query_vector = self.vector_store.embeddings.embed_query(query)
+        result = collection.query(
+            query_embeddings=[query_vector], n_results=self.fetch_k,
+            include=["documents", "metadatas"],
+        )
+        docs = {}
+        vector_ranked = []
+        for chunk_id, text, metadata in zip(result["ids"][0], result["documents"][0], result["metadatas"][0]):
+            docs[chunk_id] = Document(page_content=text, metadata=metadata or {}, id=chunk_id)
+            vector_ranked.append(chunk_id)
+
+        lexical = load_lexical_index(self.db_path, self.vector_store)
+        lexical_ranked = [chunk_id for chunk_id, _ in lexical.search(query, self.fetch_k)]
+
+        scores = {}
+        for weight, ranked in ((1.0 - self.lexical_weight, vector_ranked), (self.lexical_weight, lexical_ranked)):
+            for rank, chunk_id in enumerate(ranked):
+                scores[chunk_id] = scores.get(chunk_id, 0.0) + weight / (RRF_K + rank + 1)
+        top = sorted(scores, key=scores.get, reverse=True)[:self.k]
+
+        missing = [chunk_id for chunk_id in top if chunk_id not in docs]
+        if missing:
+            rows = collection.get(ids=missing, include=["documents", "metadatas"])
+            for chunk_id, text, metadata in zip(rows["ids"], rows["documents"], rows["metadatas"]):
+                docs[chunk_id] = Document(page_content=text, metadata=metadata or {}, id=chunk_id)
+        return [docs[chunk_id] for chunk_id in top if chunk_id in docs]
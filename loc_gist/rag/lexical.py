@@ -0,0 +1,217 @@
+import math
+import os
+import re
+import sqlite3
+import threading
+from array import array
+from collections import Counter
+
+import numpy as np
+
+LEXICAL_FILE = "lexical.sqlite3"
+# Pickled index written by earlier versions; rebuilt from the vector store instead of loaded
+_LEGACY_FILE = "bm25.pkl"
+
+# Okapi BM25 parameters
+BM25_K1 = 1.2
+BM25_B = 0.75
+# Removed chunks stay in the postings (masked out) until they are this share of all chunks
+COMPACT_SHARE = 0.25
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:[-_./:][a-z0-9]+)*")
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the this to was were will with".split()
+)
+
+
+def tokenize(text: str) -> list:
+    """Lower-cased word tokens; identifiers like ERR-1042 or 4.2.1 are kept whole
+    and their parts are indexed as well."""
+    tokens = []
+    for token in _TOKEN_RE.findall(text.lower()):
+        if token in _STOPWORDS:
+            continue
+        tokens.append(token)
+        if not token.isalnum():
+            tokens.extend(p for p in re.split(r"[-_./:]", token) if p and p not in _STOPWORDS)
+    return tokens
+
+
+class LexicalIndex:
+    """In-memory BM25 inverted index over chunk IDs, saved as sqlite blobs in the database folder.
+
+    Each term's postings are flat arrays of chunk numbers and term frequencies,
+    so a query scores every matching chunk with a few numpy operations rather
+    than a Python loop per chunk. Removed chunks are masked out until the
+    index is compacted on save.
+    """
+
+    def __init__(self):
+        self.ids = []              # chunk number -> chunk_id, None once removed
+        self.doc_len = array("i")  # chunk number -> token count, 0 once removed
+        self.postings = {}         # term -> (chunk numbers, term frequencies)
+        self.total_len = 0
+        self._numbers = {}         # chunk_id -> chunk number
+
+    def __len__(self):
+        return len(self._numbers)
+
+    def add(self, ids, texts):
+        for chunk_id, text in zip(ids, texts):
+            if chunk_id in self._numbers:
+                self.remove([chunk_id])
+            number = len(self.ids)
+            counts = Counter(tokenize(text))
+            for term, tf in counts.items():
+                numbers, tfs = self.postings.setdefault(term, (array("i"), array("i")))
+                numbers.append(number)
+                tfs.append(tf)
+            length = sum(counts.values())
+            self.ids.append(chunk_id)
+            self.doc_len.append(length)
+            self._numbers[chunk_id] = number
+            self.total_len += length
+
+    def remove(self, ids):
+        for chunk_id in ids:
+            number = self._numbers.pop(chunk_id, None)
+            if number is None:
+                continue
+            self.total_len -= self.doc_len[number]
+            self.doc_len[number] = 0
+            self.ids[number] = None
+
+    def search(self, query: str, k: int = 10) -> list:
+        """Top-k (chunk_id, score) pairs by BM25."""
+        n = len(self._numbers)
+        if not n or k <= 0:
+            return []
+        avg_len = self.total_len / n or 1.0
+        doc_len = np.array(self.doc_len, dtype=np.float64)
+        scores = np.zeros(len(doc_len))
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if postings is None:
+                continue
+            numbers = np.array(postings[0])
+            tf = np.array(postings[1], dtype=np.float64)
+            length = doc_len[numbers]
+            live = length > 0
+            df = int(np.count_nonzero(live))
+            if not df:
+                continue
+            idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+            term_scores = idf * tf * (BM25_K1 + 1) / (tf + BM25_K1 * (1 - BM25_B + BM25_B * length / avg_len))
+            scores += np.bincount(numbers, weights=np.where(live, term_scores, 0.0), minlength=len(scores))
+        hits = np.flatnonzero(scores)
+        if len(hits) > k:
+            hits = hits[np.argpartition(-scores[hits], k - 1)[:k]]
+        # Best first; ties in indexing order
+        hits = hits[np.lexsort((hits, -scores[hits]))]
+        return [(self.ids[number], float(scores[number])) for number in hits]
+
+    def save(self, db_path: str):
+        if len(self.ids) - len(self._numbers) > COMPACT_SHARE * len(self.ids):
+            self._compact()
+        path = os.path.join(db_path, LEXICAL_FILE)
+        tmp = path + ".tmp"
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        db = sqlite3.connect(tmp)
+        try:
+            db.execute("CREATE TABLE chunks (number INTEGER PRIMARY KEY, chunk_id TEXT, length INTEGER NOT NULL)")
+            db.execute("CREATE TABLE postings (term TEXT PRIMARY KEY, numbers BLOB NOT NULL, tfs BLOB NOT NULL)")
+            db.executemany("INSERT INTO chunks VALUES (?, ?, ?)", zip(range(len(self.ids)), self.ids, self.doc_len))
+            db.executemany("INSERT INTO postings VALUES (?, ?, ?)",
+                           ((term, numbers.tobytes(), tfs.tobytes()) for term, (numbers, tfs) in self.postings.items()))
+            db.commit()
+        finally:
+            db.close()
+        os.replace(tmp, path)
+        legacy = os.path.join(db_path, _LEGACY_FILE)
+        if os.path.exists(legacy):
+            os.remove(legacy)
+        _loaded.pop(db_path, None)
+
+    @classmethod
+    def load(cls, path: str):
+        index = cls()
+        db = sqlite3.connect(path)
+        try:
+            for number, chunk_id, length in db.execute("SELECT number, chunk_id, length FROM chunks ORDER BY number"):
+                index.ids.append(chunk_id)
+                index.doc_len.append(length)
+                if chunk_id is not None:
+                    index._numbers[chunk_id] = number
+                    index.total_len += length
+            for term, numbers, tfs in db.execute("SELECT term, numbers, tfs FROM postings"):
+                index.postings[term] = (array("i", numbers), array("i", tfs))
+        finally:
+            db.close()
+        return index
+
+    def _compact(self):
+        """Renumber the remaining chunks and drop the postings of removed ones."""
+        live = np.array(self.doc_len) > 0
+        renumber = np.where(live, np.cumsum(live) - 1, -1)
+        for term, (numbers, tfs) in list(self.postings.items()):
+            new = renumber[np.array(numbers)]
+            keep = new >= 0
+            if keep.any():
+                self.postings[term] = (array("i", new[keep].astype(np.int32).tobytes()),
+                                       array("i", np.array(tfs)[keep].astype(np.int32).tobytes()))
+            else:
+                del self.postings[term]
+        self.ids = [chunk_id for chunk_id, keep in zip(self.ids, live) if keep]
+        self.doc_len = array("i", (length for length in self.doc_len if length > 0))
+        self._numbers = {chunk_id: number for number, chunk_id in enumerate(self.ids)}
+
+
+_loaded = {}
+_loaded_lock = threading.Lock()
+
+
+def load_lexical_index(db_path: str, vector_store=None, shared: bool = True) -> LexicalIndex:
+    """Load (and cache) a database's lexical index, reloading it if the file changed.
+
+    Databases indexed before the lexical index existed are backfilled from the
+    chunks stored in `vector_store`. Pass `shared=False` to get a private copy
+    that can be modified and saved while queries keep using the shared one.
+    """
+    path = os.path.join(db_path, LEXICAL_FILE)
+    if not shared:
+        if os.path.exists(path):
+            return LexicalIndex.load(path)
+        index = LexicalIndex()
+        if vector_store is not None:
+            _backfill(index, vector_store)
+        return index
+    with _loaded_lock:
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            mtime = None
+        cached = _loaded.get(db_path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        if mtime is not None:
+            index = LexicalIndex.load(path)
+        else:
+            index = LexicalIndex()
+            if vector_store is not None:
+                _backfill(index, vector_store)
+                index.save(db_path)
+                mtime = os.stat(path).st_mtime_ns
+        _loaded[db_path] = (mtime, index)
+        return index
+
+
+def _backfill(index, vector_store, batch_size: int = 1000):
+    offset = 0
+    while True:
+        rows = vector_store.get(include=["documents"], limit=batch_size, offset=offset)
+        if not rows["ids"]:
+            break
+        index.add(rows["ids"], rows["documents"])
+        offset += len(rows["ids"])
+    print(f"Built lexical index for {len(index)} existing chunks")
@@ -0,0 +1,91 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+
+MANIFEST_FILE = "manifest.json"
+
+
+def file_hash(path: str) -> str:
+    """SHA-256 of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class Manifest:
+    """Tracks the source files of a knowledge base and the chunk IDs indexed from each.
+
+    Stored as manifest.json inside the database folder. `revision` is bumped on
+    every change so caches can tell the knowledge base was modified.
+    """
+
+    def __init__(self, db_path: str):
+        self.path = Path(db_path) / MANIFEST_FILE
+        self.revision = 0
+        self.files = {}
+        if self.path.exists():
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self.revision = data.get("revision", 0)
+            self.files = data.get("files", {})
+
+    def save(self):
+        tmp = self.path.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"revision": self.revision, "files": self.files}, f)
+        os.replace(tmp, self.path)
+
+    @staticmethod
+    def key(file_path: str) -> str:
+        return str(Path(file_path).resolve())
+
+    def status(self, file_path: str):
+        """Return ("new" | "changed" | "unchanged", content hash) for a source file.
+
+        The file is only hashed when its size or mtime differ from the manifest.
+        """
+        entry = self.files.get(self.key(file_path))
+        stat = os.stat(file_path)
+        if entry and entry["size"] == stat.st_size and entry["mtime"] == stat.st_mtime:
+            return "unchanged", entry["sha256"]
+        digest = file_hash(file_path)
+        if entry is None:
+            return "new", digest
+        if entry["sha256"] == digest:
+            # Touched but identical; refresh the stat so it is not hashed again
+            entry["size"], entry["mtime"] = stat.st_size, stat.st_mtime
+            return "unchanged", digest
+        return "changed", digest
+
+    def chunk_ids(self, file_path: str) -> list:
+        entry = self.files.get(self.key(file_path))
+        return list(entry["chunk_ids"]) if entry else []
+
+    def record(self, file_path: str, digest: str, chunk_ids: list):
+        stat = os.stat(file_path)
+        self.files[self.key(file_path)] = {
+            "sha256": digest,
+            "size": stat.st_size,
+            "mtime": stat.st_mtime,
+            "chunk_ids": list(chunk_ids),
+        }
+        self.revision += 1
+
+    def remove(self, key: str) -> list:
+        entry = self.files.pop(key, None)
+        if entry is None:
+            return []
+        self.revision += 1
+        return entry["chunk_ids"]
+
+
+def iter_chunk_ids(file_path: str, digest: str):
+    """Stable chunk IDs derived from the source path and its content hash."""
+    prefix = hashlib.sha256(Manifest.key(file_path).encode("utf-8")).hexdigest()[:12]
+    i = 0
+    while True:
+        yield f"{prefix}-{digest[:12]}-{i}"
+        i += 1
@@ -0,0 +1,130 @@
+import json
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# Samples kept per timing metric for the rolling percentiles/histograms
+WINDOW = 512
+# Histogram bucket upper bounds in seconds (log-spaced, 1 ms .. 60 s, then overflow)
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Stage names used across the pipeline
+PAGE_LOAD = "index.page_load"
+SPLIT = "index.split"
+EMBED_BATCH = "index.embed_batch"
+PERSIST = "index.persist"
+QUEUE_WAIT = "query.queue_wait"
+RETRIEVE = "query.retrieve"
+RETRIEVE_STORE = "query.retrieve_store"
+RERANK = "query.rerank"
+PROMPT_BUILD = "query.prompt_build"
+PREFILL = "query.prefill"
+FIRST_TOKEN = "query.first_token"
+FIRST_TOKEN_COLD = "query.first_token_cold"
+FIRST_TOKEN_WARM = "query.first_token_warm"
+GENERATION = "query.generation"
+TOKENS_PER_S = "query.tokens_per_s"
+MODEL_LOAD = "model.load"
+
+
+class MetricsRegistry:
+    """Thread-safe in-process registry of timing samples and counters."""
+
+    def __init__(self, window: int = WINDOW):
+        self.window = window
+        self._samples = {}
+        self._totals = {}
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def observe(self, name: str, value: float):
+        with self._lock:
+            samples = self._samples.get(name)
+            if samples is None:
+                samples = self._samples[name] = deque(maxlen=self.window)
+            samples.append(value)
+            count, total = self._totals.get(name, (0, 0.0))
+            self._totals[name] = (count + 1, total + value)
+
+    def incr(self, name: str, amount: int = 1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + amount
+
+    @contextmanager
+    def span(self, name: str):
+        """Time the enclosed block and record it under `name` (also on error)."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started)
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+            self._totals.clear()
+            self._counters.clear()
+
+    def snapshot(self) -> dict:
+        """Rolling stats per timing metric plus all counters."""
+        with self._lock:
+            samples = {name: list(values) for name, values in self._samples.items()}
+            totals = dict(self._totals)
+            counters = dict(self._counters)
+        timings = {}
+        for name, values in samples.items():
+            ordered = sorted(values)
+            count, total = totals[name]
+            timings[name] = {
+                "count": count,
+                "mean": total / count,
+                "last": values[-1],
+                "p50": _quantile(ordered, 0.50),
+                "p95": _quantile(ordered, 0.95),
+                "p99": _quantile(ordered, 0.99),
+                "max": ordered[-1],
+                "histogram": _histogram(ordered),
+            }
+        return {"timings": timings, "counters": counters}
+
+    def export(self, path: str):
+        """Write a JSON snapshot to `path`."""
+        data = {"exported_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"), "buckets": BUCKETS, **self.snapshot()}
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+        return path
+
+
+def timed_iter(iterable, name: str, registry=None):
+    """Yield from `iterable`, recording how long each item took to produce."""
+    registry = registry or metrics
+    iterator = iter(iterable)
+    while True:
+        started = time.perf_counter()
+        try:
+            item = next(iterator)
+        except StopIteration:
+            return
+        registry.observe(name, time.perf_counter() - started)
+        yield item
+
+
+def _quantile(ordered, q):
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def _histogram(ordered):
+    counts = [0] * (len(BUCKETS) + 1)
+    bucket = 0
+    for value in ordered:
+        while bucket < len(BUCKETS) and value > BUCKETS[bucket]:
+            bucket += 1
+        counts[bucket] += 1
+    return counts
+
+
+metrics = MetricsRegistry()
+span = metrics.span
+observe = metrics.observe
+incr = metrics.incr
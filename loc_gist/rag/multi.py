@@ -0,0 +1,124 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from langchain_core.documents import Document
+
+from .lexical import load_lexical_index
+from .metrics import RETRIEVE_STORE, observe
+
+# Knowledge bases searched at once; more are queued on the same pool
+FANOUT_WORKERS = 8
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+class MultiRetriever:
+    """Retrieves from several knowledge bases concurrently and merges the hits by score.
+
+    `stores` maps a database name to its (vector store, db path). The query is
+    embedded once and every store is searched in parallel, so latency is that
+    of the slowest store. Vector distances are mapped to a 0..1 cosine
+    similarity, which is comparable across stores sharing an embedding model;
+    with `lexical_weight`, each store's BM25 scores are scaled to 0..1 by its
+    best hit and blended in. The best `k` hits overall are returned, tagged
+    with their database in `metadata["db"]`.
+    """
+
+    def __init__(self, stores: dict, k: int = 3, lexical_weight: float = 0.0):
+        self.stores = stores
+        self.k = k
+        self.lexical_weight = min(1.0, max(0.0, lexical_weight))
+
+    def invoke(self, query: str):
+        vector_store, _ = next(iter(self.stores.values()))
+        query_vector = vector_store.embeddings.embed_query(query)
+        pool = _get_pool()
+        started = time.perf_counter()
+        futures = {
+            name: pool.submit(_timed_search, store, db_path, query, query_vector, self.k, self.lexical_weight)
+            for name, (store, db_path) in self.stores.items()
+        }
+        merged = {}
+        timings = {}
+        for name, future in futures.items():
+            try:
+                hits, timings[name] = future.result()
+            except Exception as e:
+                print(f"Retrieval from '{name}' failed: {e}")
+                continue
+            for score, doc in hits:
+                doc.metadata["db"] = name
+                key = doc.id or doc.page_content
+                if key not in merged or score > merged[key][0]:
+                    merged[key] = (score, doc)
+        if timings:
+            slowest = max(timings, key=timings.get)
+            print(f"Searched {len(timings)} knowledge bases in {time.perf_counter() - started:.3f}s "
+                  f"(slowest '{slowest}' {timings[slowest]:.3f}s)")
+        ranked = sorted(merged.values(), key=lambda item: item[0], reverse=True)
+        return [doc for _, doc in ranked[:self.k]]
+
+
+def search_store(vector_store, db_path: str, query: str, query_vector, k: int, lexical_weight: float = 0.0) -> list:
+    """Top-k (score, Document) pairs from one store, scored on a 0..1 scale."""
+    collection = vector_store._collection
+    space = (collection.metadata or {}).get("hnsw:space", "l2")
+    result = collection.query(
+        query_embeddings=[query_vector], n_results=k, include=["documents", "metadatas", "distances"],
+    )
+    hits = {}
+    for chunk_id, text, metadata, distance in zip(result["ids"][0], result["documents"][0],
+                                                 result["metadatas"][0], result["distances"][0]):
+        hits[chunk_id] = [_similarity(distance, space), 0.0,
+                          Document(page_content=text, metadata=dict(metadata or {}), id=chunk_id)]
+
+    if lexical_weight:
+        ranked = load_lexical_index(db_path, vector_store).search(query, k)
+        best = ranked[0][1] if ranked else 0.0
+        for chunk_id, score in ranked:
+            hits.setdefault(chunk_id, [None, 0.0, None])[1] = score / best if best else 0.0
+        # Lexical-only hits: fetch their text and score their vectors too
+        missing = [chunk_id for chunk_id, hit in hits.items() if hit[2] is None]
+        if missing:
+            rows = collection.get(ids=missing, include=["documents", "metadatas", "embeddings"])
+            for chunk_id, text, metadata, embedding in zip(rows["ids"], rows["documents"], rows["metadatas"],
+                                                           rows["embeddings"]):
+                hits[chunk_id][0] = _similarity(_distance(query_vector, embedding, space), space)
+                hits[chunk_id][2] = Document(page_content=text, metadata=dict(metadata or {}), id=chunk_id)
+
+    return [((1.0 - lexical_weight) * vector_score + lexical_weight * lexical_score, doc)
+            for vector_score, lexical_score, doc in hits.values() if doc is not None]
+
+
+def _timed_search(*args):
+    started = time.perf_counter()
+    hits = search_store(*args)
+    elapsed = time.perf_counter() - started
+    observe(RETRIEVE_STORE, elapsed)
+    return hits, elapsed
+
+
+def _similarity(distance: float, space: str) -> float:
+    # Chroma's l2 is the squared distance; for unit vectors (Ollama normalises them) it is 2 - 2cos
+    cosine = 1.0 - distance / 2 if space == "l2" else 1.0 - distance
+    return min(1.0, max(0.0, cosine))
+
+
+def _distance(a, b, space: str) -> float:
+    if space == "l2":
+        return sum((x - y) ** 2 for x, y in zip(a, b))
+    dot = sum(x * y for x, y in zip(a, b))
+    if space == "cosine":
+        norm = (sum(x * x for x in a) * sum(y * y for y in b)) ** 0.5 or 1.0
+        return 1.0 - dot / norm
+    return 1.0 - dot
+
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=FANOUT_WORKERS, thread_name_prefix="fanout")
+        return _pool
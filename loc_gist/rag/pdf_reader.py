@@ -1,24 +1,199 @@
+import multiprocessing
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
 from langchain_community.document_loaders import PyPDFLoader
-from langchain_text_splitters import RecursiveCharacterTextSplitter
+from langchain_core.documents import Document
 
+from .chunking import get_chunker, split_pages
+from .metrics import PAGE_LOAD, SPLIT, metrics, span, timed_iter
 
-def load_documents(pdf_path):
-    """Loads documents from the specified data path."""
-    loader = PyPDFLoader(pdf_path)
-    # loader = UnstructuredPDFLoader(pdf_path) # Alternative
-    documents = loader.load()
+# Pages parsed per process-pool task; larger ranges amortize re-opening the pdf
+PAGES_PER_TASK = 16
+
+
+def load_documents(pdf_path, progress=None, workers: int | None = 1):
+    """Loads documents from the specified data path.
+
+    With `workers` other than 1, pages are extracted on a process pool
+    (None means one worker per core).
+    """
+    if workers == 1:
+        documents = list(iter_pages(pdf_path, progress=progress))
+    else:
+        with get_extract_pool(workers) as pool:
+            documents = list(iter_pages(pdf_path, progress=progress, pool=pool))
     print(f"Loaded {len(documents)} page(s) from {pdf_path}")
     return documents
 
 
-def split_documents(documents):
-    """Splits documents into smaller chunks."""
-    text_splitter = RecursiveCharacterTextSplitter(
-        chunk_size=1000,
-        chunk_overlap=200,
-        length_function=len,
-        is_separator_regex=False,
+class ExtractPool(ProcessPoolExecutor):
+    """Process pool that remembers its size, used to bound the tasks kept in flight."""
+
+    def __init__(self, workers: int):
+        # Spawned, not forked: the indexer runs next to GUI, server and
+        # Chroma threads whose locks a forked child could inherit held
+        super().__init__(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+        self.workers = workers
+
+
+def get_extract_pool(workers: int | None = None):
+    """Process pool for pdf text extraction; defaults to one worker per core."""
+    return ExtractPool(workers or os.cpu_count() or 1)
+
+
+def _window(pool) -> int:
+    # Keep a couple of tasks queued per worker so the pool never idles but
+    # memory stays bounded
+    return max(1, getattr(pool, "workers", 1) * 2)
+
+
+def iter_pages(pdf_path, progress=None, pool=None, pages_per_task: int = PAGES_PER_TASK):
+    """Yields the pages of a pdf one at a time instead of loading them all.
+
+    Given a process `pool`, page ranges are extracted in parallel; pages still
+    come out in order with the same content and metadata as PyPDFLoader.
+    """
+    if pool is not None:
+        yield from timed_iter(_iter_pages_parallel(pdf_path, pool, progress, pages_per_task), PAGE_LOAD)
+        return
+    loader = PyPDFLoader(pdf_path)
+    # loader = UnstructuredPDFLoader(pdf_path) # Alternative
+    for count, page in enumerate(timed_iter(loader.lazy_load(), PAGE_LOAD), start=1):
+        if progress:
+            progress.update("load", count, page.metadata.get("total_pages"))
+        yield page
+
+
+def _iter_pages_parallel(pdf_path, pool, progress, pages_per_task):
+    import pypdf
+
+    total = len(pypdf.PdfReader(pdf_path).pages)
+    ranges = ((start, min(start + pages_per_task, total)) for start in range(0, total, pages_per_task))
+    window = _window(pool)
+    in_flight = deque()
+    count = 0
+    try:
+        for start, stop in ranges:
+            in_flight.append(pool.submit(_extract_pages, pdf_path, start, stop))
+            if len(in_flight) < window:
+                continue
+            for text, metadata in in_flight.popleft().result():
+                count += 1
+                if progress:
+                    progress.update("load", count, total)
+                yield Document(page_content=text, metadata=metadata)
+        while in_flight:
+            for text, metadata in in_flight.popleft().result():
+                count += 1
+                if progress:
+                    progress.update("load", count, total)
+                yield Document(page_content=text, metadata=metadata)
+    finally:
+        for future in in_flight:
+            future.cancel()
+
+
+def _extract_pages(pdf_path, start, stop):
+    """Process-pool worker: extract pages [start, stop) the way PyPDFLoader does."""
+    import pypdf
+
+    reader = pypdf.PdfReader(pdf_path)
+    doc_metadata = _normalize_metadata(
+        {"producer": "PyPDF", "creator": "PyPDF", "creationdate": ""}
+        | dict(reader.metadata or {})
+        | {"source": pdf_path, "total_pages": len(reader.pages)}
     )
-    all_splits = text_splitter.split_documents(documents)
+    pages = []
+    for number in range(start, stop):
+        page = reader.pages[number]
+        text = page.extract_text(extraction_mode="plain").strip()
+        pages.append((text, doc_metadata | {"page": number, "page_label": reader.page_labels[number]}))
+    return pages
+
+
+def _normalize_metadata(metadata: dict) -> dict:
+    """pdf metadata keyed and formatted like PyPDFLoader's: lower-case keys without
+    the leading "/", ISO dates, and str or int values only."""
+    normalized = {}
+    for key, value in metadata.items():
+        if type(value) not in (str, int):
+            value = str(value)
+        key = key.removeprefix("/").lower()
+        if key in ("creationdate", "moddate"):
+            try:
+                normalized[key] = datetime.strptime(value.replace("'", ""), "D:%Y%m%d%H%M%S%z").isoformat("T")
+            except ValueError:
+                normalized[key] = value
+        elif key in ("page_count", "file_path"):
+            normalized["total_pages" if key == "page_count" else "source"] = value
+            normalized[key] = value
+        else:
+            normalized[key] = value.strip() if isinstance(value, str) else value
+    return normalized
+
+
+def get_text_splitter(chunking: dict | None = None):
+    """The chunker for a knowledge base's `chunking` config (see chunking.get_chunker)."""
+    return get_chunker(chunking)
+
+
+def split_documents(documents, progress=None, chunking: dict | None = None):
+    """Splits documents into smaller chunks."""
+    all_splits = list(iter_chunks(documents, progress=progress, total=len(documents), chunking=chunking))
     print(f"Split into {len(all_splits)} chunks")
     return all_splits
+
+
+def iter_chunks(pages, progress=None, total: int | None = None, chunking: dict | None = None, pool=None,
+                pages_per_task: int = PAGES_PER_TASK):
+    """Splits pages into chunks lazily, one page at a time.
+
+    Given a process `pool`, runs of pages are split in parallel; chunks still
+    come out in page order.
+    """
+    if pool is not None:
+        yield from _iter_chunks_parallel(pages, progress, total, chunking, pool, pages_per_task)
+        return
+    text_splitter = get_text_splitter(chunking)
+    for i, page in enumerate(pages, start=1):
+        with span(SPLIT):
+            chunks = text_splitter.split_documents([page])
+        yield from chunks
+        if progress:
+            progress.update("split", i, total or page.metadata.get("total_pages"))
+
+
+def _iter_chunks_parallel(pages, progress, total, chunking, pool, pages_per_task):
+    window = _window(pool)
+    in_flight = deque()
+    count = 0
+
+    def results(future):
+        nonlocal count
+        for chunks, seconds in future.result():
+            metrics.observe(SPLIT, seconds)
+            count += 1
+            yield from chunks
+            if progress:
+                progress.update("split", count, total or (chunks[0].metadata.get("total_pages") if chunks else None))
+
+    batch = []
+    try:
+        for page in pages:
+            batch.append(page)
+            if len(batch) < pages_per_task:
+                continue
+            in_flight.append(pool.submit(split_pages, chunking, batch))
+            batch = []
+            if len(in_flight) >= window:
+                yield from results(in_flight.popleft())
+        if batch:
+            in_flight.append(pool.submit(split_pages, chunking, batch))
+        while in_flight:
+            yield from results(in_flight.popleft())
+    finally:
+        for future in in_flight:
+            future.cancel()
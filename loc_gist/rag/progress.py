@@ -0,0 +1,41 @@
+import threading
+
+
+class IndexCancelled(Exception):
+    """Raised inside the indexing pipeline when its job has been cancelled."""
+
+
+class Progress:
+    """Reports indexing stage progress and checks for cancellation.
+
+    `callback(stage, done, total)` is called for every update and `log(msg)` for
+    free-text messages; both default to printing.
+    """
+    STAGES = ("load", "split", "embed", "persist")
+
+    def __init__(self, callback=None, log=None, cancel_event: threading.Event | None = None):
+        self.callback = callback
+        self.log_fn = log
+        self.cancel_event = cancel_event or threading.Event()
+
+    def update(self, stage: str, done: int = 0, total: int | None = None):
+        self.check()
+        if self.callback:
+            self.callback(stage, done, total)
+
+    def log(self, msg: str):
+        if self.log_fn:
+            self.log_fn(msg)
+        else:
+            print(msg)
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self.cancel_event.is_set()
+
+    def check(self):
+        if self.cancel_event.is_set():
+            raise IndexCancelled("Indexing cancelled.")
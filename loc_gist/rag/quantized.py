@@ -0,0 +1,470 @@
+import json
+import os
+import sqlite3
+import threading
+import uuid
+
+import numpy as np
+from langchain_core.documents import Document
+
+STORE_CONFIG_FILE = "store.json"
+VECTORS_FILE = "vectors.q"
+SCALES_FILE = "scales.f32"
+FULL_VECTORS_FILE = "vectors.f32"
+LISTS_FILE = "lists.i32"
+CENTROIDS_FILE = "centroids.npy"
+ROWS_FILE = "rows.sqlite3"
+
+DTYPES = {"int8": np.int8, "float16": np.float16}
+# Rows scored per matrix product during a brute-force scan (~6 MB of float32 at 768 dims)
+SCAN_BLOCK_ROWS = 2048
+# Candidates re-scored at full precision per requested result
+RESCORE_FACTOR = 4
+# IVF kicks in from this many rows; lists ~ 4*sqrt(n), probing 1/8 of them
+IVF_MIN_ROWS = 50_000
+IVF_TRAIN_SAMPLE = 50_000
+IVF_ITERATIONS = 8
+
+
+def read_store_config(db_path: str) -> dict:
+    """The knowledge base's vector store settings; Chroma when there is no config file."""
+    try:
+        with open(os.path.join(db_path, STORE_CONFIG_FILE), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {"backend": "chroma"}
+
+
+def write_store_config(db_path: str, config: dict):
+    path = os.path.join(db_path, STORE_CONFIG_FILE)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(config, f, indent=2)
+    os.replace(tmp, path)
+
+
+def store_config_from_settings(settings: dict | None) -> dict:
+    """Config for a new knowledge base from the `vector_store` ("chroma", "int8", "float16"),
+    `vector_rescore` and `vector_ivf` settings."""
+    settings = settings or {}
+    kind = settings.get("vector_store") or "chroma"
+    if kind == "chroma":
+        return {"backend": "chroma"}
+    if kind not in DTYPES:
+        raise ValueError(f"Unknown vector store '{kind}', expected chroma, int8 or float16")
+    return {"backend": "quantized", "dtype": kind, "rescore": bool(settings.get("vector_rescore", False)),
+            "ivf": bool(settings.get("vector_ivf", True))}
+
+
+class QuantizedCollection:
+    """Quantized vectors in memory-mapped flat files plus an SQLite sidecar for IDs, text and metadata.
+
+    Speaks the subset of Chroma's collection API the pipeline uses (upsert,
+    query, get, delete, count). Vectors are L2-normalised and stored as int8
+    (with a float32 scale per row) or float16; distances are cosine (1 - cos).
+    With `rescore`, a float32 copy is kept on disk (not in RAM) and the top
+    candidates are re-scored from it. Large collections are searched through an
+    inverted-file (IVF) index built by `optimize()`, smaller ones brute force.
+    Replaced or deleted rows are tombstoned until `compact()`.
+    """
+
+    metadata = {"hnsw:space": "cosine"}
+
+    def __init__(self, path: str, dtype: str = "int8", rescore: bool = False, ivf: bool = True):
+        self.path = path
+        self.dtype = np.dtype(DTYPES[dtype])
+        self.rescore = rescore
+        self.ivf = ivf
+        self._lock = threading.RLock()
+        self._db = sqlite3.connect(os.path.join(path, ROWS_FILE), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS rows ("
+            "row INTEGER PRIMARY KEY, id TEXT UNIQUE, document TEXT, metadata TEXT)"
+        )
+        self._db.commit()
+        config = read_store_config(path)
+        self.dim = config.get("dim")
+        self._n = self._recover()
+        self._live = np.zeros(self._n, dtype=bool)
+        live_rows = [r for (r,) in self._db.execute("SELECT row FROM rows WHERE id IS NOT NULL")]
+        self._live[live_rows] = True
+        self._maps = {}
+        self._centroids = None
+        self._ivf_rows = 0
+        if os.path.exists(os.path.join(path, CENTROIDS_FILE)):
+            self._centroids = np.load(os.path.join(path, CENTROIDS_FILE))
+            self._ivf_rows = config.get("ivf_rows", 0)
+
+    # -- Chroma-compatible API ----------------------------------------------
+    def count(self) -> int:
+        with self._lock:
+            return int(self._live.sum())
+
+    def upsert(self, ids, embeddings, metadatas=None, documents=None):
+        vectors = _normalize(np.asarray(embeddings, dtype=np.float32))
+        metadatas = metadatas or [None] * len(ids)
+        documents = documents or [""] * len(ids)
+        with self._lock:
+            if self.dim is None:
+                self.dim = vectors.shape[1]
+                write_store_config(self.path, {**read_store_config(self.path), "dim": self.dim})
+            self._tombstone(ids)
+            start = self._n
+            quantized, scales = self._quantize(vectors)
+            self._append(VECTORS_FILE, quantized)
+            if scales is not None:
+                self._append(SCALES_FILE, scales)
+            if self.rescore:
+                self._append(FULL_VECTORS_FILE, vectors)
+            if self._centroids is not None:
+                self._append(LISTS_FILE, self._assign(vectors))
+            self._db.executemany(
+                "INSERT INTO rows VALUES (?, ?, ?, ?)",
+                [(start + i, chunk_id, doc, json.dumps(meta) if meta else None)
+                 for i, (chunk_id, doc, meta) in enumerate(zip(ids, documents, metadatas))],
+            )
+            self._db.commit()
+            self._n += len(ids)
+            self._live = np.concatenate([self._live, np.ones(len(ids), dtype=bool)])
+            self._maps.clear()
+
+    def delete(self, ids=None):
+        with self._lock:
+            self._tombstone(ids or [])
+            self._db.commit()
+
+    def get(self, ids=None, include=("documents", "metadatas"), limit=None, offset=None):
+        with self._lock:
+            if ids is not None:
+                rows = self._select_ids(ids)
+            else:
+                rows = self._db.execute(
+                    "SELECT row, id, document, metadata FROM rows WHERE id IS NOT NULL ORDER BY row "
+                    "LIMIT ? OFFSET ?", (-1 if limit is None else limit, offset or 0),
+                ).fetchall()
+            result = self._result(rows, include)
+            if "embeddings" in include:
+                result["embeddings"] = [v.tolist() for v in self._vectors([r[0] for r in rows])]
+            return result
+
+    def query(self, query_embeddings, n_results: int = 4, include=("documents", "metadatas", "distances")):
+        result = {"ids": [], "documents": [], "metadatas": [], "distances": []}
+        for query in query_embeddings:
+            hits = self.search(query, n_results)
+            if not hits:
+                for key in result:
+                    result[key].append([])
+                continue
+            with self._lock:
+                by_row = {r[0]: r for r in self._db.execute(
+                    f"SELECT row, id, document, metadata FROM rows WHERE row IN ({','.join('?' * len(hits))}) "
+                    "AND id IS NOT NULL",
+                    [row for row, _ in hits],
+                )}
+            rows = [by_row[row] for row, _ in hits if row in by_row]
+            one = self._result(rows, include)
+            for key in ("ids", "documents", "metadatas"):
+                result[key].append(one.get(key, []))
+            result["distances"].append([1.0 - score for row, score in hits if row in by_row])
+        return result
+
+    # -- search --------------------------------------------------------------
+    def search(self, query, k: int = 4) -> list:
+        """Top-k (row, cosine similarity) pairs for a query vector."""
+        query = _normalize(np.asarray(query, dtype=np.float32)[None, :])[0]
+        with self._lock:
+            n, live = self._n, self._live
+            vectors, scales = self._map(VECTORS_FILE, self.dtype), self._map(SCALES_FILE, np.float32)
+            centroids = self._centroids
+            lists = self._map(LISTS_FILE, np.int32) if centroids is not None else None
+        if not n or not live.any():
+            return []
+        fetch = k * RESCORE_FACTOR if self.rescore else k
+        if centroids is not None and lists is not None and len(lists) == n:
+            probe = np.argsort(centroids @ query)[::-1][:max(1, len(centroids) // 8)]
+            candidates = np.flatnonzero(np.isin(lists, probe) & live)
+            scores = _score(vectors, scales, query, candidates)
+            top = _top(scores, fetch)
+            rows, scores = candidates[top], scores[top]
+        else:
+            best_rows, best_scores = [], []
+            for start in range(0, n, SCAN_BLOCK_ROWS):
+                block = np.arange(start, min(start + SCAN_BLOCK_ROWS, n))
+                scores = _score(vectors, scales, query, block)
+                scores[~live[start:start + len(block)]] = -np.inf
+                top = _top(scores, fetch)
+                best_rows.append(block[top])
+                best_scores.append(scores[top])
+            rows, scores = np.concatenate(best_rows), np.concatenate(best_scores)
+            top = _top(scores, fetch)
+            rows, scores = rows[top], scores[top]
+        keep = np.isfinite(scores)
+        rows, scores = rows[keep], scores[keep]
+        if self.rescore and len(rows):
+            full = self._map(FULL_VECTORS_FILE, np.float32)
+            if full is not None:
+                scores = full[np.sort(rows)] @ query
+                rows = np.sort(rows)
+        order = np.argsort(-scores, kind="stable")[:k]
+        return [(int(rows[i]), float(scores[i])) for i in order]
+
+    # -- maintenance ---------------------------------------------------------
+    def optimize(self):
+        """(Re)train the IVF index once the collection is large enough or has doubled since."""
+        if not self.ivf:
+            return False
+        with self._lock:
+            live_rows = np.flatnonzero(self._live)
+            if len(live_rows) < IVF_MIN_ROWS or (self._centroids is not None and self._n < 2 * self._ivf_rows):
+                return False
+            n_lists = int(4 * np.sqrt(len(live_rows)))
+            rng = np.random.default_rng(0)
+            sample = np.sort(rng.choice(live_rows, min(len(live_rows), IVF_TRAIN_SAMPLE), replace=False))
+            centroids = _kmeans(self._vectors(sample), n_lists, rng)
+            self._centroids = centroids
+            lists = np.concatenate([
+                self._assign(self._vectors(np.arange(start, min(start + SCAN_BLOCK_ROWS * 8, self._n))))
+                for start in range(0, self._n, SCAN_BLOCK_ROWS * 8)
+            ])
+            self._write(LISTS_FILE, lists)
+            np.save(os.path.join(self.path, CENTROIDS_FILE), centroids)
+            self._ivf_rows = self._n
+            write_store_config(self.path, {**read_store_config(self.path), "ivf_rows": self._n})
+            print(f"Built IVF index: {n_lists} lists over {self._n} vectors")
+            return True
+
+    def compact(self):
+        """Rewrite the vector files without tombstoned rows; returns the number of rows dropped."""
+        with self._lock:
+            keep = np.flatnonzero(self._live)
+            dropped = self._n - len(keep)
+            if not dropped:
+                return 0
+            for name, dtype, width in ((VECTORS_FILE, self.dtype, self.dim), (SCALES_FILE, np.float32, None),
+                                       (FULL_VECTORS_FILE, np.float32, self.dim), (LISTS_FILE, np.int32, None)):
+                data = self._map(name, dtype)
+                if data is not None:
+                    self._write(name, np.ascontiguousarray(data[keep]))
+            self._db.execute("DELETE FROM rows WHERE id IS NULL")
+            # Renumber in order; rows only move down so the updates never collide
+            self._db.executemany("UPDATE rows SET row = ? WHERE row = ?",
+                                 [(new, int(old)) for new, old in enumerate(keep)])
+            self._db.commit()
+            self._db.execute("VACUUM")
+            # In WAL mode VACUUM lands in the -wal file; fold it back so the space is really freed
+            self._db.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            self._n = len(keep)
+            self._live = np.ones(self._n, dtype=bool)
+            print(f"Compacted vector store: dropped {dropped} stale rows")
+            return dropped
+
+    def size_bytes(self) -> int:
+        return sum(os.path.getsize(os.path.join(self.path, f)) for f in os.listdir(self.path)
+                   if os.path.isfile(os.path.join(self.path, f)))
+
+    # -- internals -----------------------------------------------------------
+    def _quantize(self, vectors):
+        if self.dtype == np.int8:
+            scales = np.maximum(np.abs(vectors).max(axis=1), 1e-12) / 127.0
+            quantized = np.clip(np.rint(vectors / scales[:, None]), -127, 127).astype(np.int8)
+            return quantized, scales.astype(np.float32)
+        return vectors.astype(self.dtype), None
+
+    def _vectors(self, rows) -> np.ndarray:
+        """Float32 vectors for `rows`, at full precision when available."""
+        rows = np.asarray(rows, dtype=np.int64)
+        full = self._map(FULL_VECTORS_FILE, np.float32)
+        if full is not None:
+            return np.asarray(full[rows])
+        vectors = self._map(VECTORS_FILE, self.dtype)[rows].astype(np.float32)
+        scales = self._map(SCALES_FILE, np.float32)
+        return vectors * scales[rows, None] if scales is not None else vectors
+
+    def _assign(self, vectors) -> np.ndarray:
+        return np.argmax(vectors @ self._centroids.T, axis=1).astype(np.int32)
+
+    def _tombstone(self, ids):
+        rows = [r for (r,) in self._select_rows(ids)]
+        if rows:
+            self._db.executemany("UPDATE rows SET id = NULL, document = NULL, metadata = NULL WHERE row = ?",
+                                 [(r,) for r in rows])
+            self._live[rows] = False
+
+    def _select_rows(self, ids):
+        found = []
+        ids = list(ids)
+        for start in range(0, len(ids), 500):
+            part = ids[start:start + 500]
+            found += self._db.execute(f"SELECT row FROM rows WHERE id IN ({','.join('?' * len(part))})", part).fetchall()
+        return found
+
+    def _select_ids(self, ids):
+        ids = list(ids)
+        by_id = {}
+        for start in range(0, len(ids), 500):
+            part = ids[start:start + 500]
+            for row in self._db.execute(
+                f"SELECT row, id, document, metadata FROM rows WHERE id IN ({','.join('?' * len(part))})", part,
+            ):
+                by_id[row[1]] = row
+        return [by_id[i] for i in ids if i in by_id]
+
+    @staticmethod
+    def _result(rows, include) -> dict:
+        result = {"ids": [r[1] for r in rows]}
+        if "documents" in include:
+            result["documents"] = [r[2] for r in rows]
+        if "metadatas" in include:
+            result["metadatas"] = [json.loads(r[3]) if r[3] else None for r in rows]
+        return result
+
+    def _recover(self) -> int:
+        """Row count on open. After an interrupted upsert the row files and the sidecar can disagree;
+        both are cut back to the rows every one of them has."""
+        if not self.dim:
+            return 0
+        sizes = {name: (os.path.getsize(os.path.join(self.path, name)), row_bytes)
+                 for name, row_bytes in ((VECTORS_FILE, self.dtype.itemsize * self.dim), (SCALES_FILE, 4),
+                                         (FULL_VECTORS_FILE, 4 * self.dim))
+                 if os.path.exists(os.path.join(self.path, name))}
+        extent = self._db.execute("SELECT COALESCE(MAX(row) + 1, 0) FROM rows").fetchone()[0]
+        n = min([extent] + [size // row_bytes for size, row_bytes in sizes.values()]) if sizes else 0
+        lost = self._db.execute("SELECT COUNT(id) FROM rows WHERE row >= ?", (n,)).fetchone()[0]
+        cut = extent > n or any(size > n * row_bytes for size, row_bytes in sizes.values())
+        if extent > n:
+            self._db.execute("DELETE FROM rows WHERE row >= ?", (n,))
+            self._db.commit()
+        for name, (size, row_bytes) in sizes.items():
+            if size > n * row_bytes:
+                os.truncate(os.path.join(self.path, name), n * row_bytes)
+        lists = os.path.join(self.path, LISTS_FILE)
+        if os.path.exists(lists) and os.path.getsize(lists) != n * 4:
+            # IVF assignments are derived data: drop them and let optimize() rebuild the index
+            os.remove(lists)
+            if os.path.exists(os.path.join(self.path, CENTROIDS_FILE)):
+                os.remove(os.path.join(self.path, CENTROIDS_FILE))
+        if cut:
+            print(f"Recovered {self.path} after an interrupted write: kept {n} rows, lost {lost} chunk(s)")
+        return n
+
+    def _map(self, name, dtype):
+        """Read-only memory map of a row file (None if it doesn't exist)."""
+        if name in self._maps:
+            return self._maps[name]
+        path = os.path.join(self.path, name)
+        if not self._n or not os.path.exists(path):
+            return None
+        width = None if name in (SCALES_FILE, LISTS_FILE) else self.dim
+        shape = (self._n,) if width is None else (self._n, width)
+        self._maps[name] = np.memmap(path, dtype=dtype, mode="r", shape=shape)
+        return self._maps[name]
+
+    def _append(self, name, data):
+        self._maps.pop(name, None)
+        with open(os.path.join(self.path, name), "ab") as f:
+            f.write(np.ascontiguousarray(data).tobytes())
+
+    def _write(self, name, data):
+        self._maps.pop(name, None)
+        path = os.path.join(self.path, name)
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(np.ascontiguousarray(data).tobytes())
+        os.replace(tmp, path)
+
+
+class QuantizedVectorStore:
+    """Vector store over a QuantizedCollection with the Chroma methods the app calls."""
+
+    def __init__(self, embedding, persist_directory: str, dtype: str = "int8", rescore: bool = False,
+                 ivf: bool = True):
+        self.embeddings = embedding
+        self._persist_directory = persist_directory
+        self._collection = _open_collection(persist_directory, dtype, rescore, ivf)
+
+    def similarity_search(self, query: str, k: int = 4) -> list:
+        result = self._collection.query([self.embeddings.embed_query(query)], n_results=k)
+        return [Document(page_content=text, metadata=metadata or {}, id=chunk_id)
+                for chunk_id, text, metadata in zip(result["ids"][0], result["documents"][0], result["metadatas"][0])]
+
+    def add_texts(self, texts, metadatas=None, ids=None):
+        """Embed and upsert texts by ID, like Chroma.add_texts."""
+        texts = list(texts)
+        ids = ids or [str(uuid.uuid4()) for _ in texts]
+        self._collection.upsert(ids=ids, embeddings=self.embeddings.embed_documents(texts), metadatas=metadatas,
+                                documents=texts)
+        return ids
+
+    def get(self, ids=None, include=("documents", "metadatas"), limit=None, offset=None):
+        return self._collection.get(ids=ids, include=include, limit=limit, offset=offset)
+
+    def delete(self, ids=None):
+        self._collection.delete(ids=ids)
+
+    def as_retriever(self, search_type: str = "similarity", search_kwargs: dict | None = None):
+        return _StoreRetriever(self, (search_kwargs or {}).get("k", 4))
+
+
+class _StoreRetriever:
+    def __init__(self, store, k):
+        self.store = store
+        self.k = k
+
+    def invoke(self, query: str):
+        return self.store.similarity_search(query, self.k)
+
+
+_collections = {}
+_collections_lock = threading.Lock()
+
+
+def _open_collection(path, dtype, rescore, ivf):
+    # One instance per directory so the indexer's writes are seen by open query chains
+    with _collections_lock:
+        collection = _collections.get(path)
+        if collection is None:
+            collection = _collections[path] = QuantizedCollection(path, dtype, rescore, ivf)
+        return collection
+
+
+def close_collection(path: str):
+    with _collections_lock:
+        collection = _collections.pop(path, None)
+    if collection is not None:
+        collection._db.close()
+
+
+def _normalize(vectors):
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def _score(vectors, scales, query, rows):
+    block = np.asarray(vectors[rows], dtype=np.float32)
+    scores = block @ query
+    return scores * scales[rows] if scales is not None else scores
+
+
+def _top(scores, k):
+    if len(scores) <= k:
+        return np.argsort(-scores)
+    top = np.argpartition(-scores, k)[:k]
+    return top[np.argsort(-scores[top])]
+
+
+def _kmeans(sample, n_lists, rng):
+    """Spherical k-means on unit vectors."""
+    centroids = sample[rng.choice(len(sample), n_lists, replace=False)]
+    for _ in range(IVF_ITERATIONS):
+        assign = np.argmax(sample @ centroids.T, axis=1)
+        counts = np.bincount(assign, minlength=n_lists)
+        order = np.argsort(assign, kind="stable")
+        starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+        used = counts > 0
+        sums = np.zeros_like(centroids)
+        sums[used] = np.add.reduceat(sample[order], starts[used], axis=0)
+        # Re-seed empty lists from random sample vectors
+        sums[~used] = sample[rng.choice(len(sample), int((~used).sum()))]
+        centroids = _normalize(sums)
+    return centroids.astype(np.float32)
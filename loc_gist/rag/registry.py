@@ -0,0 +1,127 @@
+import threading
+from collections import OrderedDict
+
+from langchain_ollama import ChatOllama
+
+from .abort import AbortableTransport
+from .catalog import EMBED_MODEL
+from .embedding import get_embedding, get_vector_store, open_chroma_client
+from .quantized import close_collection, read_store_config
+from .rerank import CROSS_ENCODER_PREFIX, CrossEncoderReranker, OllamaReranker
+
+# Knowledge bases kept open at once; the least recently used one is closed
+MAX_OPEN_STORES = 4
+
+
+class ResourceRegistry:
+    """Keeps expensive RAG resources alive across chain rebuilds.
+
+    One embedding client per model, an LRU of open vector stores per knowledge
+    base, and one base ChatOllama per (model, context window) whose HTTP client
+    is shared by the cheap per-settings copies handed out by `llm`.
+    """
+
+    def __init__(self, max_open_stores: int = MAX_OPEN_STORES):
+        self.max_open_stores = max_open_stores
+        self._embeddings = {}
+        self._stores = OrderedDict()
+        self._chroma_clients = {}  # db path -> the Chroma client its open stores share
+        self._llms = {}
+        self._rerankers = {}
+        self._lock = threading.RLock()
+
+    def embedding(self, model_name: str = EMBED_MODEL, keep_alive=None):
+        with self._lock:
+            if model_name not in self._embeddings:
+                self._embeddings[model_name] = get_embedding(model_name)
+            embedding = self._embeddings[model_name]
+            if keep_alive is not None:
+                # Shared client, so the latest chain's keep-alive applies to every user of the model
+                getattr(embedding, "embedding", embedding).keep_alive = _keep_alive(keep_alive)
+            return embedding
+
+    def vector_store(self, db_path: str, embedding_model: str = EMBED_MODEL):
+        key = (db_path, embedding_model)
+        with self._lock:
+            if key in self._stores:
+                self._stores.move_to_end(key)
+                return self._stores[key]
+            client = None
+            if read_store_config(db_path).get("backend") != "quantized":
+                client = self._chroma_clients.get(db_path)
+                if client is None:
+                    client = self._chroma_clients[db_path] = open_chroma_client(db_path)
+            store = get_vector_store(self.embedding(embedding_model), db_path, client=client)
+            self._stores[key] = store
+            while len(self._stores) > self.max_open_stores:
+                (path, _), _ = self._stores.popitem(last=False)
+                # The folder may still be open under another embedding model
+                if not any(k[0] == path for k in self._stores):
+                    self._close(path)
+                    print(f"Closed vector store: {path}")
+            return store
+
+    def close_store(self, db_path: str):
+        """Close any open store for `db_path` (e.g. before deleting it)."""
+        with self._lock:
+            for key in [k for k in self._stores if k[0] == db_path]:
+                del self._stores[key]
+            self._close(db_path)
+
+    def _close(self, db_path: str):
+        # Releases only this registry's hold; Chroma stops the folder's system once no client uses it
+        client = self._chroma_clients.pop(db_path, None)
+        if client is not None:
+            client.close()
+        close_collection(db_path)
+
+    def llm(self, model: str, ctx_window: int = 8192, temperature: float = 0.0, max_tokens: int | None = None,
+            keep_alive=None):
+        """A ChatOllama with the given sampling settings that reuses a pooled client."""
+        key = (model, ctx_window)
+        with self._lock:
+            base = self._llms.get(key)
+            if base is None:
+                # Its connections can be cut when an answer is stopped (see RagStream)
+                base = ChatOllama(model=model, num_ctx=ctx_window,
+                                  sync_client_kwargs={"transport": AbortableTransport()})
+                self._llms[key] = base
+                print(f"Initialized ChatOllama: {model}, context window: {ctx_window}")
+        # model_copy keeps the private Ollama client, so no new connection pool
+        return base.model_copy(update={"temperature": temperature, "num_predict": max_tokens,
+                                       "keep_alive": _keep_alive(keep_alive)})
+
+    def reranker(self, model: str):
+        """A reranker for `model`: an Ollama model name, or "cross-encoder:<name>"."""
+        with self._lock:
+            reranker = self._rerankers.get(model)
+            if reranker is None:
+                if model.startswith(CROSS_ENCODER_PREFIX):
+                    reranker = CrossEncoderReranker(model[len(CROSS_ENCODER_PREFIX):])
+                else:
+                    reranker = OllamaReranker(self.llm(model, ctx_window=4096, temperature=0.0, max_tokens=256))
+                self._rerankers[model] = reranker
+                print(f"Initialized reranker: {model}")
+            return reranker
+
+
+def _keep_alive(value):
+    """Ollama wants a duration ("30m") or a number of seconds; "-1" typed in a settings field is the latter."""
+    if isinstance(value, str):
+        try:
+            return int(value.strip())
+        except ValueError:
+            return value.strip() or None
+    return value
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_registry() -> ResourceRegistry:
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = ResourceRegistry()
+        return _registry
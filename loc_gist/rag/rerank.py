@@ -0,0 +1,170 @@
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from .abort import abort_requests
+from .metrics import RERANK, incr, span
+from .settings import DEFAULT_SETTINGS
+
+# Candidates fetched for reranking, passages scored per LLM request and the
+# time allowed for scoring before falling back to retriever order
+RERANK_FETCH_K = DEFAULT_SETTINGS["rerank_fetch_k"]
+RERANK_BATCH_SIZE = 5
+RERANK_BUDGET_S = DEFAULT_SETTINGS["rerank_budget_s"]
+RERANK_WORKERS = 2
+# Passage characters shown to the LLM scorer
+MAX_PASSAGE_CHARS = 800
+# `rerank_model` values starting with this use a sentence-transformers cross-encoder
+CROSS_ENCODER_PREFIX = "cross-encoder:"
+
+_SCORE_LINE = re.compile(r"^\s*\[?(\d+)\]?\s*[:=\-]\s*(\d+(?:\.\d+)?)", re.MULTILINE)
+_THINK_BLOCK = re.compile(r"<think>.*?(</think>|$)", re.DOTALL)
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+class OllamaReranker:
+    """Scores passages 0-10 for relevance with a local chat model, several passages per request."""
+
+    PROMPT = """Rate how well each passage helps answer the question, from 0 (irrelevant) to 10 (answers it directly).
+Reply with one line per passage in the form "<passage number>: <score>" and nothing else. /no_think
+
+Question: {question}
+
+{passages}"""
+
+    def __init__(self, llm, batch_size: int = RERANK_BATCH_SIZE):
+        self.llm = llm
+        self.batch_size = batch_size
+
+    def score(self, question: str, texts: list) -> list:
+        passages = "\n\n".join(f"[{i}] {text[:MAX_PASSAGE_CHARS]}" for i, text in enumerate(texts, start=1))
+        reply = self.llm.invoke(self.PROMPT.format(question=question, passages=passages)).content
+        return parse_scores(reply, len(texts))
+
+
+class CrossEncoderReranker:
+    """Scores (question, passage) pairs with a sentence-transformers cross-encoder."""
+
+    def __init__(self, model_name: str, batch_size: int = RERANK_FETCH_K):
+        try:
+            from sentence_transformers import CrossEncoder
+        except ImportError as e:
+            raise ImportError(
+                "Cross-encoder reranking needs sentence-transformers: pip install sentence-transformers"
+            ) from e
+        self.model = CrossEncoder(model_name)
+        self.batch_size = batch_size
+
+    def score(self, question: str, texts: list) -> list:
+        return [float(s) for s in self.model.predict([(question, t) for t in texts], batch_size=len(texts))]
+
+
+class RerankingRetriever:
+    """Over-fetches candidates from `base` and keeps the `k` the reranker scores highest.
+
+    Scoring runs in batches on a small shared pool. If it does not finish within
+    `budget_s` (or fails), the first `k` candidates in retriever order are used
+    and the Ollama requests still in flight are aborted.
+    """
+
+    def __init__(self, base, reranker, k: int = 3, budget_s: float = RERANK_BUDGET_S):
+        self.base = base
+        self.reranker = reranker
+        self.k = k
+        self.budget_s = budget_s
+
+    def invoke(self, question: str):
+        candidates = self.base.invoke(question)
+        if len(candidates) <= self.k:
+            return candidates
+        started = time.perf_counter()
+        with span(RERANK):
+            scores = self._score(question, [doc.page_content for doc in candidates])
+        if scores is None:
+            incr("rerank.fallback")
+            print(f"Rerank fell back to retriever order after {time.perf_counter() - started:.2f}s")
+            return candidates[:self.k]
+        # Stable sort: unscored passages (-1) and ties keep retriever order
+        order = sorted(range(len(candidates)), key=lambda i: -scores[i])
+        return [candidates[i] for i in order[:self.k]]
+
+    def _score(self, question: str, texts: list):
+        deadline = time.monotonic() + self.budget_s
+        size = max(1, self.reranker.batch_size)
+        batches = [range(start, min(start + size, len(texts))) for start in range(0, len(texts), size)]
+        pool = _get_pool()
+        running = _Running()
+        futures = {pool.submit(_score_batch, self.reranker, question, [texts[i] for i in batch], deadline, running):
+                   batch for batch in batches}
+        done, pending = wait(futures, timeout=self.budget_s)
+        for future in pending:
+            future.cancel()
+        if pending:
+            running.abort()
+            return None
+        scores = [-1.0] * len(texts)
+        for future, batch in futures.items():
+            try:
+                batch_scores = future.result()
+            except Exception as e:
+                print(f"Rerank batch failed: {e}")
+                return None
+            if batch_scores is None:
+                return None
+            for i, score in zip(batch, batch_scores):
+                scores[i] = score
+        return scores
+
+
+def parse_scores(reply: str, count: int) -> list:
+    """Scores from "<n>: <score>" lines; passages the model skipped get -1."""
+    scores = [-1.0] * count
+    for number, score in _SCORE_LINE.findall(_THINK_BLOCK.sub("", reply)):
+        index = int(number) - 1
+        if 0 <= index < count:
+            scores[index] = float(score)
+    return scores
+
+
+class _Running:
+    """Pool threads currently scoring a batch for one rerank, so they can be aborted at the deadline."""
+
+    def __init__(self):
+        self._threads = set()
+        self._lock = threading.Lock()
+
+    def add(self):
+        with self._lock:
+            self._threads.add(threading.get_ident())
+
+    def discard(self):
+        with self._lock:
+            self._threads.discard(threading.get_ident())
+
+    def abort(self):
+        # Under the lock, so a thread is not aborted after moving on to someone else's batch
+        with self._lock:
+            for thread_id in self._threads:
+                abort_requests(thread_id)
+
+
+def _score_batch(reranker, question, texts, deadline, running):
+    # Batches still queued when the budget runs out are skipped, not sent
+    if time.monotonic() >= deadline:
+        return None
+    running.add()
+    try:
+        return reranker.score(question, texts)
+    finally:
+        running.discard()
+
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=RERANK_WORKERS, thread_name_prefix="rerank")
+        return _pool
@@ -0,0 +1,18 @@
+from .catalog import EMBED_MODEL
+from .context import CONTEXT_SHARE
+from .warmup import KEEP_ALIVE
+
+# Settings that shape a chain's retrieval and answers, with the types their values take
+SETTING_TYPES = {
+    "model": str, "temperature": float, "top_k": int, "max_tokens": int, "ctx_window": int,
+    "lexical_weight": float, "rerank_model": str, "rerank_fetch_k": int, "rerank_budget_s": float,
+    "context_share": float, "keep_alive": (int, str), "embedding_model": str,
+}
+SETTING_KEYS = tuple(SETTING_TYPES)
+
+# Used for settings a caller leaves out, and as the GUI and CLI defaults; cheap to import
+DEFAULT_SETTINGS = {
+    "model": "qwen3:4b", "temperature": 0.2, "top_k": 4, "max_tokens": 1024, "ctx_window": 8192,
+    "lexical_weight": 0.4, "rerank_model": None, "rerank_fetch_k": 20, "rerank_budget_s": 3.0,
+    "context_share": CONTEXT_SHARE, "keep_alive": KEEP_ALIVE, "embedding_model": EMBED_MODEL,
+}
@@ -0,0 +1,180 @@
+import threading
+import time
+
+from .abort import abort_requests
+from .metrics import FIRST_TOKEN, FIRST_TOKEN_COLD, FIRST_TOKEN_WARM, GENERATION, PREFILL, TOKENS_PER_S, metrics
+from .warmup import COLD_LOAD_S
+
+# How often a cancellable stream checks its cancel event while waiting on Ollama
+CANCEL_POLL_S = 0.1
+
+
+class ThinkTagParser:
+    """Splits a token stream into <think> and answer pieces as it arrives."""
+    OPEN_TAG = "<think>"
+    CLOSE_TAG = "</think>"
+
+    def __init__(self):
+        self._buffer = ""
+        self.in_think = False
+
+    def feed(self, text):
+        """Consume a chunk and return a list of (kind, text) pieces ready to display."""
+        self._buffer += text
+        pieces = []
+        while self._buffer:
+            kind = "think" if self.in_think else "answer"
+            tag = self.CLOSE_TAG if self.in_think else self.OPEN_TAG
+            idx = self._buffer.find(tag)
+            if idx >= 0:
+                if idx:
+                    pieces.append((kind, self._buffer[:idx]))
+                self._buffer = self._buffer[idx + len(tag):]
+                self.in_think = not self.in_think
+                continue
+            # Hold back a trailing partial tag (e.g. "</th") until the next chunk
+            keep = _partial_suffix_len(self._buffer, tag)
+            ready = self._buffer[:len(self._buffer) - keep]
+            if ready:
+                pieces.append((kind, ready))
+            self._buffer = self._buffer[len(ready):]
+            break
+        return pieces
+
+    def flush(self):
+        """Return whatever is still buffered at the end of the stream."""
+        pieces = []
+        if self._buffer:
+            pieces.append(("think" if self.in_think else "answer", self._buffer))
+        self._buffer = ""
+        return pieces
+
+
+def _partial_suffix_len(text, tag):
+    for size in range(min(len(tag) - 1, len(text)), 0, -1):
+        if text.endswith(tag[:size]):
+            return size
+    return 0
+
+
+class RagStream:
+    """Iterates over (kind, text) pieces of a streamed answer and records its latency."""
+
+    def __init__(self, chunks, started_at: float | None = None, record: bool = True, stats: dict | None = None,
+                 cancel_event=None):
+        self._chunks = chunks
+        self.stats = stats          # filled with Ollama's timings once the stream is done
+        self.cancel_event = cancel_event
+        self.cancelled = False
+        self.queue_wait_s = None    # time the question waited for earlier ones, set by the scheduler
+        self._parser = ThinkTagParser()
+        self.started_at = started_at
+        self.record = record        # False for replayed (cached) answers
+        self.note = None
+        self.tokens = 0             # streamed chunks, about one token each
+        self.first_token_s = None   # first token of any kind, incl. <think>
+        self.first_answer_s = None  # first visible answer token
+        self.total_s = None
+        self.load_s = None          # time Ollama spent loading the model for this answer
+        self.prefill_s = None       # time Ollama spent evaluating the prompt
+        self.prompt_tokens = None   # prompt tokens evaluated, i.e. not served from its KV cache
+
+    @property
+    def cold(self):
+        """True if the model had to be loaded for this answer, None if unknown."""
+        return None if self.load_s is None else self.load_s >= COLD_LOAD_S
+
+    def __iter__(self):
+        if self.started_at is None:
+            self.started_at = time.perf_counter()
+        finished = threading.Event()
+        if self.cancel_event is not None:
+            threading.Thread(target=self._watch, args=(threading.get_ident(), finished), name="stream-cancel",
+                             daemon=True).start()
+        try:
+            # Stopped while the context was being retrieved: don't even send the request
+            for chunk in () if self._stop_requested() else self._chunks:
+                if self._stop_requested():
+                    break
+                if not chunk:
+                    continue
+                self.tokens += 1
+                if self.first_token_s is None:
+                    self.first_token_s = time.perf_counter() - self.started_at
+                    if self.record:
+                        metrics.observe(FIRST_TOKEN, self.first_token_s)
+                    print(f"Time to first token: {self.first_token_s:.2f}s")
+                yield from self._emit(self._parser.feed(chunk))
+        except Exception:
+            # The watcher cut the connection mid-request
+            if not self.cancelled:
+                raise
+        finally:
+            finished.set()
+        if self._stop_requested():
+            self.close()
+        yield from self._emit(self._parser.flush())
+        self.total_s = time.perf_counter() - self.started_at
+        if self.cancelled:
+            print(f"Stream cancelled after {self.tokens} token(s) in {self.total_s:.2f}s")
+            return
+        if self.record and self.first_token_s is not None:
+            generation_s = self.total_s - self.first_token_s
+            metrics.observe(GENERATION, generation_s)
+            if generation_s > 0 and self.tokens > 1:
+                metrics.observe(TOKENS_PER_S, (self.tokens - 1) / generation_s)
+        if self.stats and self.stats.get("load_duration") is not None:
+            self.load_s = self.stats["load_duration"] / 1e9
+            if self.record and self.first_token_s is not None:
+                metrics.observe(FIRST_TOKEN_COLD if self.cold else FIRST_TOKEN_WARM, self.first_token_s)
+            print(f"First token was {'cold' if self.cold else 'warm'}: model load {self.load_s:.2f}s")
+        if self.stats and self.stats.get("prompt_eval_duration") is not None:
+            self.prefill_s = self.stats["prompt_eval_duration"] / 1e9
+            self.prompt_tokens = self.stats.get("prompt_eval_count")
+            if self.record:
+                metrics.observe(PREFILL, self.prefill_s)
+            print(f"Prefill: {self.prompt_tokens} prompt token(s) in {self.prefill_s:.2f}s")
+        print(f"Stream finished in {self.total_s:.2f}s")
+
+    def close(self):
+        """Stop generating: closing the chunk generators closes the HTTP stream, so Ollama aborts the request."""
+        self.cancelled = True
+        close = getattr(self._chunks, "close", None)
+        if close is not None:
+            close()
+
+    def _stop_requested(self):
+        return self.cancel_event is not None and self.cancel_event.is_set()
+
+    def _watch(self, thread_id, finished):
+        """Abort the request from `thread_id` once cancelled, even while no tokens arrive (e.g. during prefill)."""
+        while not finished.is_set():
+            if self.cancel_event.wait(CANCEL_POLL_S):
+                if not finished.is_set():
+                    self.cancelled = True
+                    abort_requests(thread_id)
+                return
+
+    def _emit(self, pieces):
+        for kind, text in pieces:
+            if kind == "answer" and self.first_answer_s is None:
+                if not text.strip():
+                    continue
+                text = text.lstrip()
+                self.first_answer_s = time.perf_counter() - self.started_at
+            yield kind, text
+
+    def summary(self):
+        """Return a one-line latency summary for logs."""
+        def fmt(value):
+            return "n/a" if value is None else f"{value:.2f}s"
+        start = "" if self.cold is None else (f" (cold start, model load {fmt(self.load_s)})" if self.cold else " (warm)")
+        summary = (f"first token {fmt(self.first_token_s)}{start}, "
+                   f"first answer token {fmt(self.first_answer_s)}, total {fmt(self.total_s)}")
+        if self.prefill_s is not None:
+            summary += f", prefill {fmt(self.prefill_s)} for {self.prompt_tokens} token(s)"
+        if self.queue_wait_s is not None:
+            summary += f", queued {fmt(self.queue_wait_s)}"
+        if self.cancelled:
+            summary += f", cancelled after {self.tokens} token(s)"
+        return f"{summary} ({self.note})" if self.note else summary
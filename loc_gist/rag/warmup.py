@@ -0,0 +1,95 @@
+import importlib
+import threading
+import time
+
+# Slowest imports first, so their cost shows up under their own name
+HEAVY_MODULES = (
+    "langchain_core.prompts",
+    "langchain_ollama",
+    "chromadb",
+    "langchain_community.vectorstores",
+    "langchain_community.document_loaders",
+    "langchain_text_splitters",
+    "loc_gist.rag.api",
+)
+
+
+def import_timed(modules=HEAVY_MODULES) -> list:
+    """Import `modules` in order; returns (module, seconds) pairs (already loaded ones cost ~0)."""
+    timings = []
+    for name in modules:
+        started = time.perf_counter()
+        try:
+            importlib.import_module(name)
+        except ImportError as e:
+            print(f"Warm-up could not import {name}: {e}")
+        timings.append((name, time.perf_counter() - started))
+    return timings
+
+
+def warm_up(log=print):
+    """Load the RAG stack ahead of first use and log how long each part took."""
+    started = time.perf_counter()
+    timings = import_timed()
+    total = time.perf_counter() - started
+    detail = ", ".join(f"{name} {seconds * 1000:.0f} ms" for name, seconds in timings if seconds >= 0.01)
+    log(f"[SYS]: RAG modules loaded in {total:.2f}s ({detail or 'already loaded'})")
+    return timings
+
+
+def start_warmup(log=print) -> threading.Thread:
+    """Run `warm_up` on a daemon thread; `log` must be safe to call from it."""
+    thread = threading.Thread(target=warm_up, kwargs={"log": log}, name="rag-warmup", daemon=True)
+    thread.start()
+    return thread
+
+
+# How long Ollama keeps a model loaded after its last request ("-1" = forever)
+KEEP_ALIVE = "30m"
+# A request that spends longer than this loading the model counts as a cold start
+COLD_LOAD_S = 0.5
+
+
+def warm_models(chain, log=print) -> dict:
+    """Load the chain's embedding and chat models into Ollama ahead of the first query.
+
+    Sends one tiny embedding (past the embedding cache) and an empty chat
+    request, which loads the model without generating. Both carry the
+    chain's keep-alive and the chat one its context window, so the first
+    real query finds the models resident. Returns {"embed": s, "chat": s}.
+    """
+    from .metrics import MODEL_LOAD, metrics
+
+    timings = {}
+    embedding = getattr(chain.embedding, "embedding", chain.embedding)  # unwrap CachedEmbeddings
+    if embedding is not None:
+        started = time.perf_counter()
+        try:
+            embedding.embed_query("warm-up")
+        except Exception as e:
+            log(f"[SYS]: Embedding model warm-up failed: {e}")
+        else:
+            timings["embed"] = time.perf_counter() - started
+    started = time.perf_counter()
+    try:
+        chain.llm.invoke([])
+    except Exception as e:
+        log(f"[SYS]: Chat model warm-up failed: {e}")
+    else:
+        timings["chat"] = time.perf_counter() - started
+    for seconds in timings.values():
+        metrics.observe(MODEL_LOAD, seconds)
+    names = {"embed": getattr(embedding, "model", "embedding"), "chat": chain.llm.model}
+    detail = ", ".join(f"{names[kind]} {seconds:.2f}s ({'cold' if seconds >= COLD_LOAD_S else 'warm'})"
+                       for kind, seconds in timings.items())
+    if detail:
+        log(f"[SYS]: Models warmed up: {detail}, keep-alive {chain.llm.keep_alive or 'server default'}")
+    return timings
+
+
+def start_model_warmup(chain, log=print) -> threading.Thread:
+    """Run `warm_models` on a daemon thread; `log` must be safe to call from it."""
+    thread = threading.Thread(target=warm_models, args=(chain,), kwargs={"log": log},
+                              name="model-warmup", daemon=True)
+    thread.start()
+    return thread
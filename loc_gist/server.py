@@ -0,0 +1,265 @@
+import asyncio
+import json
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+
+from loc_gist.rag.api import SETTING_TYPES, chain_dbs, stream_rag, answer_rag, list_dbs
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+# Requests generating at once (the local model serves one well) and requests allowed to wait
+MAX_CONCURRENCY = 1
+MAX_QUEUE = 16
+MAX_WARM_CHAINS = 8
+MAX_BODY_BYTES = 1 << 20
+
+
+class HttpError(Exception):
+    def __init__(self, status: HTTPStatus, message: str, headers: dict | None = None):
+        super().__init__(message)
+        self.status = status
+        self.headers = headers or {}
+
+
+class QueryServer:
+    """Small asyncio HTTP/1.1 server answering questions against local knowledge bases.
+
+    Chains (and through the resource registry, vector stores and the pooled
+    Ollama clients) stay warm between requests. At most `max_concurrency`
+    queries run at once; up to `max_queue` more wait and the rest get a 503.
+
+    Endpoints: GET /health, GET /dbs, POST /query with a JSON body
+    {"db", "question", "stream": bool, plus optional settings}; "db" may be a
+    list of databases to search together. Streaming
+    answers are sent as server-sent events over a chunked response.
+    """
+
+    def __init__(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, settings: dict | None = None,
+                 max_concurrency: int = MAX_CONCURRENCY, max_queue: int = MAX_QUEUE):
+        self.host = host
+        self.port = port
+        self.settings = dict(settings or {})
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_queue = max(0, max_queue)
+        self._slots = None
+        self._running = 0
+        self._waiting = 0
+        self._chains = OrderedDict()
+        self._chains_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency + 2, thread_name_prefix="query")
+
+    # -- lifecycle -----------------------------------------------------------
+    async def serve_forever(self):
+        self._slots = asyncio.Semaphore(self.max_concurrency)
+        server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        print(f"LocGist server listening on http://{self.host}:{self.port} "
+              f"(concurrency {self.max_concurrency}, queue {self.max_queue})")
+        async with server:
+            await server.serve_forever()
+
+    def run(self):
+        try:
+            asyncio.run(self.serve_forever())
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+    # -- chains --------------------------------------------------------------
+    def _get_chain(self, db_names: tuple, overrides: dict):
+        settings = {**self.settings, **overrides}
+        key = (db_names, tuple(sorted(settings.items())))
+        with self._chains_lock:
+            chain = self._chains.get(key)
+            if chain is not None:
+                self._chains.move_to_end(key)
+                return chain
+        # Built without the lock so a slow build doesn't hold up requests for warm chains;
+        # two requests racing for the same new chain may both build it, and the first one wins
+        chain, status = chain_dbs(db_names, settings=settings)
+        if chain is None:
+            raise HttpError(HTTPStatus.NOT_FOUND, f"{', '.join(db_names)}: {status}")
+        with self._chains_lock:
+            chain = self._chains.setdefault(key, chain)
+            self._chains.move_to_end(key)
+            while len(self._chains) > MAX_WARM_CHAINS:
+                self._chains.popitem(last=False)
+            return chain
+
+    # -- HTTP ----------------------------------------------------------------
+    async def _handle_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    request = await self._read_request(reader)
+                except HttpError as e:
+                    await self._send_json(writer, e.status, {"error": str(e)}, keep_alive=False)
+                    break
+                if request is None:
+                    break
+                method, path, headers, body = request
+                keep_alive = headers.get("connection", "").lower() != "close"
+                try:
+                    await self._dispatch(writer, method, path, body, keep_alive)
+                except HttpError as e:
+                    await self._send_json(writer, e.status, {"error": str(e)}, keep_alive, e.headers)
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    break
+                except Exception as e:
+                    await self._send_json(writer, HTTPStatus.INTERNAL_SERVER_ERROR, {"error": str(e)}, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _read_request(reader):
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+        except asyncio.IncompleteReadError:
+            return None
+        except asyncio.LimitOverrunError:
+            raise HttpError(HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE, "Headers too large")
+        lines = head.decode("latin-1").split("\r\n")
+        try:
+            method, path, _ = lines[0].split(" ", 2)
+        except ValueError:
+            raise HttpError(HTTPStatus.BAD_REQUEST, "Malformed request line")
+        headers = {}
+        for line in lines[1:]:
+            if ":" in line:
+                name, value = line.split(":", 1)
+                headers[name.strip().lower()] = value.strip()
+        length = int(headers.get("content-length") or 0)
+        if length > MAX_BODY_BYTES:
+            raise HttpError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "Body too large")
+        body = await reader.readexactly(length) if length else b""
+        return method.upper(), path.split("?", 1)[0], headers, body
+
+    async def _dispatch(self, writer, method, path, body, keep_alive):
+        if method == "GET" and path == "/health":
+            await self._send_json(writer, HTTPStatus.OK, {
+                "status": "ok", "running": self._running, "waiting": self._waiting,
+            }, keep_alive)
+        elif method == "GET" and path == "/dbs":
+            await self._send_json(writer, HTTPStatus.OK, {"dbs": list_dbs()}, keep_alive)
+        elif method == "POST" and path == "/query":
+            try:
+                payload = json.loads(body or b"{}")
+                db_names, question = payload["db"], payload["question"]
+                db_names = (db_names,) if isinstance(db_names, str) else tuple(str(name) for name in db_names)
+            except (ValueError, KeyError, TypeError):
+                raise HttpError(HTTPStatus.BAD_REQUEST, 'Expected JSON body with "db" and "question"')
+            await self._query(writer, db_names, question, payload, _request_settings(payload), keep_alive)
+        else:
+            raise HttpError(HTTPStatus.NOT_FOUND, f"No route for {method} {path}")
+
+    async def _query(self, writer, db_names, question, payload, overrides, keep_alive):
+        if self._slots.locked() and self._waiting >= self.max_queue:
+            raise HttpError(HTTPStatus.SERVICE_UNAVAILABLE, "Server busy, try again later", {"Retry-After": "5"})
+        queued_at = time.perf_counter()
+        self._waiting += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self._waiting -= 1
+        self._running += 1
+        try:
+            queue_wait = time.perf_counter() - queued_at
+            loop = asyncio.get_running_loop()
+            chain = await loop.run_in_executor(self._executor, self._get_chain, db_names, overrides)
+            if payload.get("stream"):
+                await self._stream_answer(writer, chain, question, queue_wait, keep_alive)
+            else:
+                result = await loop.run_in_executor(self._executor, answer_rag, chain, question)
+                result["timings"]["queue_wait_s"] = queue_wait
+                await self._send_json(writer, HTTPStatus.OK, result, keep_alive)
+        finally:
+            self._running -= 1
+            self._slots.release()
+
+    async def _stream_answer(self, writer, chain, question, queue_wait, keep_alive):
+        loop = asyncio.get_running_loop()
+        events = asyncio.Queue()
+        stop = threading.Event()
+
+        def produce():
+            try:
+                stream = stream_rag(chain, question, cancel_event=stop)
+                for kind, text in stream:
+                    loop.call_soon_threadsafe(events.put_nowait, (kind, {"text": text}))
+                loop.call_soon_threadsafe(events.put_nowait, ("done", {
+                    "first_token_s": stream.first_token_s, "first_answer_s": stream.first_answer_s,
+                    "total_s": stream.total_s, "queue_wait_s": queue_wait, "note": stream.note,
+                }))
+            except Exception as e:
+                loop.call_soon_threadsafe(events.put_nowait, ("error", {"error": str(e)}))
+
+        writer.write(_head(HTTPStatus.OK, {
+            "Content-Type": "text/event-stream",
+            "Cache-Control": "no-cache",
+            "Transfer-Encoding": "chunked",
+            "Connection": "keep-alive" if keep_alive else "close",
+        }))
+        producer = loop.run_in_executor(self._executor, produce)
+        try:
+            while True:
+                event, data = await events.get()
+                _write_chunk(writer, f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n".encode("utf-8"))
+                await writer.drain()
+                if event in ("done", "error"):
+                    break
+            _write_chunk(writer, b"")
+            await writer.drain()
+        finally:
+            # Client went away (or we finished): let the producer stop generating
+            stop.set()
+            await producer
+
+    @staticmethod
+    async def _send_json(writer, status, payload, keep_alive=True, headers=None):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        writer.write(_head(status, {
+            "Content-Type": "application/json",
+            "Content-Length": str(len(body)),
+            "Connection": "keep-alive" if keep_alive else "close",
+            **(headers or {}),
+        }) + body)
+        await writer.drain()
+
+
+def _request_settings(payload: dict) -> dict:
+    """The request's chain settings (SETTING_TYPES), coerced to their types; None keeps the server's
+    value and anything that doesn't fit is a 400."""
+    settings = {}
+    for key, types in SETTING_TYPES.items():
+        value = payload.get(key)
+        if value is not None:
+            settings[key] = _coerce(key, value, types if isinstance(types, tuple) else (types,))
+    return settings
+
+
+def _coerce(key, value, types):
+    if not isinstance(value, bool) and isinstance(value, (str, int, float)):
+        for kind in types:
+            if kind is int and isinstance(value, float) and not value.is_integer():
+                continue
+            try:
+                return kind(value)
+            except ValueError:
+                continue
+    raise HttpError(HTTPStatus.BAD_REQUEST, f'Setting "{key}" must be {" or ".join(t.__name__ for t in types)}')
+
+
+def _head(status: HTTPStatus, headers: dict) -> bytes:
+    lines = [f"HTTP/1.1 {status.value} {status.phrase}"] + [f"{k}: {v}" for k, v in headers.items()]
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+
+def _write_chunk(writer, data: bytes):
+    writer.write(f"{len(data):X}\r\n".encode("ascii") + data + b"\r\n")
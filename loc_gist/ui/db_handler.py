@@ -1,18 +1,44 @@
+import os
+import threading
 from tkinter import filedialog
 
-from loc_gist.rag.api import chain_db, index_db
-from loc_gist.rag.db_helper import get_all_dbs
+from loc_gist.rag.catalog import catalog_version, load_catalog
+from loc_gist.rag.warmup import start_model_warmup
+from .index_queue import IndexQueue
+from .query_queue import QueryQueue
+
+# catalog_version() is None while there is no catalog.json yet, so "not loaded" needs its own marker
+_UNLOADED = object()
 
 class DbHandler:
     def __init__(self):
         self.chain = None
         self.active_db = None
+        self.extra_dbs = []  # searched together with active_db
         self.list = []
+        self.catalog = {}
+        self.catalog_version = _UNLOADED  # mtime of catalog.json the list was read from
         self.settings_provider = None
+        self.indexer = None
+        self.queries = None
+        self.log = print
+        self.on_chain = None
+        self.loading = False  # a chain for the current selection is being built
+        self._build_id = 0
+        self._warm_up = False
 
     def set_settings_provider(self, provider):
         self.settings_provider = provider
 
+    def set_logger(self, log):
+        """`log(msg)` receives background messages; it is called off the Tk thread."""
+        self.log = log
+
+    def set_chain_callback(self, on_chain):
+        """`on_chain(build_id, chain, status)` is called off the Tk thread once a chain is built;
+        pass its arguments to `install_chain` on the Tk thread. Without it, chains are built inline."""
+        self.on_chain = on_chain
+
     def _get_settings(self):
         try:
             if callable(self.settings_provider):
@@ -25,28 +51,151 @@ class DbHandler:
         if self.active_db == db_name:
             return False
 
-        settings = self._get_settings()
-        self.chain, status = chain_db(db_name, settings=settings)
-
         self.active_db = db_name
+        if db_name in self.extra_dbs:
+            self.extra_dbs.remove(db_name)
+        # Load the models once it is built, so the first question doesn't pay for it
+        self._build_chain(warm_up=True)
+        return True
+
+    def set_searched(self, db_name: str, searched: bool):
+        """Include or exclude a database from the search alongside the active one."""
+        if db_name == self.active_db:
+            return False
+        if searched and db_name not in self.extra_dbs:
+            self.extra_dbs.append(db_name)
+        elif not searched and db_name in self.extra_dbs:
+            self.extra_dbs.remove(db_name)
+        else:
+            return False
+        if self.active_db is None:
+            # The first checked database becomes the active one
+            return self.activate(self.extra_dbs[0])
+        self._build_chain()
         return True
 
+    @property
+    def selected_dbs(self):
+        return ([self.active_db] if self.active_db else []) + self.extra_dbs
+
+    def selection_label(self):
+        if not self.active_db:
+            return "NONE"
+        return self.active_db + (f" (+{len(self.extra_dbs)})" if self.extra_dbs else "")
+
+    def _build_chain(self, warm_up: bool = False):
+        """Build the chain for the current selection on a worker thread (see `set_chain_callback`)."""
+        self._build_id += 1
+        build_id, db_names, settings = self._build_id, self.selected_dbs, self._get_settings()
+        # A warm-up asked for by a build this one replaces still happens
+        self._warm_up = warm_up or (self.loading and self._warm_up)
+        # Questions must not go to the previous selection while the new one loads
+        self.chain = None
+        self.loading = True
+        if self.on_chain is None:
+            self.install_chain(build_id, *self._chain_for(db_names, settings))
+            return
+        threading.Thread(target=lambda: self.on_chain(build_id, *self._chain_for(db_names, settings)),
+                         name="chain-builder", daemon=True).start()
+
+    @staticmethod
+    def _chain_for(db_names, settings):
+        from loc_gist.rag.api import chain_dbs
+        try:
+            return chain_dbs(db_names, settings=settings)
+        except Exception as e:
+            return None, f"Could not load {', '.join(db_names)}: {e}"
+
+    def install_chain(self, build_id: int, chain, status) -> bool:
+        """Make a built chain the active one; False if the selection changed since it was started."""
+        if build_id != self._build_id:
+            return False
+        self.chain = chain
+        self.loading = False
+        if chain is None:
+            # e.g. a database built with another embedding model
+            self.log(f"[ERROR]: {status}")
+        elif self._warm_up:
+            start_model_warmup(chain, log=self.log)
+        return True
+
+    def apply_settings(self):
+        """Rebind the active chain to the current settings; returns a status message."""
+        if self.chain is None:
+            return None
+        from loc_gist.rag.api import configure_chain_db
+        _, status = configure_chain_db(self.chain, settings=self._get_settings())
+        return status
+
+    def start_indexer(self, on_progress=None, on_log=None, on_done=None):
+        """Create the background queue that runs indexing jobs."""
+        self.indexer = IndexQueue(on_progress=on_progress, on_log=on_log, on_done=on_done)
+
+    def start_scheduler(self, on_start=None, on_piece=None, on_done=None, on_log=None):
+        """Create the background queue that answers questions one at a time."""
+        self.queries = QueryQueue(on_start=on_start, on_piece=on_piece, on_done=on_done, on_log=on_log)
+
+    def ask(self, question: str, conversation=None, supersede: bool = False):
+        """Queue a question for the active chain; returns the job, or None if too many are waiting."""
+        return self.queries.submit(question, self.get_chain(), conversation=conversation, supersede=supersede)
+
+    def stop_query(self):
+        """Stop the answer being generated; queued questions still run."""
+        if self.queries is not None:
+            self.queries.cancel_current()
+
     def create_db(self):
-        path = filedialog.askopenfilename()
-        if not path:  # User cancelled the file dialog
+        paths = filedialog.askopenfilenames(filetypes=[("PDF files", "*.pdf")])
+        if not paths:  # User cancelled the file dialog
             return False, "No file selected"
-        if not path.endswith(".pdf"):
+        pdfs = [p for p in paths if p.lower().endswith(".pdf")]
+        if not pdfs:
             return False, "Unsupported file type. Please select a PDF file."
-        db_name = path.split("/")[-1].split(".")[0]
-        db_path = index_db(path, db_name)
-        return True, f"Indexed {db_name} at {db_path}"
+        settings = self._get_settings()
+        for path in pdfs:
+            db_name = os.path.splitext(os.path.basename(path))[0]
+            self.indexer.submit(path, db_name, settings=settings)
+        return True, f"Queued {len(pdfs)} file(s) for indexing"
+
+    def add_files(self):
+        """Queue pdfs to be added to the active database."""
+        if not self.active_db:
+            return False, "Select a database to add files to."
+        paths = filedialog.askopenfilenames(filetypes=[("PDF files", "*.pdf")])
+        pdfs = [p for p in paths if p.lower().endswith(".pdf")]
+        if not pdfs:
+            return False, "No file selected"
+        self.indexer.submit(pdfs, self.active_db, settings=self._get_settings(), mode="add")
+        return True, f"Queued {len(pdfs)} file(s) for '{self.active_db}'"
+
+    def sync_folder(self):
+        """Queue a re-sync of a folder of pdfs into the active (or a new) database."""
+        folder = filedialog.askdirectory()
+        if not folder:
+            return False, "No folder selected"
+        db_name = self.active_db or os.path.basename(os.path.normpath(folder))
+        self.indexer.submit(folder, db_name, settings=self._get_settings(), mode="sync")
+        return True, f"Queued sync of {folder} into '{db_name}'"
+
+    def cancel_indexing(self):
+        if self.indexer is not None:
+            self.indexer.cancel_current()
 
     def get_chain(self):
         if self.chain is None:
             raise ValueError("No active database selected.")
         return self.chain
 
-    def get_dbs(self):
-        if not self.list:
-            self.list = get_all_dbs()
+    def invalidate_dbs(self):
+        self.catalog_version = _UNLOADED
+
+    def catalog_changed(self) -> bool:
+        """True if catalog.json was rewritten (e.g. by an index job or the CLI) since the list was read."""
+        return catalog_version() != self.catalog_version
+
+    def get_dbs(self, rescan: bool = False):
+        if rescan or self.catalog_changed():
+            self.catalog = load_catalog(rescan)
+            self.catalog_version = catalog_version()
+            self.list = sorted(self.catalog)
         return self.list
@@ -0,0 +1,119 @@
+import queue
+import threading
+import time
+
+from loc_gist.rag.progress import IndexCancelled, Progress
+
+
+class IndexJob:
+    """A single queued indexing request.
+
+    `mode` is "create" (new database from one pdf), "add" (list of pdfs into an
+    existing database) or "sync" (re-sync a database with a folder).
+    """
+
+    def __init__(self, source, db_name: str, settings: dict | None = None, mode: str = "create"):
+        self.source = source
+        self.db_name = db_name
+        self.mode = mode
+        self.settings = dict(settings or {})
+        self.cancel_event = threading.Event()
+        self.state = "QUEUED"
+
+    def cancel(self):
+        self.cancel_event.set()
+        if self.state == "QUEUED":
+            self.state = "CANCELLED"
+
+
+class IndexQueue:
+    """Runs indexing jobs one at a time on a background thread.
+
+    Callbacks are invoked from the worker thread; the owner is responsible for
+    marshalling them onto the Tk loop (e.g. with `after`).
+    """
+
+    def __init__(self, on_progress=None, on_log=None, on_done=None):
+        self.on_progress = on_progress
+        self.on_log = on_log
+        self.on_done = on_done
+        self._jobs = queue.Queue()
+        self._lock = threading.Lock()
+        self._pending = []
+        self.current = None
+        self._worker = threading.Thread(target=self._run, daemon=True)
+        self._worker.start()
+
+    def submit(self, source, db_name: str, settings: dict | None = None, mode: str = "create") -> IndexJob:
+        job = IndexJob(source, db_name, settings, mode)
+        with self._lock:
+            self._pending.append(job)
+        self._jobs.put(job)
+        self._log(f"[SYS]: Queued '{db_name}' for indexing ({self.pending_count()} waiting).")
+        return job
+
+    def pending_count(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def cancel_current(self):
+        job = self.current
+        if job is not None:
+            job.cancel()
+
+    def cancel_all(self):
+        with self._lock:
+            for job in self._pending:
+                job.cancel()
+        self.cancel_current()
+
+    def _log(self, msg):
+        if self.on_log:
+            self.on_log(msg)
+
+    def _run(self):
+        while True:
+            job = self._jobs.get()
+            with self._lock:
+                if job in self._pending:
+                    self._pending.remove(job)
+            if job.state == "CANCELLED":
+                self._log(f"[SYS]: Skipped cancelled job '{job.db_name}'.")
+                continue
+            self.current = job
+            job.state = "RUNNING"
+            progress = Progress(
+                callback=lambda stage, done, total, job=job: self.on_progress and self.on_progress(job, stage, done, total),
+                log=self._log,
+                cancel_event=job.cancel_event,
+            )
+            started = time.perf_counter()
+            try:
+                self._log(f"[SYS]: Indexing '{job.db_name}' ({job.mode}) from {job.source}")
+                message = self._execute(job, progress)
+                job.state = "DONE"
+                message = f"{message} in {time.perf_counter() - started:.1f}s"
+            except IndexCancelled:
+                job.state = "CANCELLED"
+                message = f"[SYS]: Indexing of '{job.db_name}' cancelled."
+            except Exception as e:
+                job.state = "ERROR"
+                message = f"[ERROR]: Indexing '{job.db_name}' failed: {e}"
+            finally:
+                self.current = None
+            if self.on_done:
+                self.on_done(job, message)
+
+    @staticmethod
+    def _execute(job, progress):
+        # Imported on the worker thread so the GUI starts without the RAG stack
+        from loc_gist.rag.api import index_db, add_to_db, sync_db
+
+        if job.mode == "add":
+            _, message = add_to_db(job.source, job.db_name, progress=progress, settings=job.settings)
+            return message
+        if job.mode == "sync":
+            _, message = sync_db(job.source, job.db_name, progress=progress, settings=job.settings)
+            return message
+        result = index_db(job.source, job.db_name, progress=progress, settings=job.settings)
+        return f"Indexed {job.db_name} at {result}"
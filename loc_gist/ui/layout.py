@@ -1,9 +1,15 @@
 import tkinter as tk
+from tkinter import filedialog
 import ttkbootstrap as ttk
 from ttkbootstrap.constants import *
 from ttkbootstrap.scrolled import ScrolledText
+from collections import deque
 from datetime import datetime
 
+from loc_gist.rag.metrics import BUCKETS, metrics
+from .scrollback import CHAT_MAX_LINES, LOG_MAX_LINES, Scrollback, at_bottom, history_path
+from .stream_buffer import MAX_REFRESH_HZ
+
 from typing import TYPE_CHECKING
 
 if TYPE_CHECKING:
@@ -33,19 +39,17 @@ class TabWindow(ttk.Notebook):
         super().__init__(parent, **kwargs)
 
         self.window = window
-        self.chat_tab = ChatBox(parent=self, window=window)
-        self.log_tab = LogBox(parent=self)
-        self.project_tab = ttk.Frame(self)
+        settings = getattr(window, "settings", {}) or {}
+        self.chat_tab = ChatBox(parent=self, window=window, max_lines=settings.get("chat_max_lines", CHAT_MAX_LINES),
+                                spill_path=history_path("chat"))
+        self.log_tab = LogBox(parent=self, max_lines=settings.get("log_max_lines", LOG_MAX_LINES),
+                              spill_path=history_path("log"))
+        self.project_tab = MetricsView(parent=self)
 
         self.add(self.chat_tab, text="Smart Search")
         self.add(self.log_tab, text="AI Logs")
         self.add(self.project_tab, text="Project Details")
 
-        self._populate_tabs()
-
-    def _populate_tabs(self):
-        ttk.Label(self.project_tab, text="Project view").pack(padx=10, pady=10)
-
 class StatusBar(ttk.Labelframe):
     def __init__(self, parent=None):
         super().__init__(parent, text="Status")
@@ -55,10 +59,36 @@ class StatusBar(ttk.Labelframe):
         self.status_label = ttk.Label(self, textvariable=self.status_var)
         self.status_label.pack(side=tk.LEFT, padx=10, pady=5)
         self.progress = ttk.Progressbar(self, mode="indeterminate", bootstyle="secondary")
+        # Indexing job progress (determinate) with a cancel button
+        self.job_var = tk.StringVar(value="")
+        self.job_label = ttk.Label(self, textvariable=self.job_var)
+        self.job_progress = ttk.Progressbar(self, mode="determinate", bootstyle="info", length=160)
+        self.cancel_btn = ttk.Button(self, text="Cancel", bootstyle="danger-outline")
+
+    def show_job(self, text, done=0, total=None, on_cancel=None):
+        self.job_var.set(text)
+        if not self.job_label.winfo_ismapped():
+            self.job_label.pack(side=tk.LEFT, padx=6)
+            self.job_progress.pack(side=tk.LEFT, padx=6)
+            self.cancel_btn.pack(side=tk.RIGHT, padx=6)
+        if on_cancel is not None:
+            self.cancel_btn.config(command=on_cancel)
+        if total:
+            self.job_progress.stop()
+            self.job_progress.config(mode="determinate", maximum=total, value=done)
+        elif str(self.job_progress.cget("mode")) != "indeterminate":
+            self.job_progress.config(mode="indeterminate")
+            self.job_progress.start(10)
+
+    def hide_job(self):
+        self.job_progress.stop()
+        for widget in (self.job_label, self.job_progress, self.cancel_btn):
+            if widget.winfo_ismapped():
+                widget.pack_forget()
 
     def update(self, status, db_name=None):
         self.status_var.set(str(status))
-        busy = str(status).upper() in {"THINKING", "PROCESSING", "WORKING", "BUSY"}
+        busy = str(status).upper() in {"THINKING", "PROCESSING", "WORKING", "BUSY", "LOADING"}
         if busy:
             if not self.progress.winfo_ismapped():
                 self.progress.pack(side=tk.LEFT, padx=6)
@@ -75,7 +105,14 @@ class StatusBar(ttk.Labelframe):
                 self.progress.pack_forget()
 
 class LogBox(ttk.Frame):
-    def __init__(self, parent=None):
+    """Log view fed through a queue, so any thread may write to it.
+
+    Queued lines are inserted in one batch per tick (at most MAX_REFRESH_HZ a
+    second) and the widget keeps only `max_lines`; older lines are appended to
+    `spill_path`.
+    """
+
+    def __init__(self, parent=None, max_lines: int | None = LOG_MAX_LINES, spill_path: str | None = None):
         super().__init__(parent)
         self.text_box = ScrolledText(self, wrap=tk.WORD, font=("Courier Mono", 10), state=tk.DISABLED)
         self.text_box.pack(expand=True, fill=tk.BOTH, padx=10, pady=10)
@@ -84,31 +121,134 @@ class LogBox(ttk.Frame):
         self.text_box.text.tag_configure("sys", foreground="#0d6efd")
         self.text_box.text.tag_configure("warn", foreground="#fd7e14")
         self.text_box.text.tag_configure("error", foreground="#dc3545", underline=True)
+        self.scrollback = Scrollback(self.text_box.text, max_lines, spill_path)
+        self.interval_ms = max(1, int(1000 / MAX_REFRESH_HZ))
+        self._pending = deque()  # (timestamp or None for raw text, text); deque appends are thread-safe
+        self.after(self.interval_ms, self._drain)
 
     def write(self, msg):
-        now = datetime.now().strftime("%H:%M:%S")
-        level_tag = None
-        upper = str(msg).upper()
-        if upper.startswith("[SYS]"):
-            level_tag = "sys"
-        elif "WARN" in upper or "WARNING" in upper:
-            level_tag = "warn"
-        elif "ERR" in upper or "ERROR" in upper:
-            level_tag = "error"
-        # enable
-        self.text_box.text.config(state=tk.NORMAL)
-        # time
-        self.text_box.text.insert(tk.END, f"[{now}] ", ("time",))
-        # body
-        if level_tag:
-            self.text_box.text.insert(tk.END, f"{msg}\n", (level_tag,))
-        else:
-            self.text_box.text.insert(tk.END, f"{msg}\n")
-        self.text_box.text.see(tk.END)
-        self.text_box.text.config(state=tk.DISABLED)
+        """Queue a timestamped log line; safe to call from any thread."""
+        self._pending.append((datetime.now().strftime("%H:%M:%S"), str(msg)))
+
+    def append(self, text):
+        """Queue raw text (no timestamp), e.g. streamed model thoughts."""
+        self._pending.append((None, text))
+
+    def _drain(self):
+        if self._pending:
+            text = self.text_box.text
+            follow = at_bottom(text)
+            text.config(state=tk.NORMAL)
+            while self._pending:
+                now, msg = self._pending.popleft()
+                if now is None:
+                    text.insert(tk.END, msg)
+                    continue
+                text.insert(tk.END, f"[{now}] ", ("time",))
+                level_tag = _level_tag(msg)
+                text.insert(tk.END, f"{msg}\n", (level_tag,) if level_tag else ())
+            self.scrollback.trim()
+            if follow:
+                text.see(tk.END)
+            text.config(state=tk.DISABLED)
+        self.after(self.interval_ms, self._drain)
+
+
+def _level_tag(msg):
+    upper = msg.upper()
+    if upper.startswith("[SYS]"):
+        return "sys"
+    if "WARN" in upper or "WARNING" in upper:
+        return "warn"
+    if "ERR" in upper or "ERROR" in upper:
+        return "error"
+    return None
+
+
+class MetricsView(ttk.Frame):
+    """Live per-stage latency table (rolling percentiles + histogram) and counters."""
+
+    REFRESH_MS = 1000
+    BARS = "▁▂▃▄▅▆▇█"
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        columns = ("count", "last", "p50", "p95", "max", "histogram")
+        self.table = ttk.Treeview(self, columns=columns, show="tree headings", height=10)
+        self.table.heading("#0", text="Stage", anchor=tk.W)
+        self.table.column("#0", width=180)
+        for col in columns:
+            self.table.heading(col, text=col.title(), anchor=tk.W)
+            self.table.column(col, width=160 if col == "histogram" else 70, anchor=tk.W)
+        self.table.pack(expand=True, fill=tk.BOTH, padx=10, pady=(10, 4))
+
+        self.counters_var = tk.StringVar(value="No activity yet")
+        ttk.Label(self, textvariable=self.counters_var, wraplength=700, justify=tk.LEFT).pack(fill=tk.X, padx=10)
+
+        btns = ttk.Frame(self)
+        btns.pack(fill=tk.X, padx=10, pady=(4, 10))
+        ttk.Button(btns, text="Export", bootstyle="secondary-outline", command=self.export).pack(side=tk.RIGHT)
+        ttk.Button(btns, text="Reset", bootstyle="secondary-outline", command=self.reset).pack(side=tk.RIGHT, padx=6)
+
+        self.after(self.REFRESH_MS, self.refresh)
+
+    def refresh(self):
+        # Only redraw while the tab is visible; the registry keeps collecting regardless
+        if self.winfo_ismapped():
+            self.render(metrics.snapshot())
+        self.after(self.REFRESH_MS, self.refresh)
+
+    def render(self, snapshot):
+        timings = snapshot["timings"]
+        for name in sorted(timings):
+            stats = timings[name]
+            rate = name.endswith("_per_s")
+            fmt = (lambda v: f"{v:.1f}") if rate else _format_seconds
+            values = (stats["count"], fmt(stats["last"]), fmt(stats["p50"]), fmt(stats["p95"]),
+                      fmt(stats["max"]), "" if rate else self._sparkline(stats["histogram"]))
+            if self.table.exists(name):
+                self.table.item(name, values=values)
+            else:
+                self.table.insert("", tk.END, iid=name, text=name, values=values)
+        counters = snapshot["counters"]
+        if counters:
+            self.counters_var.set("   ".join(f"{k}: {v}" for k, v in sorted(counters.items())))
+
+    def _sparkline(self, histogram):
+        # Trim empty buckets at both ends so the shape stays readable
+        used = [i for i, c in enumerate(histogram) if c]
+        if not used:
+            return ""
+        counts = histogram[used[0]:used[-1] + 1]
+        peak = max(counts)
+        bars = "".join(self.BARS[round(c / peak * (len(self.BARS) - 1))] if c else " " for c in counts)
+        top = used[-1]
+        bound = f"≤{_format_seconds(BUCKETS[top])}" if top < len(BUCKETS) else f">{_format_seconds(BUCKETS[-1])}"
+        return f"{bars}  ({bound})"
+
+    def reset(self):
+        metrics.reset()
+        for item in self.table.get_children():
+            self.table.delete(item)
+        self.counters_var.set("No activity yet")
+
+    def export(self):
+        path = filedialog.asksaveasfilename(
+            title="Export metrics", defaultextension=".json", filetypes=[("JSON", "*.json")],
+            initialfile=f"locgist-metrics-{datetime.now():%Y%m%d-%H%M%S}.json",
+        )
+        if path:
+            metrics.export(path)
+            self.counters_var.set(f"Metrics exported to {path}")
+
+
+def _format_seconds(value):
+    return f"{value * 1000:.0f}ms" if value < 1 else f"{value:.2f}s"
+
 
 class ChatBox(ttk.Frame):
-    def __init__(self, window: "Window", parent=None):
+    def __init__(self, window: "Window", parent=None, max_lines: int | None = CHAT_MAX_LINES,
+                 spill_path: str | None = None):
         super().__init__(parent)
         self.window = window
 
@@ -120,7 +260,7 @@ class ChatBox(ttk.Frame):
         self.text_box.text.tag_configure("user_msg", lmargin1=40, lmargin2=40, rmargin=10, spacing3=6, justify="right")
         self.text_box.text.tag_configure("bot_msg", lmargin1=10, lmargin2=10, rmargin=40, spacing3=6, justify="left")
         self.text_box.text.tag_configure("time", foreground="#6c757d", font=("Helvetica", 8))
-
+        self.scrollback = Scrollback(self.text_box.text, max_lines, spill_path)
 
         self.search_bar = ttk.Frame(self)
         self.search_bar.pack(side=tk.TOP, expand=True, fill=tk.X, padx=10)
@@ -133,31 +273,38 @@ class ChatBox(ttk.Frame):
         self.input.bind("<Return>", self.handle_input)
 
         self.button = ttk.Button(self.search_bar, text="Send", command=lambda: self.handle_input(None), bootstyle="primary")
-        self.button.pack(padx=10, pady=5, side=tk.LEFT)
+        self.button.pack(padx=(10, 0), pady=5, side=tk.LEFT)
+        self.stop_btn = ttk.Button(self.search_bar, text="Stop", bootstyle="danger-outline", state=tk.DISABLED,
+                                   command=self.window.stop_query)
+        self.stop_btn.pack(padx=10, pady=5, side=tk.LEFT)
+
+        # Conversation mode: follow-up questions see the earlier turns
+        self.conversation_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(self.search_bar, text="Conversation", variable=self.conversation_var,
+                        bootstyle="round-toggle").pack(padx=(0, 6), side=tk.LEFT)
+        self.new_chat_btn = ttk.Button(self.search_bar, text="New Chat", bootstyle="secondary-outline",
+                                       command=self.window.new_conversation)
+        self.new_chat_btn.pack(pady=5, side=tk.LEFT)
 
     def start_thinking(self):
-        # Disable user input while processing
+        # Input stays enabled: new questions queue behind the one being answered
         try:
-            self.input.config(state=tk.DISABLED)
-            self.button.config(state=tk.DISABLED)
+            self.stop_btn.config(state=tk.NORMAL)
         except Exception:
             pass
 
     def stop_thinking(self):
-        # Re-enable user input when done
         try:
-            self.input.config(state=tk.NORMAL)
-            self.button.config(state=tk.NORMAL)
+            self.stop_btn.config(state=tk.DISABLED)
             self.input.focus_set()
         except Exception:
             pass
 
     def handle_input(self, event):
+        # The question is shown when its answer starts, after any answers ahead of it
         msg = self.input.get().strip()
-        if msg:
-            self.write_user(msg)
+        if msg and self.window.handle_input(msg):
             self.input.delete(0, tk.END)
-            self.window.handle_input(msg)
 
     def write_user(self, msg: str):
         self._append_message("You", msg, is_user=True)
@@ -168,18 +315,39 @@ class ChatBox(ttk.Frame):
     def write(self, msg, tag="user"):
         self.write_user(msg) if tag == "user" else self.write_bot(msg)
 
-    def _append_message(self, sender: str, msg: str, is_user: bool):
+    def begin_bot(self):
+        """Start an assistant message whose body is streamed in with append_bot."""
+        self._append_message("Assistant", "", is_user=False, newline=False)
+
+    def append_bot(self, chunk: str):
+        text = self.text_box.text
+        follow = at_bottom(text)
+        text.config(state=tk.NORMAL)
+        text.insert(tk.END, chunk, ("bot_msg",))
+        self.scrollback.trim()
+        if follow:
+            text.see(tk.END)
+        text.config(state=tk.DISABLED)
+
+    def end_bot(self):
+        self.append_bot("\n")
+
+    def _append_message(self, sender: str, msg: str, is_user: bool, newline: bool = True):
         now = datetime.now().strftime("%H:%M")
         header_tag = "user_header" if is_user else "bot_header"
         body_tag = "user_msg" if is_user else "bot_msg"
         text = self.text_box.text
+        follow = is_user or at_bottom(text)
         text.config(state=tk.NORMAL)
         if text.index("end-1c") != "1.0":
             text.insert(tk.END, "\n")
         text.insert(tk.END, f"{sender} ", (header_tag,))
         text.insert(tk.END, f"[{now}]\n", ("time",))
-        text.insert(tk.END, f"{msg}\n", (body_tag,))
-        text.see(tk.END)
+        if msg or newline:
+            text.insert(tk.END, f"{msg}\n" if newline else msg, (body_tag,))
+        self.scrollback.trim()
+        if follow:
+            text.see(tk.END)
         text.config(state=tk.DISABLED)
 
 
@@ -196,10 +364,20 @@ class SettingsDialog(tk.Toplevel):
         temp = s.get("temperature", 0.2)
         topk = s.get("top_k", 4)
         maxtoks = s.get("max_tokens", 1024)
+        rerank = s.get("rerank_model") or ""
+        storage = s.get("vector_store", "chroma")
+        keep_alive = s.get("keep_alive", "30m")
+        chunk_tokens = s.get("chunk_tokens", 256)
+        supersede = bool(s.get("supersede_queries", False))
 
         self.var_temp = tk.DoubleVar(value=temp)
         self.var_topk = tk.IntVar(value=topk)
         self.var_maxtoks = tk.IntVar(value=maxtoks)
+        self.var_rerank = tk.StringVar(value=rerank)
+        self.var_storage = tk.StringVar(value=storage)
+        self.var_keep_alive = tk.StringVar(value=keep_alive)
+        self.var_chunk_tokens = tk.IntVar(value=chunk_tokens)
+        self.var_supersede = tk.BooleanVar(value=supersede)
 
         body = ttk.Frame(self, padding=12)
         body.pack(fill=tk.BOTH, expand=True)
@@ -210,6 +388,20 @@ class SettingsDialog(tk.Toplevel):
         ttk.Entry(body, textvariable=self.var_topk, width=10).grid(row=1, column=1, sticky=tk.W, pady=4)
         ttk.Label(body, text="Max Tokens").grid(row=2, column=0, sticky=tk.W, pady=4)
         ttk.Entry(body, textvariable=self.var_maxtoks, width=10).grid(row=2, column=1, sticky=tk.W, pady=4)
+        ttk.Label(body, text="Rerank Model").grid(row=3, column=0, sticky=tk.W, pady=4)
+        ttk.Entry(body, textvariable=self.var_rerank, width=24).grid(row=3, column=1, sticky=tk.W, pady=4)
+        ttk.Label(body, text="Blank = off, e.g. qwen3:0.6b", bootstyle="secondary").grid(row=4, column=1, sticky=tk.W)
+        ttk.Label(body, text="New KB Storage").grid(row=5, column=0, sticky=tk.W, pady=4)
+        ttk.Combobox(body, textvariable=self.var_storage, values=("chroma", "int8", "float16"),
+                     state="readonly", width=10).grid(row=5, column=1, sticky=tk.W, pady=4)
+        ttk.Label(body, text="Keep Models Loaded").grid(row=6, column=0, sticky=tk.W, pady=4)
+        ttk.Entry(body, textvariable=self.var_keep_alive, width=10).grid(row=6, column=1, sticky=tk.W, pady=4)
+        ttk.Label(body, text="e.g. 30m, 2h, -1 = forever", bootstyle="secondary").grid(row=7, column=1, sticky=tk.W)
+        ttk.Label(body, text="New KB Chunk Tokens").grid(row=8, column=0, sticky=tk.W, pady=4)
+        ttk.Entry(body, textvariable=self.var_chunk_tokens, width=10).grid(row=8, column=1, sticky=tk.W, pady=4)
+        ttk.Label(body, text="New Question Stops Current").grid(row=9, column=0, sticky=tk.W, pady=4)
+        ttk.Checkbutton(body, variable=self.var_supersede, bootstyle="round-toggle").grid(row=9, column=1, sticky=tk.W,
+                                                                                         pady=4)
 
         # Buttons
         btns = ttk.Frame(self, padding=(12, 0, 12, 12))
@@ -236,19 +428,38 @@ class SettingsDialog(tk.Toplevel):
         except Exception:
             maxtoks = 1024
 
-        payload = {"temperature": temp, "top_k": topk, "max_tokens": maxtoks}
+        rerank = self.var_rerank.get().strip() or None
+        keep_alive = self.var_keep_alive.get().strip() or "30m"
+        try:
+            chunk_tokens = max(64, int(self.var_chunk_tokens.get()))
+        except Exception:
+            chunk_tokens = 256
+
+        payload = {"temperature": temp, "top_k": topk, "max_tokens": maxtoks, "rerank_model": rerank,
+                   "vector_store": self.var_storage.get() or "chroma", "keep_alive": keep_alive,
+                   "chunk_tokens": chunk_tokens, "supersede_queries": bool(self.var_supersede.get())}
         if hasattr(self.window, "apply_settings"):
             self.window.apply_settings(payload)
         self.destroy()
 
 
 class Sidebar(ttk.Labelframe):
+    # How often the knowledge base catalog is checked for changes made elsewhere (e.g. the CLI)
+    POLL_MS = 2000
+
     def __init__(self, title: str, parent:Layout, window: "Window"):
         super().__init__(parent, width=250, text=title)
         self.window = window
         self.pack(side=tk.LEFT, fill=tk.Y)
         self.create_widgets()
         self.refresh_db_list()
+        self.after(self.POLL_MS, self._poll_catalog)
+
+    def _poll_catalog(self):
+        # A stat of catalog.json; the list is only rebuilt when it changed
+        if self.window.db_handler.catalog_changed():
+            self.refresh_db_list()
+        self.after(self.POLL_MS, self._poll_catalog)
 
     def create_widgets(self):
         self.active_var = tk.StringVar(value="NONE")
@@ -265,11 +476,15 @@ class Sidebar(ttk.Labelframe):
         self.db_group = ttk.Frame(self, bootstyle="secondary")
         self.db_group.pack(fill=tk.X, padx=10, pady=6)
 
-        refresh_btn = ttk.Button(self, text="Refresh", command=self.refresh_db_list)
+        refresh_btn = ttk.Button(self, text="Refresh", command=lambda: self.refresh_db_list(rescan=True))
         refresh_btn.pack(fill=tk.X, padx=10, pady=5)
         open_file_btn = ttk.Button(self, text="Open File", command=self.window.create_db)
 
         open_file_btn.pack(fill=tk.X, padx=10, pady=5)
+        add_files_btn = ttk.Button(self, text="Add Files", command=self.window.add_files)
+        add_files_btn.pack(fill=tk.X, padx=10, pady=5)
+        sync_btn = ttk.Button(self, text="Sync Folder", command=self.window.sync_folder)
+        sync_btn.pack(fill=tk.X, padx=10, pady=5)
 
         settings_btn = ttk.Button(self, text="Settings", bootstyle="secondary", command=self.open_settings)
         settings_btn.pack(fill=tk.X, padx=10, pady=(0, 10))
@@ -277,31 +492,53 @@ class Sidebar(ttk.Labelframe):
     def open_settings(self):
         SettingsDialog(self.window)
 
-    def refresh_db_list(self):
-        active = self.window.db_handler.active_db or "NONE"
-        self.active_var.set(active)
+    def refresh_db_list(self, rescan: bool = False):
+        handler = self.window.db_handler
+        self.active_var.set(handler.selection_label())
 
-        dbs = self.window.db_handler.get_dbs()
+        dbs = handler.get_dbs(rescan=rescan)
         for widget in self.db_group.winfo_children():
             widget.destroy()
+        self.search_vars = {}
         for db in dbs:
-            is_active = (db == self.window.db_handler.active_db)
+            is_active = (db == handler.active_db)
+            row = ttk.Frame(self.db_group)
+            row.pack(fill=tk.X, padx=(4, 10), pady=4)
+            # Checked databases are searched together with the active one
+            var = tk.BooleanVar(value=db in handler.selected_dbs)
+            self.search_vars[db] = var
+            ttk.Checkbutton(
+                row, variable=var, bootstyle="round-toggle",
+                command=lambda db=db: self.on_db_toggle(db),
+                state=(tk.DISABLED if is_active else tk.NORMAL),
+            ).pack(side=tk.LEFT)
             style = "success" if is_active else "primary-link"
             btn_text = f"{db} (Active)" if is_active else db
             btn = ttk.Button(
-                self.db_group,
+                row,
                 text=btn_text,
                 command=(lambda db=db: self.on_db_select(db)) if not is_active else None,
                 bootstyle=style,
                 state=(tk.DISABLED if is_active else tk.NORMAL),
             )
-            btn.pack(fill=tk.X, padx=10, pady=4)
+            btn.pack(side=tk.LEFT, fill=tk.X, expand=True)
+            entry = handler.catalog.get(db) or {}
+            if entry.get("chunks") is not None:
+                ttk.Label(row, text=f"{entry['chunks']} chunks, {entry.get('size_bytes', 0) / 2 ** 20:.1f} MB",
+                          bootstyle="secondary").pack(side=tk.LEFT, padx=(6, 0))
+
+    def on_db_toggle(self, db_name):
+        handler = self.window.db_handler
+        if handler.set_searched(db_name, self.search_vars[db_name].get()):
+            self.window.write_log(f"[SYS]: Searching {', '.join(handler.selected_dbs) or 'no databases'}.")
+            self.window.update_status(status="LOADING" if handler.loading else "OK", db_name=handler.selection_label())
+        self.refresh_db_list()
 
     def on_db_select(self, db_name):
         if not self.window.db_handler.activate(db_name):
             self.window.write_log(f"\n[SYS]: Database '{db_name}' already selected.\n")
             return
 
-        self.window.write_log(f"[SYS]: Connected to database '{db_name}'.")
-        self.window.update_status(status="OK", db_name=db_name)
+        self.window.write_log(f"[SYS]: Loading database '{db_name}'...")
+        self.window.update_status(status="LOADING", db_name=self.window.db_handler.selection_label())
         self.refresh_db_list()
@@ -0,0 +1,128 @@
+import queue
+import threading
+import time
+
+from loc_gist.rag.metrics import QUEUE_WAIT, incr, metrics
+
+# Questions allowed to wait behind the one being answered
+MAX_PENDING = 4
+
+
+class QueryJob:
+    """A question waiting for, or being answered by, the query worker."""
+
+    def __init__(self, question: str, chain, conversation=None):
+        self.question = question
+        self.chain = chain
+        self.conversation = conversation
+        self.cancel_event = threading.Event()
+        self.state = "QUEUED"
+        self.submitted_at = time.perf_counter()
+        self.queue_wait_s = None
+        self.stream = None
+
+    def cancel(self):
+        self.cancel_event.set()
+        if self.state == "QUEUED":
+            self.state = "CANCELLED"
+
+
+class QueryQueue:
+    """Answers questions one at a time on a background thread.
+
+    At most `max_pending` questions wait; `submit` refuses more. A running
+    answer is stopped with `cancel_current`, which aborts the request to
+    Ollama right away, even before the first token, and `submit(..., supersede=True)`
+    cancels everything before the new question. Callbacks are invoked from
+    the worker thread; the owner marshals them onto the Tk loop.
+    """
+
+    def __init__(self, on_start=None, on_piece=None, on_done=None, on_log=None, max_pending: int = MAX_PENDING):
+        self.on_start = on_start
+        self.on_piece = on_piece
+        self.on_done = on_done
+        self.on_log = on_log
+        self.max_pending = max(1, max_pending)
+        self._jobs = queue.Queue()
+        self._lock = threading.Lock()
+        self._pending = []
+        self.current = None
+        self._worker = threading.Thread(target=self._run, name="query-worker", daemon=True)
+        self._worker.start()
+
+    def submit(self, question: str, chain, conversation=None, supersede: bool = False) -> QueryJob | None:
+        """Queue a question; returns None if the queue is full."""
+        if supersede:
+            self.cancel_all()
+        with self._lock:
+            if len(self._pending) >= self.max_pending:
+                return None
+            job = QueryJob(question, chain, conversation)
+            self._pending.append(job)
+        self._jobs.put(job)
+        return job
+
+    def pending_count(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def busy(self) -> bool:
+        return self.current is not None or self.pending_count() > 0
+
+    def cancel_current(self):
+        job = self.current
+        if job is not None:
+            job.cancel()
+
+    def cancel_all(self):
+        with self._lock:
+            for job in self._pending:
+                job.cancel()
+            self._pending = []
+        self.cancel_current()
+
+    def _log(self, msg):
+        if self.on_log:
+            self.on_log(msg)
+
+    def _run(self):
+        while True:
+            job = self._jobs.get()
+            with self._lock:
+                if job in self._pending:
+                    self._pending.remove(job)
+            if job.state == "CANCELLED":
+                self._log(f"[SYS]: Skipped cancelled question '{job.question}'.")
+                continue
+            self.current = job
+            job.state = "RUNNING"
+            job.queue_wait_s = time.perf_counter() - job.submitted_at
+            metrics.observe(QUEUE_WAIT, job.queue_wait_s)
+            if self.on_start:
+                self.on_start(job)
+            try:
+                message = self._execute(job)
+            except Exception as e:
+                job.state = "ERROR"
+                message = f"[ERROR]: {e}"
+            finally:
+                self.current = None
+            if self.on_done:
+                self.on_done(job, message)
+
+    def _execute(self, job):
+        # Imported on the worker thread so the GUI starts without the RAG stack
+        from loc_gist.rag.api import stream_rag
+
+        job.stream = stream = stream_rag(job.chain, job.question, conversation=job.conversation,
+                                         cancel_event=job.cancel_event)
+        stream.queue_wait_s = job.queue_wait_s
+        for kind, text in stream:
+            if self.on_piece:
+                self.on_piece(job, kind, text)
+        if stream.cancelled:
+            job.state = "CANCELLED"
+            incr("query.cancelled")
+        else:
+            job.state = "DONE"
+        return f"[SYS]: Latency: {stream.summary()}"
@@ -0,0 +1,59 @@
+import os
+from datetime import datetime
+
+from loc_gist.rag.db_helper import get_cache_path
+
+# Lines kept in the log and chat widgets; older ones are moved to a history file
+LOG_MAX_LINES = 5000
+CHAT_MAX_LINES = 2000
+# Share of the limit trimmed at once, so a full widget isn't trimmed on every insert
+TRIM_SLACK = 0.1
+HISTORY_DIR = "history"
+
+
+def history_path(name: str, started: datetime | None = None) -> str:
+    """Spill file for one widget and session, e.g. .cache/history/log-20250101-120000.txt."""
+    started = started or datetime.now()
+    return os.path.join(get_cache_path(HISTORY_DIR), f"{name}-{started:%Y%m%d-%H%M%S}.txt")
+
+
+class Scrollback:
+    """Caps a Tk Text widget at `max_lines`, appending the lines it trims to `spill_path`.
+
+    The widget acts as a ring buffer: once it holds more than `max_lines`, the
+    oldest lines (plus TRIM_SLACK of the limit) are written out and deleted.
+    A `max_lines` of 0 or None never trims.
+    """
+
+    def __init__(self, text, max_lines: int | None, spill_path: str | None = None):
+        self.text = text
+        self.max_lines = max_lines
+        self.spill_path = spill_path
+        self.spilled = 0
+
+    def trim(self) -> int:
+        """Trim the widget if it is over the limit; must run on the Tk thread with the widget editable."""
+        if not self.max_lines:
+            return 0
+        line, column = map(int, self.text.index("end-1c").split("."))
+        # Text ending in a newline leaves an empty last line, which isn't counted
+        lines = line - 1 if column == 0 else line
+        if lines <= self.max_lines:
+            return 0
+        cut = min(lines - 1, lines - self.max_lines + int(self.max_lines * TRIM_SLACK))
+        end = f"{cut + 1}.0"
+        if self.spill_path:
+            try:
+                os.makedirs(os.path.dirname(self.spill_path), exist_ok=True)
+                with open(self.spill_path, "a", encoding="utf-8") as f:
+                    f.write(self.text.get("1.0", end))
+            except OSError as e:
+                print(f"Could not save scrollback to {self.spill_path}: {e}")
+        self.text.delete("1.0", end)
+        self.spilled += cut
+        return cut
+
+
+def at_bottom(text) -> bool:
+    """True if the widget is scrolled to the end, so new text should keep it there."""
+    return text.yview()[1] >= 0.999
@@ -0,0 +1,50 @@
+import threading
+
+# Cap on how often streamed text is pushed into the Tk widgets
+MAX_REFRESH_HZ = 20
+
+
+class StreamBuffer:
+    """Collects streamed pieces from a worker thread and flushes them on the Tk loop.
+
+    Pieces are batched so the widgets are updated at most MAX_REFRESH_HZ times a
+    second, no matter how fast tokens arrive.
+    """
+
+    def __init__(self, widget, on_flush, on_done=None, refresh_hz: int = MAX_REFRESH_HZ):
+        self.widget = widget
+        self.on_flush = on_flush
+        self.on_done = on_done
+        self.interval_ms = max(1, int(1000 / max(1, refresh_hz)))
+        self._lock = threading.Lock()
+        self._pending = []
+        self._closed = False
+
+    def start(self):
+        """Start draining; must be called from the Tk main thread."""
+        self.widget.after(self.interval_ms, self._drain)
+
+    def push(self, kind, text):
+        """Queue a piece; safe to call from any thread."""
+        with self._lock:
+            if self._pending and self._pending[-1][0] == kind:
+                self._pending[-1][1].append(text)
+            else:
+                self._pending.append((kind, [text]))
+
+    def close(self):
+        """Mark the stream finished; the final flush happens on the next tick."""
+        with self._lock:
+            self._closed = True
+
+    def _drain(self):
+        with self._lock:
+            pending, self._pending = self._pending, []
+            closed = self._closed
+        for kind, parts in pending:
+            self.on_flush(kind, "".join(parts))
+        if closed:
+            if self.on_done:
+                self.on_done()
+            return
+        self.widget.after(self.interval_ms, self._drain)
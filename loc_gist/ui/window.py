@@ -1,38 +1,75 @@
-import threading
+import time
 import tkinter as tk
 import ttkbootstrap as ttk
 
-from loc_gist.rag.api import query_rag
+from loc_gist.rag.settings import DEFAULT_SETTINGS
+from loc_gist.rag.warmup import start_warmup
 from .db_handler import DbHandler
 from .layout import Layout
+from .stream_buffer import StreamBuffer
 
 class Window(ttk.Window):
-    def __init__(self, theme="cyborg"):
+    def __init__(self, theme="cyborg", started_at: float | None = None):
         super().__init__(themename=theme)
+        self.started_at = started_at or time.perf_counter()
         self.title("LocGist - RAG System")
         self.geometry("800x620")
         self.db_handler = DbHandler()
+        self.conversation = None  # created on the first question asked in conversation mode
+        # settings dict for app variables (the layout reads the scrollback limits)
+        self.settings = {**DEFAULT_SETTINGS, "embed_batch_size": 32, "embed_workers": 4,
+                         "answer_cache": True, "answer_cache_similarity": None,
+                         "vector_store": "chroma", "vector_rescore": False,
+                         "chunker": "structured", "chunk_tokens": 256, "chunk_overlap": 32, "supersede_queries": False,
+                         "log_max_lines": 5000, "chat_max_lines": 2000}
         self.layout = Layout(self)
-        # settings dict for app variables
-        self.settings = {"model": "qwen3:4b", "temperature": 0.2, "top_k": 4, "max_tokens": 1024, "ctx_window": 8192}
+        # One buffer for all answers, so a queued question is shown after the previous answer's last piece
+        self._reply = {"answer": False, "think": False}
+        self.chat_stream = StreamBuffer(self, on_flush=self._on_chat_flush)
+        self.chat_stream.start()
         # allow DbHandler to fetch settings on activation
         self.db_handler.set_settings_provider(lambda: self.settings)
+        self.db_handler.set_logger(self.write_log)
+        self.db_handler.set_chain_callback(
+            lambda build_id, chain, status: self.after(0, lambda: self._on_chain_built(build_id, chain, status)))
+        self.db_handler.start_scheduler(
+            on_start=self._on_query_start,
+            on_piece=lambda job, kind, text: self.chat_stream.push(kind, text),
+            on_done=self._on_query_done,
+            on_log=self.write_log,
+        )
+        self.db_handler.start_indexer(
+            on_progress=lambda job, stage, done, total: self.after(0, lambda: self._on_index_progress(job, stage, done, total)),
+            on_log=self.write_log,
+            on_done=lambda job, msg: self.after(0, lambda: self._on_index_done(job, msg)),
+        )
+        # Heavy RAG imports happen after the window is drawn, off the Tk thread
+        self.after_idle(self._on_ready)
+
+    def _on_ready(self):
+        self.write_log(f"[SYS]: Window ready in {(time.perf_counter() - self.started_at) * 1000:.0f} ms")
+        start_warmup(log=self.write_log)
 
     def apply_settings(self, payload: dict):
         # Save and apply to downstream components if needed
         self.settings.update(payload or {})
         self.write_log(f"[SYS]: Settings updated: {self.settings}")
-        # Reinitialize chain with new settings if a DB is active
+        tabs = self.layout.tab_window
+        tabs.log_tab.scrollback.max_lines = self.settings.get("log_max_lines")
+        tabs.chat_tab.scrollback.max_lines = self.settings.get("chat_max_lines")
+        # Rebind the active chain's LLM/retriever parameters in place
         if self.db_handler.active_db:
-            self.write_log("[SYS]: Reinitializing model with new settings…")
-            # Trigger re-activation to rebuild chain
-            self.db_handler.activate(self.db_handler.active_db)
+            started = time.perf_counter()
+            status = self.db_handler.apply_settings()
+            if status:
+                self.write_log(f"[SYS]: {status} in {(time.perf_counter() - started) * 1000:.0f} ms")
 
     def run(self):
         self.layout.pack(expand=True, fill=tk.BOTH)
         self.mainloop()
 
     def write_log(self, msg):
+        """Queue a log line; safe to call from worker threads."""
         self.layout.tab_window.log_tab.write(msg)
 
     def write_chat(self, msg):
@@ -43,60 +80,130 @@ class Window(ttk.Window):
         self.layout.status_bar.update(status, db_name)
 
     def create_db(self):
-        """Create a new database by opening a file dialog."""
+        """Create new databases from the selected files in the background."""
         ok, status = self.db_handler.create_db()
+        self.write_log(status)
         if ok:
-            self.write_log(status)
-            self.update_status(status="OK", db_name=status)
-        else:
-            self.write_log(status)
+            self.update_status(status="WORKING", db_name=status)
+
+    def add_files(self):
+        """Add files to the active database in the background."""
+        ok, status = self.db_handler.add_files()
+        self.write_log(status)
+        if ok:
+            self.update_status(status="WORKING", db_name=self.db_handler.active_db)
+
+    def sync_folder(self):
+        """Re-sync a folder of pdfs into the active database in the background."""
+        ok, status = self.db_handler.sync_folder()
+        self.write_log(status)
+        if ok:
+            self.update_status(status="WORKING", db_name=self.db_handler.active_db)
+
+    def _on_index_progress(self, job, stage, done, total):
+        queued = self.db_handler.indexer.pending_count()
+        suffix = f" (+{queued} queued)" if queued else ""
+        count = f" {done}/{total}" if total else (f" {done}" if done else "")
+        self.layout.status_bar.show_job(
+            f"{job.db_name}: {stage}{count}{suffix}", done, total,
+            on_cancel=self.db_handler.cancel_indexing,
+        )
+
+    def _on_index_done(self, job, msg):
+        self.write_log(msg)
+        self.db_handler.invalidate_dbs()
+        self.layout.sidebar.refresh_db_list()
+        if self.db_handler.indexer.current is None and not self.db_handler.indexer.pending_count():
+            self.layout.status_bar.hide_job()
+            self.update_status(status="OK" if job.state == "DONE" else job.state, db_name=job.db_name)
+
+    def new_conversation(self):
+        """Forget the conversation so far; the next question starts a fresh one."""
+        if self.conversation is not None:
+            self.conversation.clear()
+        self.write_log("[SYS]: Started a new conversation.")
+
+    def _active_conversation(self):
+        if not self.layout.tab_window.chat_tab.conversation_var.get():
+            return None
+        if self.conversation is None:
+            from loc_gist.rag.conversation import Conversation
+            self.conversation = Conversation()
+        return self.conversation
+
+    def _on_chain_built(self, build_id, chain, status):
+        if not self.db_handler.install_chain(build_id, chain, status):
+            return  # the selection changed while it was loading
+        if chain is not None:
+            self.write_log(f"[SYS]: Connected to {', '.join(self.db_handler.selected_dbs)}.")
+        self.update_status(status="OK" if chain is not None else "ERROR", db_name=self.db_handler.selection_label())
 
     def handle_input(self, msg):
-        """Handle user input from the chat box."""
+        """Queue a question from the chat box; returns False if it wasn't accepted."""
+        if self.db_handler.loading:
+            self.write_chat("The database is still loading, ask again in a moment.")
+            return False
         if self.db_handler.chain is None:
             self.write_chat("Please select a database first.")
-            return
-        self.write_log("Processing your query...")
-        # show UI processing signals
+            return False
+        busy = self.db_handler.queries.busy()
+        supersede = bool(self.settings.get("supersede_queries"))
+        job = self.db_handler.ask(msg, conversation=self._active_conversation(), supersede=supersede)
+        if job is None:
+            self.write_chat("Too many questions are waiting. Wait for an answer or press Stop.")
+            return False
+        if supersede and busy:
+            self.write_log("[SYS]: Stopped the previous question for the new one.")
+        elif busy:
+            self.write_log(f"[SYS]: Queued your question ({self.db_handler.queries.pending_count()} waiting).")
         self.layout.tab_window.chat_tab.start_thinking()
-        self.update_status(status="THINKING", db_name=self.db_handler.active_db or "NONE")
-
-        def safe_write_chat(text):
-            self.after(0, lambda: self.write_chat(text))
-
-        def safe_write_log(text):
-            self.after(0, lambda: self.write_log(text))
-
-        def safe_stop_thinking():
-            self.after(0, self.layout.tab_window.chat_tab.stop_thinking)
-
-        def safe_set_ok():
-            self.after(0, lambda: self.update_status("OK", self.db_handler.active_db or "NONE"))
-
-        def safe_set_error():
-            self.after(0, lambda: self.update_status("ERROR", self.db_handler.active_db or "NONE"))
-
-        threading.Thread(
-            target=self._run_query_and_append,
-            args=(self.db_handler.chain, msg, safe_write_log, safe_write_chat, safe_stop_thinking, safe_set_ok, safe_set_error),
-            daemon=True,
-        ).start()
-
-    @staticmethod
-    def _run_query_and_append(chain, msg, write_log, write_chat, stop_thinking, set_ok, set_error):
-        """Run the query in a separate thread and append the response."""
-        try:
-            response = query_rag(chain, msg)
-            # Extract thoughts which are between <think></think>
-            if "<think>" in response and "</think>" in response:
-                thoughts = response.split("<think>")[1].split("</think>")[0]
-                response = response.replace(f"<think>{thoughts}</think>", "").strip()
-                write_log(f"Thoughts: {thoughts}")
-
-            write_chat(response)
-            set_ok()
-        except Exception as e:
-            write_log(f"[ERROR]: {e}")
-            set_error()
-        finally:
-            stop_thinking()
+        self.update_status(status="THINKING", db_name=self.db_handler.selection_label())
+        return True
+
+    def stop_query(self):
+        self.db_handler.stop_query()
+
+    def _on_query_start(self, job):
+        self.write_log(f"Processing your query... (waited {job.queue_wait_s:.2f}s in queue)")
+        self.chat_stream.push("question", job.question)
+
+    def _on_query_done(self, job, msg):
+        self.chat_stream.push("end", "stopped" if job.state == "CANCELLED" else "")
+        self.write_log(msg)
+        self.after(0, lambda: self._on_queries_idle(job))
+
+    def _on_queries_idle(self, job):
+        if self.db_handler.queries.busy():
+            return
+        self.layout.tab_window.chat_tab.stop_thinking()
+        status = {"DONE": "OK", "CANCELLED": "STOPPED"}.get(job.state, job.state)
+        self.update_status(status, self.db_handler.selection_label())
+
+    def _on_chat_flush(self, kind, text):
+        """Render batched pieces of the questions being answered, in the order the worker produced them."""
+        chat = self.layout.tab_window.chat_tab
+        log = self.layout.tab_window.log_tab
+        state = self._reply
+        if kind == "question":
+            state.update(answer=False, think=False)
+            chat.write_user(text)
+        elif kind == "think":
+            if not state["think"]:
+                state["think"] = True
+                self.write_log("Thoughts:")
+            log.append(text)
+        elif kind == "answer":
+            if not state["answer"]:
+                state["answer"] = True
+                if state["think"]:
+                    log.append("\n")
+                chat.begin_bot()
+            chat.append_bot(text)
+        elif kind == "end":
+            if text and not state["answer"]:
+                state["answer"] = True
+                chat.begin_bot()
+            if text:
+                chat.append_bot(f" [{text}]")
+            if state["answer"]:
+                chat.end_bot()
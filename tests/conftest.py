@@ -0,0 +1,44 @@
+import socket
+import threading
+
+import pytest
+
+from loc_gist.rag import catalog, db_helper
+
+
+@pytest.fixture
+def db_root(tmp_path, monkeypatch):
+    """An empty .chroma_db folder the database helpers and the catalog point at."""
+    root = tmp_path / ".chroma_db"
+    monkeypatch.setattr(db_helper, "get_db_root", lambda: str(root))
+    monkeypatch.setattr(catalog, "get_db_root", lambda: str(root))
+    monkeypatch.setattr(catalog, "_cached", (None, None))
+    return root
+
+
+@pytest.fixture
+def silent_server():
+    """A server that accepts connections and never answers, like Ollama during a long prefill."""
+    server = socket.create_server(("127.0.0.1", 0))
+    accepted = []
+    threading.Thread(target=lambda: accepted.append(server.accept()), daemon=True).start()
+    yield f"http://127.0.0.1:{server.getsockname()[1]}"
+    for conn, _ in accepted:
+        conn.close()
+    server.close()
+
+
+def make_db(root, name, files=None, config=None):
+    """A database folder with a manifest ({path: number of chunks}) and optional store.json."""
+    import json
+
+    path = root / name
+    path.mkdir(parents=True)
+    manifest = {"revision": 1, "files": {
+        source: {"sha256": "x", "size": 1, "mtime": 0, "chunk_ids": [f"{source}-{i}" for i in range(chunks)]}
+        for source, chunks in (files or {}).items()
+    }}
+    (path / "manifest.json").write_text(json.dumps(manifest))
+    if config is not None:
+        (path / "store.json").write_text(json.dumps(config))
+    return str(path)
@@ -0,0 +1,65 @@
+import socket
+import threading
+import time
+
+import httpx
+import pytest
+
+from loc_gist.rag.abort import AbortableTransport, abort_requests
+from loc_gist.rag.streaming import RagStream
+
+
+def test_transport_connections_are_tracked(silent_server):
+    """Fails if requests bypass the tracking pool: nothing would be found to abort."""
+    client = httpx.Client(timeout=None, transport=AbortableTransport())
+    errors = []
+
+    def request():
+        try:
+            client.get(silent_server)
+        except httpx.HTTPError as exc:
+            errors.append(exc)
+
+    thread = threading.Thread(target=request, daemon=True)
+    thread.start()
+    deadline = time.perf_counter() + 2
+    while not abort_requests(thread.ident) and time.perf_counter() < deadline:
+        time.sleep(0.01)
+    thread.join(2)
+    assert not thread.is_alive()
+    assert [type(e) for e in errors] == [httpx.RemoteProtocolError]
+
+
+def test_transport_raises_httpx_errors():
+    port = socket.create_server(("127.0.0.1", 0))
+    url = f"http://127.0.0.1:{port.getsockname()[1]}"
+    port.close()
+    with pytest.raises(httpx.ConnectError):
+        httpx.Client(transport=AbortableTransport()).get(url)
+
+
+def test_stop_aborts_a_request_waiting_for_its_first_token(silent_server):
+    client = httpx.Client(timeout=None, transport=AbortableTransport())
+
+    def chunks():
+        with client.stream("POST", f"{silent_server}/api/chat") as response:
+            yield from response.iter_text()
+
+    cancel = threading.Event()
+    stream = RagStream(chunks(), cancel_event=cancel)
+    threading.Timer(0.2, cancel.set).start()
+    started = time.perf_counter()
+    assert list(stream) == []
+    assert stream.cancelled
+    assert time.perf_counter() - started < 2
+
+
+def test_stop_before_the_stream_starts_sends_nothing():
+    def chunks():
+        raise AssertionError("request sent")
+        yield
+
+    cancel = threading.Event()
+    cancel.set()
+    stream = RagStream(chunks(), cancel_event=cancel)
+    assert list(stream) == [] and stream.cancelled
@@ -0,0 +1,107 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from loc_gist.rag import api
+from loc_gist.rag.answer_cache import AnswerCache, normalize_question
+
+
+def _key(question="What is RAG?", scope=(("kb",), (1,), ()), chunk_ids=("a", "b")):
+    return AnswerCache.key(scope, chunk_ids, question)
+
+
+def test_trivial_question_variants_share_a_key():
+    assert normalize_question("  What is   RAG?! ") == "what is rag"
+    assert _key("what is rag") == _key("What is RAG?")
+    assert normalize_question("") == ""
+
+
+def test_lookup_miss_then_hit():
+    cache = AnswerCache()
+    assert cache.lookup(_key()) is None
+    cache.store(_key(), "answer", 1.5)
+    assert cache.lookup(_key()).answer == "answer"
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_other_chunks_or_scope_miss():
+    cache = AnswerCache()
+    cache.store(_key(), "answer", 1.0)
+    assert cache.lookup(_key(chunk_ids=("a",))) is None
+    assert cache.lookup(_key(scope=(("kb",), (2,), ()))) is None
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = AnswerCache(max_entries=2)
+    for question in ("one", "two"):
+        cache.store(_key(question), question, 1.0)
+    cache.lookup(_key("one"))
+    cache.store(_key("three"), "three", 1.0)
+    assert cache.lookup(_key("two")) is None
+    assert cache.lookup(_key("one")) is not None
+
+
+def test_entries_expire(monkeypatch):
+    cache = AnswerCache(ttl_s=10)
+    cache.store(_key(), "answer", 1.0)
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 11)
+    assert cache.lookup(_key()) is None
+
+
+def test_invalidate_one_database():
+    cache = AnswerCache()
+    cache.store(_key(scope=(("kb", "other"), (1, 1), ())), "both", 1.0)
+    cache.store(_key(scope=(("other",), (1,), ())), "other", 1.0)
+    cache.invalidate("kb")
+    assert cache.lookup(_key(scope=(("kb", "other"), (1, 1), ()))) is None
+    assert cache.lookup(_key(scope=(("other",), (1,), ()))) is not None
+    cache.invalidate()
+    assert not cache._entries
+
+
+def test_similar_question_hits_within_its_scope():
+    cache = AnswerCache()
+    cache.store(_key("what is rag"), "answer", 1.0, question_vector=[1.0, 0.0])
+    near = _key("explain rag")
+    assert cache.lookup(near, [0.99, 0.1], similarity_threshold=0.95).answer == "answer"
+    assert cache.lookup(near, [0.0, 1.0], similarity_threshold=0.95) is None
+    assert cache.lookup(_key("explain rag", scope=(("kb",), (2,), ())), [1.0, 0.0], 0.95) is None
+
+
+@pytest.mark.parametrize("setting, value", [
+    ("max_tokens", 64), ("context_share", 0.3), ("lexical_weight", 0.5), ("rerank_model", "reranker"),
+    ("rerank_fetch_k", 40), ("ctx_window", 4096), ("embedding_model", "other-embed"),
+])
+def test_answer_cache_scope_covers_chain_settings(monkeypatch, setting, value):
+    monkeypatch.setattr(api, "_answer_cache", AnswerCache())
+
+    def probe(settings):
+        chain = SimpleNamespace(settings=settings, db_name="kb", db_names=None, stores=None, db_path=None,
+                                embedding=None)
+        return api._probe_answer_cache(chain, "question", [])[0]
+
+    assert probe({}) == probe({"top_k": api.DEFAULT_SETTINGS["top_k"]})  # defaults filled in
+    assert probe({setting: value}) != probe({})
+
+
+def test_chain_defaults_match_the_gui_and_cli():
+    from loc_gist.cli import build_parser
+
+    options = api._chain_options({})
+    assert options == api.DEFAULT_SETTINGS
+    args = build_parser().parse_args(["ask", "kb", "question"])
+    assert args.lexical_weight == options["lexical_weight"] and args.top_k == options["top_k"]
+
+
+def test_indexing_invalidates_the_normalized_folder_name(db_root, monkeypatch):
+    cache = AnswerCache()
+    monkeypatch.setattr(api, "_answer_cache", cache)
+    monkeypatch.setattr(api, "update_db", lambda *args, **kwargs: {"added": 1, "updated": 0, "unchanged": 0,
+                                                                   "removed": 0, "chunks": 1})
+    monkeypatch.setattr(api, "record_db", lambda *args: None)
+    cache.store(_key(scope=(("my_docs",), (1,), ())), "stale", 1.0)
+    api.sync_db(str(db_root), "My Docs")
+    assert (db_root / "my_docs").is_dir()
+    assert cache.lookup(_key(scope=(("my_docs",), (1,), ()))) is None
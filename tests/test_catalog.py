@@ -0,0 +1,73 @@
+import os
+
+from loc_gist.rag import catalog
+from loc_gist.rag.catalog import EMBED_MODEL, catalog_version, forget_db, load_catalog, record_db
+
+from conftest import make_db
+
+
+def test_missing_catalog_is_built_from_folders(db_root):
+    make_db(db_root, "olddb", files={"/docs/a.pdf": 3, "/docs/b.pdf": 2})
+    assert catalog_version() is None
+    entry = load_catalog()["olddb"]
+    assert entry["chunks"] == 5
+    assert entry["files"] == ["/docs/a.pdf", "/docs/b.pdf"]
+    assert entry["embedding_model"] == EMBED_MODEL  # built before the model was recorded
+    assert entry["built_at"] is None
+    assert os.path.exists(catalog.catalog_path())
+
+
+def test_empty_db_root(db_root):
+    assert load_catalog() == {}
+
+
+def test_record_and_forget(db_root):
+    path = make_db(db_root, "kb", files={"/a.pdf": 1}, config={"backend": "chroma", "embedding_model": "other"})
+    entry = record_db(path, build_s=1.234)
+    assert entry["build_s"] == 1.23 and entry["built_at"]
+    assert load_catalog()["kb"]["embedding_model"] == "other"
+    forget_db("kb")
+    assert "kb" not in load_catalog()
+
+
+def test_rescan_keeps_build_times(db_root):
+    path = make_db(db_root, "kb")
+    built_at = record_db(path, build_s=2.0)["built_at"]
+    make_db(db_root, "copied")
+    catalog_ = load_catalog(rescan=True)
+    assert sorted(catalog_) == ["copied", "kb"]
+    assert catalog_["kb"]["built_at"] == built_at
+
+
+def test_file_written_by_another_process_is_reread(db_root):
+    path = make_db(db_root, "kb")
+    record_db(path)
+    before = catalog_version()
+    os.utime(catalog.catalog_path(), ns=(before + 10 ** 9, before + 10 ** 9))
+    catalog._cached = (before, {"stale": {}})
+    assert "kb" in load_catalog()
+
+
+def test_db_handler_loads_existing_dbs_on_first_use(db_root):
+    from loc_gist.ui.db_handler import DbHandler
+
+    make_db(db_root, "olddb")
+    handler = DbHandler()
+    assert handler.get_dbs() == ["olddb"]
+    assert not handler.catalog_changed()
+    record_db(make_db(db_root, "newdb"))
+    assert handler.catalog_changed()
+    assert handler.get_dbs() == ["newdb", "olddb"]
+
+
+def test_refresh_stats_keeps_build_time(db_root):
+    from loc_gist.rag.catalog import refresh_db_stats
+
+    path = make_db(db_root, "kb", files={"/a.pdf": 1})
+    built = record_db(path, build_s=3.0)
+    with open(os.path.join(path, "extra.bin"), "wb") as f:
+        f.write(b"x" * 4096)
+    entry = refresh_db_stats(path)
+    assert entry["size_bytes"] == built["size_bytes"] + 4096
+    assert (entry["built_at"], entry["build_s"]) == (built["built_at"], 3.0)
+    assert load_catalog()["kb"] == entry
@@ -0,0 +1,99 @@
+import pytest
+from langchain_core.documents import Document
+
+from loc_gist.rag.chunking import (LEGACY_CHUNKING, RecursiveChunker, StructuredChunker, chunking_config, describe,
+                                   get_chunker, split_pages)
+from loc_gist.rag.context import estimate_tokens
+
+
+def _page(text, page=0):
+    return Document(page_content=text, metadata={"source": "/docs/a.pdf", "page": page})
+
+
+def _sentences(count, words=12, start=0):
+    return " ".join(f"Sentence {i} " + "word " * (words - 3) + "end." for i in range(start, start + count))
+
+
+def _split(text, tokens=64, overlap=8):
+    return StructuredChunker(tokens, overlap).split_documents([_page(text)])
+
+
+@pytest.mark.parametrize("text", ["", "   \n\n  "])
+def test_empty_page(text):
+    assert _split(text) == []
+
+
+def test_chunks_are_exact_spans_within_the_budget():
+    text = "\n\n".join(_sentences(6, start=i * 6) for i in range(5))
+    chunks = _split(text)
+    assert len(chunks) > 1
+    for chunk in chunks:
+        start = chunk.metadata["start_index"]
+        assert text[start:start + len(chunk.page_content)] == chunk.page_content
+        assert estimate_tokens(chunk.page_content) <= 64
+        assert chunk.metadata["source"] == "/docs/a.pdf"
+    # Nothing is lost
+    covered = set()
+    for chunk in chunks:
+        start = chunk.metadata["start_index"]
+        covered.update(range(start, start + len(chunk.page_content)))
+    assert all(i in covered for i, c in enumerate(text) if not c.isspace())
+
+
+def test_long_paragraph_breaks_at_sentences_with_overlap():
+    chunks = _split(_sentences(20), tokens=64, overlap=16)
+    assert all(c.page_content.endswith("end.") for c in chunks)
+    assert chunks[1].metadata["start_index"] < chunks[0].metadata["start_index"] + len(chunks[0].page_content)
+
+
+def test_heading_starts_a_chunk_and_names_its_section():
+    text = "Intro text here.\n\n2. Installation Guide\n" + _sentences(3)
+    chunks = _split(text, tokens=256)
+    assert chunks[0].page_content == "Intro text here."
+    assert chunks[1].page_content.startswith("2. Installation Guide")
+    assert chunks[1].metadata["section"] == "2. Installation Guide"
+    assert "section" not in chunks[0].metadata
+
+
+def test_table_rows_stay_whole():
+    rows = "\n".join(f"Item {i}    {i * 10}    {i * 2.5:.1f}" for i in range(40))
+    chunks = _split(rows, tokens=32, overlap=0)
+    assert len(chunks) > 1
+    for chunk in chunks:
+        assert all(line.startswith("Item") and len(line.split()) == 4 for line in chunk.page_content.splitlines())
+
+
+def test_text_without_sentence_breaks_is_split_between_words():
+    chunks = _split("word " * 500, tokens=32, overlap=0)
+    assert len(chunks) > 1
+    assert all(c.page_content.strip() == c.page_content and estimate_tokens(c.page_content) <= 32 for c in chunks)
+
+
+def test_recursive_chunker_records_offsets():
+    text = _sentences(30)
+    chunks = RecursiveChunker(64, 8).split_documents([_page(text)])
+    assert len(chunks) > 1
+    for chunk in chunks:
+        start = chunk.metadata["start_index"]
+        assert text[start:start + len(chunk.page_content)] == chunk.page_content
+
+
+def test_chunking_config_validation():
+    assert chunking_config(None) == {"chunker": "structured", "chunk_tokens": 256, "chunk_overlap": 32}
+    assert chunking_config({"chunker": "recursive", "chunk_tokens": "100", "chunk_overlap": 0})["chunk_overlap"] == 0
+    for bad in ({"chunker": "semantic"}, {"chunk_tokens": 50, "chunk_overlap": 50}, {"chunk_overlap": -1}):
+        with pytest.raises(ValueError):
+            chunking_config(bad)
+
+
+def test_knowledge_bases_without_config_use_legacy_chunking():
+    assert describe(None) == "recursive, 250 tokens, 50 overlap"
+    chunker = get_chunker(None)
+    assert isinstance(chunker, RecursiveChunker) and chunker.chunk_tokens == LEGACY_CHUNKING["chunk_tokens"]
+    assert get_chunker(None) is chunker
+
+
+def test_split_pages_times_each_page():
+    results = split_pages(None, [_page(_sentences(2)), _page("")])
+    assert [len(chunks) for chunks, _ in results] == [1, 0]
+    assert all(seconds >= 0 for _, seconds in results)
@@ -0,0 +1,64 @@
+from langchain_core.documents import Document
+
+from loc_gist.rag.context import PROMPT_OVERHEAD_TOKENS, ContextPacker, estimate_tokens, merge_chunks
+
+
+def _doc(text, page=0, start=None, source="/docs/guide.pdf"):
+    metadata = {"source": source, "page": page}
+    if start is not None:
+        metadata["start_index"] = start
+    return Document(page_content=text, metadata=metadata)
+
+
+def test_empty_input():
+    assert merge_chunks([]) == []
+    assert ContextPacker().pack([]) == ""
+    assert estimate_tokens("") == 1
+
+
+def test_duplicates_and_blank_chunks_are_dropped():
+    blocks = merge_chunks([_doc("same text"), _doc("  same text "), _doc("   ")])
+    assert [b.text for b in blocks] == ["same text"]
+
+
+def test_overlapping_chunks_merge_by_offsets():
+    text = "alpha beta gamma delta epsilon zeta eta theta"
+    blocks = merge_chunks([_doc(text[20:], start=20), _doc(text[:30], start=0)])
+    assert [b.text for b in blocks] == [text]
+    assert blocks[0].rank == 0
+
+
+def test_adjacent_chunks_are_joined_and_distant_ones_kept_apart():
+    blocks = merge_chunks([_doc("first part.", start=0), _doc("second part.", start=12), _doc("far away", start=500)])
+    assert [b.text for b in blocks] == ["first part. second part.", "far away"]
+
+
+def test_overlapping_chunks_merge_by_text_without_offsets():
+    shared = "x" * 30
+    blocks = merge_chunks([_doc("head " + shared), _doc(shared + " tail")])
+    assert [b.text for b in blocks] == ["head " + shared + " tail"]
+
+
+def test_chunks_from_other_pages_are_not_merged():
+    shared = "y" * 30
+    blocks = merge_chunks([_doc("a " + shared, page=0), _doc(shared + " b", page=1)])
+    assert len(blocks) == 2
+    assert blocks[1].label == "guide.pdf p.2"
+
+
+def test_budget_leaves_room_for_answer_and_question():
+    packer = ContextPacker(ctx_window=1000, max_tokens=200, share=1.0)
+    assert packer.budget("") == 1000 - 200 - PROMPT_OVERHEAD_TOKENS - 1
+    assert packer.budget("", reserved=2000) == 0
+    assert ContextPacker(ctx_window=1000, share=0.1).budget() == 100
+
+
+def test_pack_keeps_rank_order_and_truncates_the_last_passage():
+    docs = [_doc("word " * 40, page=0), _doc("text " * 400, page=1), _doc("more " * 400, page=2)]
+    packer = ContextPacker(ctx_window=600, share=1.0)
+    context = packer.pack(docs)
+    parts = context.split("\n\n")
+    assert parts[0].startswith("[guide.pdf p.1]")
+    assert parts[1].startswith("[guide.pdf p.2]") and parts[1].endswith(" ...")
+    assert len(parts) == 2
+    assert estimate_tokens(context) <= packer.budget()
@@ -0,0 +1,97 @@
+import time
+from types import SimpleNamespace
+
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+
+from loc_gist.rag.conversation import Conversation
+
+
+class FakeLLM:
+    def __init__(self, reply="<think>hmm</think> They discussed prices.", fail=False):
+        self.reply = reply
+        self.fail = fail
+        self.prompts = []
+
+    def model_copy(self, update):
+        return self
+
+    def invoke(self, prompt):
+        self.prompts.append(prompt)
+        if self.fail:
+            raise ConnectionError("Ollama is not running")
+        return SimpleNamespace(content=self.reply)
+
+
+def _chat(turns, words=50):
+    conversation = Conversation(keep_turns=1)
+    for i in range(turns):
+        conversation.add(f"question {i}", f"context {i} " + "word " * words, f"<think>x</think> answer {i}")
+    return conversation
+
+
+def test_empty_conversation():
+    conversation = Conversation()
+    assert len(conversation) == 0
+    assert conversation.retrieval_query("hi") == "hi"
+    messages = conversation.messages("hello")
+    assert [type(m) for m in messages] == [SystemMessage, HumanMessage]
+    assert not conversation.summarise(FakeLLM(), 8192)
+
+
+def test_each_turn_extends_the_previous_prompt():
+    conversation = _chat(1)
+    first = conversation.messages("next question")
+    conversation.add("q", "next question", "reply")
+    second = conversation.messages("third question")
+    assert [m.content for m in second[:len(first)]] == [m.content for m in first]
+    assert isinstance(second[-2], AIMessage) and second[-2].content == "reply"
+
+
+def test_think_blocks_are_not_kept_in_the_history():
+    conversation = _chat(1)
+    assert conversation.turns[0][2] == "answer 0"
+
+
+def test_follow_up_retrieves_with_the_previous_question():
+    assert _chat(2).retrieval_query("and its price?") == "question 1\nand its price?"
+
+
+def test_long_history_is_summarised_keeping_the_last_turns():
+    conversation = _chat(4)
+    llm = FakeLLM()
+    assert not conversation.summarise(llm, ctx_window=100_000)
+    assert conversation.summarise(llm, ctx_window=200)
+    assert conversation.summary == "They discussed prices."
+    assert [q for q, _, _ in conversation.turns] == ["question 3"]
+    assert len(conversation) == 4
+    assert "question 0" in llm.prompts[0] and "context 0" not in llm.prompts[0]
+    assert "Summary of the earlier conversation" in conversation.messages("q")[1].content
+
+
+def test_failed_summary_keeps_the_questions():
+    conversation = _chat(3)
+    assert conversation.summarise(FakeLLM(fail=True), ctx_window=100)
+    assert conversation.summary == "Asked: question 0 Asked: question 1"
+
+
+def test_clear():
+    conversation = _chat(3)
+    conversation.summarise(FakeLLM(), ctx_window=100)
+    conversation.clear()
+    assert (len(conversation), conversation.summary, conversation.turns) == (0, None, [])
+
+
+def test_next_turn_waits_for_the_background_summary(monkeypatch):
+    summarise = Conversation.summarise
+
+    def scheduled_late(self, llm, ctx_window):
+        time.sleep(0.2)  # the summary thread has not taken the lock yet when the next turn starts
+        return summarise(self, llm, ctx_window)
+
+    monkeypatch.setattr(Conversation, "summarise", scheduled_late)
+    conversation = _chat(4)
+    conversation.summarise_in_background(FakeLLM(), ctx_window=200)
+    messages = conversation.messages("next question")
+    assert conversation.summary == "They discussed prices."
+    assert messages[1].content.endswith("They discussed prices.")
+    assert len(messages) == 5  # system, summary, the kept turn, the new question
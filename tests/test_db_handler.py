@@ -0,0 +1,56 @@
+import queue
+import threading
+
+from loc_gist.rag import api
+from loc_gist.ui import db_handler
+from loc_gist.ui.db_handler import DbHandler
+
+
+def _handler(monkeypatch, warmed):
+    built_on = []
+
+    def chain_dbs(names, settings=None):
+        built_on.append(threading.current_thread())
+        return f"chain:{'+'.join(names)}", "OK"
+
+    monkeypatch.setattr(api, "chain_dbs", chain_dbs)
+    monkeypatch.setattr(db_handler, "start_model_warmup", lambda chain, log=None: warmed.append(chain))
+    handler = DbHandler()
+    handler.log = lambda msg: None
+    return handler, built_on
+
+
+def test_chain_is_built_off_the_calling_thread(monkeypatch):
+    warmed = []
+    handler, built_on = _handler(monkeypatch, warmed)
+    results = queue.Queue()  # stands in for root.after
+    handler.set_chain_callback(lambda *built: results.put(built))
+
+    assert handler.activate("kb")
+    assert handler.loading and handler.chain is None
+    assert handler.install_chain(*results.get(timeout=2))
+    assert built_on[0] is not threading.main_thread()
+    assert handler.chain == "chain:kb" and not handler.loading
+    assert warmed == ["chain:kb"]
+
+
+def test_a_superseded_build_is_dropped_but_its_warm_up_is_kept(monkeypatch):
+    warmed = []
+    handler, _ = _handler(monkeypatch, warmed)
+    results = queue.Queue()
+    handler.set_chain_callback(lambda *built: results.put(built))
+
+    handler.activate("kb")
+    first = results.get(timeout=2)
+    handler.set_searched("other", True)
+    assert not handler.install_chain(*first)
+    assert handler.chain is None and handler.loading
+    assert handler.install_chain(*results.get(timeout=2))
+    assert handler.chain == "chain:kb+other"
+    assert warmed == ["chain:kb+other"]
+
+
+def test_without_a_callback_the_chain_is_built_inline(monkeypatch):
+    handler, built_on = _handler(monkeypatch, [])
+    handler.activate("kb")
+    assert handler.chain == "chain:kb" and built_on == [threading.current_thread()]
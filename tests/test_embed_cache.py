@@ -0,0 +1,72 @@
+import time
+
+from loc_gist.rag.embed_cache import CachedEmbeddings, EmbeddingCache, precomputed
+
+
+class _Client:
+    def __init__(self):
+        self.documents = []
+        self.queries = []
+
+    def embed_documents(self, texts):
+        self.documents.extend(texts)
+        return [[float(len(t)), 1.0] for t in texts]
+
+    def embed_query(self, text):
+        self.queries.append(text)
+        return [0.0, float(len(text))]
+
+
+def test_vectors_are_keyed_by_model_and_text(tmp_path):
+    cache = EmbeddingCache(str(tmp_path / "cache.sqlite3"))
+    cache.put_many("model-a", ["one", "two"], [[1.0, 2.0], [3.0, 4.0]])
+    assert cache.get_many("model-a", ["two", "three", "one"]) == [[3.0, 4.0], None, [1.0, 2.0]]
+    assert cache.get_many("model-b", ["one"]) == [None]
+    # Persisted across reopening
+    assert EmbeddingCache(str(tmp_path / "cache.sqlite3")).get_many("model-a", ["one"]) == [[1.0, 2.0]]
+
+
+def test_least_recently_used_entries_are_evicted_past_the_cap(tmp_path):
+    cache = EmbeddingCache(str(tmp_path / "cache.sqlite3"), max_entries=2)
+    cache.put_many("m", ["old"], [[1.0]])
+    time.sleep(0.01)
+    cache.put_many("m", ["used"], [[2.0]])
+    time.sleep(0.01)
+    cache.get_many("m", ["old"])  # now more recent than "used"
+    time.sleep(0.01)
+    cache.put_many("m", ["new", "old"], [[3.0], [9.0]])  # "old" is already cached
+    assert cache.get_many("m", ["old", "used", "new"]) == [[1.0], None, [3.0]]
+    assert cache.evictions == 1 and "2/2 entries" in cache.stats()
+
+
+def test_counters(tmp_path):
+    cache = EmbeddingCache(str(tmp_path / "cache.sqlite3"))
+    embedding = CachedEmbeddings(_Client(), "m", cache)
+    embedding.embed_documents(["a", "bb"])
+    embedding.embed_documents(["a", "ccc"])
+    assert (cache.hits, cache.misses) == (1, 3)
+    assert cache.stats().startswith("Embedding cache: 1 hit(s), 3 miss(es) (25% hit rate), 0 evicted")
+    cache.reset_stats()
+    assert (cache.hits, cache.misses, cache.evictions) == (0, 0, 0)
+
+
+def test_only_misses_reach_the_client(tmp_path):
+    client = _Client()
+    embedding = CachedEmbeddings(client, "m", EmbeddingCache(str(tmp_path / "cache.sqlite3")))
+    assert embedding.embed_documents(["a", "bb"]) == [[1.0, 1.0], [2.0, 1.0]]
+    assert embedding.embed_documents(["bb", "ccc", "a"]) == [[2.0, 1.0], [3.0, 1.0], [1.0, 1.0]]
+    assert client.documents == ["a", "bb", "ccc"]
+    with precomputed(["dddd"], [[7.0, 7.0]]):
+        assert embedding.embed_documents(["dddd"]) == [[7.0, 7.0]]
+    assert client.documents == ["a", "bb", "ccc"]
+
+
+def test_queries_bypass_the_cache(tmp_path):
+    client = _Client()
+    cache = EmbeddingCache(str(tmp_path / "cache.sqlite3"))
+    embedding = CachedEmbeddings(client, "m", cache)
+    assert embedding.embed_query("question") == [0.0, 8.0]
+    embedding.embed_query("question")
+    assert client.queries == ["question", "question"] and client.documents == []
+    assert (cache.hits, cache.misses) == (0, 0)
+    assert cache.get_many("m", ["question"]) == [None]
@@ -0,0 +1,109 @@
+import os
+
+import pytest
+
+from loc_gist.rag.hybrid import HybridRetriever
+from loc_gist.rag.lexical import LEXICAL_FILE, LexicalIndex, load_lexical_index, tokenize
+
+TEXTS = {
+    "a": "The parser rejects ERR-1042 when the header is missing",
+    "b": "Vector search finds chunks about cooking pasta",
+    "c": "Pasta sauce recipes and the header of a cookbook",
+}
+
+
+class _Collection:
+    def __init__(self, ranked):
+        self.ranked = ranked
+
+    def query(self, query_embeddings, n_results, include):
+        ids = self.ranked[:n_results]
+        return {"ids": [ids], "documents": [[TEXTS[i] for i in ids]], "metadatas": [[{} for _ in ids]]}
+
+    def get(self, ids=None, include=None, limit=None, offset=0):
+        ids = list(TEXTS) if ids is None else ids
+        ids = ids[offset:offset + limit] if limit else ids
+        return {"ids": ids, "documents": [TEXTS[i] for i in ids], "metadatas": [{} for _ in ids]}
+
+
+class _Store:
+    class embeddings:
+        @staticmethod
+        def embed_query(text):
+            return [0.0]
+
+    def __init__(self, ranked):
+        self._collection = _Collection(ranked)
+
+    def get(self, **kwargs):
+        return self._collection.get(**kwargs)
+
+
+def test_tokenize_keeps_identifiers_whole_and_drops_stopwords():
+    assert tokenize("The ERR-1042 in v4.2.1") == ["err-1042", "err", "1042", "v4.2.1", "v4", "2", "1"]
+    assert tokenize("") == []
+
+
+def test_bm25_ranks_rare_terms_and_forgets_removed_chunks():
+    index = LexicalIndex()
+    assert index.search("anything") == []
+    index.add(list(TEXTS), list(TEXTS.values()))
+    assert index.search("err-1042", 1)[0][0] == "a"
+    index.remove(["a", "unknown"])
+    assert [chunk_id for chunk_id, _ in index.search("err-1042 header")] == ["c"]
+    assert index.search("err-1042") == []
+    index.add(["c"], ["now about something else"])
+    assert len(index) == 2
+    assert [chunk_id for chunk_id, _ in index.search("pasta")] == ["b"]
+
+
+def test_shared_index_is_reloaded_when_the_file_changes(tmp_path):
+    db_path = str(tmp_path)
+    first = load_lexical_index(db_path, _Store(list(TEXTS)))
+    assert len(first) == 3  # backfilled from the store
+    assert load_lexical_index(db_path) is first
+    private = load_lexical_index(db_path, shared=False)
+    private.remove(["a"])
+    private.save(db_path)
+    os.utime(os.path.join(db_path, LEXICAL_FILE), ns=(1, 1))
+    assert len(load_lexical_index(db_path)) == 2
+
+
+def test_saving_compacts_removed_chunks_and_drops_the_pickle(tmp_path):
+    db_path = str(tmp_path)
+    (tmp_path / "bm25.pkl").write_bytes(b"not loaded")
+    index = LexicalIndex()
+    index.add(list(TEXTS), list(TEXTS.values()))
+    index.remove(["a"])
+    before = index.search("header pasta")
+    index.save(db_path)
+    assert index.ids == ["b", "c"] and "err-1042" not in index.postings
+    assert index.search("header pasta") == before
+    assert LexicalIndex.load(os.path.join(db_path, LEXICAL_FILE)).search("header pasta") == before
+    assert not (tmp_path / "bm25.pkl").exists()
+
+
+def test_top_k_is_ordered_with_ties_in_indexing_order():
+    index = LexicalIndex()
+    index.add(["x", "y", "z", "w"], ["pump", "pump", "pump pump", "valve"])
+    assert [chunk_id for chunk_id, _ in index.search("pump", 2)] == ["z", "x"]
+    assert [chunk_id for chunk_id, _ in index.search("pump valve", 10)] == ["w", "z", "x", "y"]
+
+
+@pytest.mark.parametrize("weight, expected", [(0.0, ["b", "c"]), (1.0, ["a", "c"])])
+def test_weight_picks_one_ranking(tmp_path, weight, expected):
+    retriever = HybridRetriever(_Store(["b", "c", "a"]), str(tmp_path), k=2, lexical_weight=weight)
+    assert [d.id for d in retriever.invoke("header ERR-1042")] == expected
+
+
+def test_fusion_rewards_chunks_found_by_both(tmp_path):
+    # "c" is second for both rankings and beats each side's single first place
+    retriever = HybridRetriever(_Store(["b", "c"]), str(tmp_path), k=1, lexical_weight=0.5, fetch_k=2)
+    assert [d.id for d in retriever.invoke("ERR-1042 header")] == ["c"]
+
+
+def test_lexical_only_hits_are_fetched_from_the_store(tmp_path):
+    retriever = HybridRetriever(_Store(["b"]), str(tmp_path), k=3, lexical_weight=0.5, fetch_k=1)
+    docs = retriever.invoke("ERR-1042")
+    assert {d.id for d in docs} == {"a", "b"}
+    assert next(d for d in docs if d.id == "a").page_content == TEXTS["a"]
@@ -0,0 +1,67 @@
+import itertools
+import os
+
+from loc_gist.rag.manifest import Manifest, file_hash, iter_chunk_ids
+
+
+def _write(path, content):
+    path.write_bytes(content)
+    return str(path)
+
+
+def test_new_then_unchanged_after_record(tmp_path):
+    source = _write(tmp_path / "a.pdf", b"one")
+    manifest = Manifest(tmp_path)
+    status, digest = manifest.status(source)
+    assert (status, digest) == ("new", file_hash(source))
+    manifest.record(source, digest, ["c0", "c1"])
+    assert manifest.status(source) == ("unchanged", digest)
+    assert manifest.chunk_ids(source) == ["c0", "c1"]
+
+
+def test_changed_content_is_detected(tmp_path):
+    source = _write(tmp_path / "a.pdf", b"one")
+    manifest = Manifest(tmp_path)
+    manifest.record(source, manifest.status(source)[1], ["c0"])
+    _write(tmp_path / "a.pdf", b"two!")
+    assert manifest.status(source)[0] == "changed"
+
+
+def test_touched_but_identical_file_is_unchanged(tmp_path):
+    source = _write(tmp_path / "a.pdf", b"one")
+    manifest = Manifest(tmp_path)
+    manifest.record(source, manifest.status(source)[1], ["c0"])
+    stat = os.stat(source)
+    os.utime(source, (stat.st_atime, stat.st_mtime + 10))
+    assert manifest.status(source)[0] == "unchanged"
+    assert manifest.files[Manifest.key(source)]["mtime"] == stat.st_mtime + 10
+
+
+def test_save_and_reload_keeps_revision(tmp_path):
+    source = _write(tmp_path / "a.pdf", b"one")
+    manifest = Manifest(tmp_path)
+    manifest.record(source, manifest.status(source)[1], ["c0"])
+    manifest.save()
+    reloaded = Manifest(tmp_path)
+    assert reloaded.revision == 1
+    assert reloaded.files == manifest.files
+
+
+def test_remove_unknown_file_changes_nothing(tmp_path):
+    manifest = Manifest(tmp_path)
+    assert manifest.remove("/nowhere.pdf") == []
+    assert manifest.revision == 0
+    assert manifest.chunk_ids("/nowhere.pdf") == []
+
+
+def test_empty_folder_has_no_files(tmp_path):
+    manifest = Manifest(tmp_path)
+    assert (manifest.files, manifest.revision) == ({}, 0)
+
+
+def test_chunk_ids_are_stable_and_depend_on_content(tmp_path):
+    source = _write(tmp_path / "a.pdf", b"one")
+    first = list(itertools.islice(iter_chunk_ids(source, "a" * 64), 3))
+    assert first == list(itertools.islice(iter_chunk_ids(source, "a" * 64), 3))
+    assert len(set(first)) == 3
+    assert first[0] != next(iter_chunk_ids(source, "b" * 64))
@@ -0,0 +1,18 @@
+from loc_gist.rag.pdf_reader import _normalize_metadata, get_extract_pool
+
+
+def test_normalize_metadata_matches_pypdfloader_format():
+    metadata = _normalize_metadata({
+        "/Producer": " pdfTeX ", "/CreationDate": "D:20240102030405+01'00'", "/ModDate": "yesterday",
+        "/Trapped": 1.5, "total_pages": 3, "file_path": "a.pdf",
+    })
+    assert metadata == {
+        "producer": "pdfTeX", "creationdate": "2024-01-02T03:04:05+01:00", "moddate": "yesterday",
+        "trapped": "1.5", "total_pages": 3, "source": "a.pdf", "file_path": "a.pdf",
+    }
+
+
+def test_extract_pool_spawns_and_knows_its_size():
+    with get_extract_pool(2) as pool:
+        assert pool.workers == 2
+        assert pool._mp_context.get_start_method() == "spawn"
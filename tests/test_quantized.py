@@ -0,0 +1,142 @@
+import numpy as np
+import pytest
+
+from loc_gist.rag import quantized
+from loc_gist.rag.quantized import QuantizedCollection, read_store_config, store_config_from_settings
+
+
+def _vectors(n, dim=16, seed=0):
+    return np.random.default_rng(seed).normal(size=(n, dim)).astype(np.float32)
+
+
+@pytest.fixture
+def open_collection(tmp_path):
+    opened = []
+
+    def open_(**kwargs):
+        collection = QuantizedCollection(str(tmp_path), **kwargs)
+        opened.append(collection)
+        return collection
+
+    yield open_
+    for collection in opened:
+        collection._db.close()
+
+
+def test_store_config_from_settings():
+    assert store_config_from_settings(None) == {"backend": "chroma"}
+    assert store_config_from_settings({"vector_store": "float16"})["dtype"] == "float16"
+    with pytest.raises(ValueError):
+        store_config_from_settings({"vector_store": "int4"})
+
+
+def test_missing_config_means_chroma(tmp_path):
+    assert read_store_config(str(tmp_path)) == {"backend": "chroma"}
+
+
+def test_empty_collection(open_collection):
+    collection = open_collection()
+    assert collection.count() == 0
+    assert collection.search(np.ones(16)) == []
+    assert collection.query([np.ones(16)])["ids"] == [[]]
+
+
+@pytest.mark.parametrize("dtype, rescore", [("int8", False), ("int8", True), ("float16", False)])
+def test_nearest_neighbour_is_found(open_collection, dtype, rescore):
+    collection = open_collection(dtype=dtype, rescore=rescore)
+    vectors = _vectors(300)
+    collection.upsert([f"c{i}" for i in range(300)], vectors, documents=[f"doc {i}" for i in range(300)])
+    result = collection.query([vectors[42]], n_results=3)
+    assert result["ids"][0][0] == "c42"
+    assert result["documents"][0][0] == "doc 42"
+    assert result["distances"][0][0] == pytest.approx(0.0, abs=0.02)
+
+
+def test_upsert_replaces_and_delete_tombstones(open_collection):
+    collection = open_collection()
+    vectors = _vectors(3)
+    collection.upsert(["a", "b", "c"], vectors, metadatas=[{"page": 0}, None, None], documents=["A", "B", "C"])
+    collection.upsert(["a"], vectors[2:3], documents=["A2"])
+    collection.delete(ids=["b", "missing"])
+    assert collection.count() == 2
+    assert collection.get(ids=["a", "b"])["documents"] == ["A2"]
+    assert {collection.query([vectors[2]], n_results=2)["ids"][0][i] for i in range(2)} == {"a", "c"}
+
+
+def test_rows_survive_reopening(tmp_path, open_collection):
+    collection = open_collection(dtype="float16")
+    collection.upsert(["a", "b"], _vectors(2), documents=["A", "B"])
+    collection.delete(ids=["a"])
+    reopened = open_collection(dtype="float16")
+    assert reopened.count() == 1
+    assert reopened.get()["ids"] == ["b"]
+
+
+def test_sidecar_rows_without_vectors_are_dropped_on_open(tmp_path, open_collection):
+    vectors = _vectors(5)
+    collection = open_collection()
+    collection.upsert([f"c{i}" for i in range(5)], vectors, documents=[str(i) for i in range(5)])
+    # The sidecar was committed but the last two rows never reached the vector files
+    for name, row_bytes in ((quantized.VECTORS_FILE, 16), (quantized.SCALES_FILE, 4)):
+        with open(tmp_path / name, "r+b") as f:
+            f.truncate(3 * row_bytes + 1)
+    reopened = open_collection()
+    assert reopened.count() == 3 and reopened.get()["ids"] == ["c0", "c1", "c2"]
+    assert reopened.query([vectors[1]], n_results=1)["ids"] == [["c1"]]
+    reopened.upsert(["c4"], vectors[4:5], documents=["4"])
+    assert reopened.query([vectors[4]], n_results=1)["ids"] == [["c4"]]
+    assert open_collection().count() == 4
+
+
+def test_vectors_without_sidecar_rows_are_cut_on_open(tmp_path, open_collection):
+    vectors = _vectors(4)
+    collection = open_collection(rescore=True)
+    collection.upsert(["a", "b"], vectors[:2], documents=["A", "B"])
+    # An upsert appended its vectors, then stopped before committing the sidecar rows
+    collection.upsert(["x", "y"], vectors[2:], documents=["X", "Y"])
+    collection._db.execute("DELETE FROM rows WHERE row >= 2")
+    collection._db.commit()
+    reopened = open_collection(rescore=True)
+    assert reopened.count() == 2 and reopened._n == 2
+    assert (tmp_path / quantized.VECTORS_FILE).stat().st_size == 2 * 16
+    reopened.upsert(["c"], vectors[3:], documents=["C"])
+    assert reopened.query([vectors[3]], n_results=1)["ids"] == [["c"]]
+    assert reopened.get(ids=["c"])["documents"] == ["C"]
+
+
+def test_compact_keeps_live_rows_searchable(open_collection):
+    collection = open_collection()
+    vectors = _vectors(50)
+    collection.upsert([f"c{i}" for i in range(50)], vectors, documents=[str(i) for i in range(50)])
+    collection.delete(ids=[f"c{i}" for i in range(0, 50, 2)])
+    assert collection.compact() == 25
+    assert collection.compact() == 0
+    assert collection.count() == 25
+    assert collection.query([vectors[7]], n_results=1)["ids"][0] == ["c7"]
+
+
+def test_compact_frees_space_on_disk(tmp_path, open_collection):
+    collection = open_collection()
+    ids = [f"c{i}" for i in range(500)]
+    collection.upsert(ids, _vectors(500), documents=["x" * 500] * 500)
+    collection.delete(ids=ids[:400])
+    before = collection.size_bytes()
+    assert collection.compact() == 400
+    assert collection.size_bytes() < before
+    assert not (tmp_path / "rows.sqlite3-wal").exists() or (tmp_path / "rows.sqlite3-wal").stat().st_size == 0
+    assert collection.count() == 100
+
+
+def test_ivf_index_is_built_for_large_collections(monkeypatch, open_collection):
+    monkeypatch.setattr(quantized, "IVF_MIN_ROWS", 200)
+    collection = open_collection()
+    vectors = _vectors(400)
+    collection.upsert([f"c{i}" for i in range(100)], vectors[:100])
+    assert not collection.optimize()  # too small
+    collection.upsert([f"c{i}" for i in range(100, 400)], vectors[100:])
+    assert collection.optimize()
+    assert not collection.optimize()  # not doubled since
+    assert collection.query([vectors[123]], n_results=1)["ids"][0] == ["c123"]
+    # Rows added after training are assigned to lists as well
+    collection.upsert(["new"], _vectors(1, seed=9))
+    assert collection.query([_vectors(1, seed=9)[0]], n_results=1)["ids"][0] == ["new"]
@@ -0,0 +1,92 @@
+import threading
+
+import pytest
+
+from loc_gist.rag import api
+from loc_gist.rag.streaming import RagStream
+from loc_gist.ui.query_queue import QueryQueue
+
+
+@pytest.fixture
+def answers(monkeypatch):
+    """Answers stream one token per release of `gate`, so tests control when they finish."""
+    gate = threading.Semaphore(0)
+
+    def tokens(question, cancel_event):
+        for word in ("answer", " to", f" {question}"):
+            while not gate.acquire(timeout=0.01):
+                if cancel_event.is_set():
+                    return
+            yield word
+
+    def stream_rag(chain, question, conversation=None, cancel_event=None):
+        return RagStream(tokens(question, cancel_event), record=False, cancel_event=cancel_event)
+
+    monkeypatch.setattr(api, "stream_rag", stream_rag)
+    return gate
+
+
+def _queue(max_pending=4):
+    done = {}
+    finished = threading.Event()
+
+    def on_done(job, message):
+        done[job.question] = job.state
+        finished.set()
+
+    return QueryQueue(on_done=on_done, max_pending=max_pending), done, finished
+
+
+def _wait(finished):
+    assert finished.wait(5)
+    finished.clear()
+
+
+def test_answers_run_in_order(answers):
+    queries, done, finished = _queue()
+    first, second = queries.submit("one", None), queries.submit("two", None)
+    for _ in range(6):
+        answers.release()
+    _wait(finished)
+    if len(done) < 2:
+        _wait(finished)
+    assert done == {"one": "DONE", "two": "DONE"}
+    assert first.stream.tokens == second.stream.tokens == 3
+
+
+def test_full_queue_refuses_questions(answers):
+    queries, done, finished = _queue(max_pending=1)
+    queries.submit("running", None)
+    while queries.current is None:
+        pass
+    assert queries.submit("waiting", None) is not None
+    assert queries.submit("one too many", None) is None
+    queries.cancel_all()
+
+
+def test_stop_cancels_only_the_running_answer(answers):
+    queries, done, finished = _queue()
+    running = queries.submit("running", None)
+    queries.submit("next", None)
+    while queries.current is not running:
+        pass
+    queries.cancel_current()
+    _wait(finished)
+    assert done == {"running": "CANCELLED"}
+    answers.release(3)
+    _wait(finished)
+    assert done["next"] == "DONE"
+
+
+def test_supersede_drops_everything_before_the_new_question(answers):
+    queries, done, finished = _queue()
+    queries.submit("old", None)
+    waiting = queries.submit("waiting", None)
+    new = queries.submit("new", None, supersede=True)
+    assert waiting.state == "CANCELLED"
+    # Spare tokens: the cancelled answer may take one before it notices
+    answers.release(6)
+    while "new" not in done:
+        _wait(finished)
+    assert done["new"] == "DONE" and done.get("old") in (None, "CANCELLED") and "waiting" not in done
+    assert new.stream.tokens == 3
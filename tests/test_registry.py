@@ -0,0 +1,56 @@
+from langchain_core.documents import Document
+
+from loc_gist.rag import registry
+from loc_gist.rag.embed_cache import CachedEmbeddings, EmbeddingCache
+from loc_gist.rag.embedding import persist_batch
+from loc_gist.rag.quantized import QuantizedVectorStore, close_collection
+
+
+class _FakeClient:
+    def __init__(self, path):
+        self.path = path
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+def test_evicted_store_is_closed(monkeypatch):
+    clients = []
+    monkeypatch.setattr(registry, "open_chroma_client", lambda path: clients.append(_FakeClient(path)) or clients[-1])
+    monkeypatch.setattr(registry, "get_vector_store", lambda embedding, path, client=None: (path, client))
+    resources = registry.ResourceRegistry(max_open_stores=2)
+    monkeypatch.setattr(resources, "embedding", lambda model: None)
+
+    resources.vector_store("a")
+    resources.vector_store("b")
+    resources.vector_store("a")
+    resources.vector_store("c")
+    assert [(c.path, c.closed) for c in clients] == [("a", False), ("b", True), ("c", False)]
+    # Still open under another model, so the folder keeps its client
+    assert resources.vector_store("a", "other-model")[1] is clients[0]
+    assert not clients[0].closed
+
+    resources.close_store("a")
+    assert clients[0].closed
+    # Reopening gets a fresh client
+    assert resources.vector_store("a")[1] is clients[-1] is not clients[0]
+
+
+class _NoCalls:
+    def embed_documents(self, texts):
+        raise AssertionError("chunks were embedded again")
+
+
+def test_persist_batch_reuses_vectors(tmp_path):
+    embedding = CachedEmbeddings(_NoCalls(), "m", EmbeddingCache(str(tmp_path / "cache.sqlite3")))
+    store = QuantizedVectorStore(embedding, str(tmp_path))
+    chunks = [Document(page_content=f"chunk {i}", metadata={"page": i}) for i in range(3)]
+    try:
+        ids = persist_batch(store, chunks, [[1.0, float(i), 0.0] for i in range(3)], ids=["x", "y", "z"])
+        persist_batch(store, chunks[:1], [[0.0, 0.0, 1.0]], ids=["x"])
+        assert ids == ["x", "y", "z"] and [c.id for c in chunks] == ids
+        assert store._collection.count() == 3
+        assert store.get(ids=["x"])["metadatas"] == [{"page": 0}]
+    finally:
+        close_collection(str(tmp_path))
@@ -0,0 +1,78 @@
+import threading
+import time
+
+import httpx
+import pytest
+from langchain_core.documents import Document
+
+from loc_gist.rag.abort import AbortableTransport
+from loc_gist.rag.rerank import RerankingRetriever, parse_scores
+
+
+class _Base:
+    def __init__(self, count):
+        self.docs = [Document(page_content=f"passage {i}") for i in range(count)]
+
+    def invoke(self, question):
+        return list(self.docs)
+
+
+class _Reranker:
+    batch_size = 2
+
+    def __init__(self, score):
+        self._score = score
+
+    def score(self, question, texts):
+        return self._score(texts)
+
+
+def _contents(docs):
+    return [doc.page_content for doc in docs]
+
+
+def test_parse_scores():
+    reply = "<think>1: 10</think>\n[2]: 7\n1 = 3.5\n9: 10\nnot a score"
+    assert parse_scores(reply, 3) == [3.5, 7.0, -1.0]
+    # An unterminated think block hides everything after it
+    assert parse_scores("<think>1: 9", 1) == [-1.0]
+
+
+def test_keeps_the_highest_scored():
+    reranker = _Reranker(lambda texts: [float(t.split()[1]) for t in texts])
+    retriever = RerankingRetriever(_Base(5), reranker, k=2)
+    assert _contents(retriever.invoke("q")) == ["passage 4", "passage 3"]
+
+
+def test_fewer_candidates_than_k_are_not_scored():
+    reranker = _Reranker(lambda texts: pytest.fail("scored"))
+    assert len(RerankingRetriever(_Base(2), reranker, k=3).invoke("q")) == 2
+
+
+def test_failing_batch_falls_back_to_retriever_order():
+    def score(texts):
+        if "passage 2" in texts:
+            raise RuntimeError("model not found")
+        return [10.0] * len(texts)
+
+    retriever = RerankingRetriever(_Base(5), _Reranker(score), k=2)
+    assert _contents(retriever.invoke("q")) == ["passage 0", "passage 1"]
+
+
+def test_budget_falls_back_and_aborts_running_batches(silent_server):
+    client = httpx.Client(timeout=None, transport=AbortableTransport())
+    finished = threading.Event()
+
+    def score(texts):
+        try:
+            client.get(silent_server)  # never answers, like a model that is still loading
+        finally:
+            finished.set()
+
+    reranker = _Reranker(score)
+    reranker.batch_size = 5
+    retriever = RerankingRetriever(_Base(5), reranker, k=2, budget_s=0.2)
+    started = time.perf_counter()
+    assert _contents(retriever.invoke("q")) == ["passage 0", "passage 1"]
+    assert time.perf_counter() - started < 1
+    assert finished.wait(2), "the in-flight scoring request was not aborted"
@@ -0,0 +1,85 @@
+from datetime import datetime
+
+from loc_gist.ui import scrollback as scrollback_module
+from loc_gist.ui.scrollback import Scrollback, at_bottom, history_path
+
+
+class FakeText:
+    """The bits of tkinter.Text that Scrollback uses, over a plain string."""
+
+    def __init__(self, content="", view=(0.0, 1.0)):
+        self.content = content
+        self.view = view
+
+    def insert_lines(self, count, start=0):
+        self.content += "".join(f"line {i}\n" for i in range(start, start + count))
+
+    def index(self, where):
+        assert where == "end-1c"
+        lines = self.content.split("\n")
+        return f"{len(lines)}.{len(lines[-1])}"
+
+    def _offset(self, where):
+        line = int(where.split(".")[0])
+        return len("".join(part + "\n" for part in self.content.split("\n")[:line - 1]))
+
+    def get(self, start, end):
+        return self.content[self._offset(start):self._offset(end)]
+
+    def delete(self, start, end):
+        self.content = self.content[:self._offset(start)] + self.content[self._offset(end):]
+
+    def yview(self):
+        return self.view
+
+
+def test_up_to_the_limit_nothing_is_trimmed(tmp_path):
+    text = FakeText()
+    text.insert_lines(10)
+    scrollback = Scrollback(text, 10, str(tmp_path / "spill.txt"))
+    assert scrollback.trim() == 0
+    assert not (tmp_path / "spill.txt").exists()
+    # A partial last line counts too
+    text.content += "no newline yet"
+    assert scrollback.trim() == 2
+
+
+def test_empty_widget_and_unlimited_scrollback():
+    assert Scrollback(FakeText(), 5).trim() == 0
+    text = FakeText()
+    text.insert_lines(1000)
+    assert Scrollback(text, None).trim() == 0
+    assert Scrollback(text, 0).trim() == 0
+
+
+def test_oldest_lines_are_spilled_in_order(tmp_path):
+    text = FakeText()
+    spill = tmp_path / "history" / "log.txt"
+    scrollback = Scrollback(text, 100, str(spill))
+    text.insert_lines(101)
+    cut = scrollback.trim()
+    # Trimmed down below the limit by the slack, so the next inserts don't trim again
+    assert cut == 11
+    assert text.content.startswith("line 11\n")
+    text.insert_lines(10, start=101)
+    assert scrollback.trim() == 0
+    text.insert_lines(1, start=111)
+    assert scrollback.trim() == 11
+    assert spill.read_text(encoding="utf-8") == "".join(f"line {i}\n" for i in range(22))
+    assert scrollback.spilled == 22
+
+
+def test_unwritable_spill_file_still_trims(tmp_path):
+    (tmp_path / "blocker").write_text("not a folder")
+    text = FakeText()
+    text.insert_lines(30)
+    assert Scrollback(text, 10, str(tmp_path / "blocker" / "log.txt")).trim() == 21
+    assert text.content.startswith("line 21\n")
+
+
+def test_history_path_and_at_bottom(tmp_path, monkeypatch):
+    monkeypatch.setattr(scrollback_module, "get_cache_path", lambda name: str(tmp_path / name))
+    path = history_path("chat", datetime(2025, 1, 2, 3, 4, 5))
+    assert path == str(tmp_path / "history" / "chat-20250102-030405.txt")
+    assert at_bottom(FakeText(view=(0.5, 1.0)))
+    assert not at_bottom(FakeText(view=(0.2, 0.7)))
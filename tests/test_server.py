@@ -0,0 +1,35 @@
+from http import HTTPStatus
+
+import pytest
+
+from loc_gist import server
+from loc_gist.server import HttpError, QueryServer, _request_settings
+
+
+def test_request_settings_are_coerced():
+    assert _request_settings({"top_k": "5", "temperature": 1, "keep_alive": "30m", "max_tokens": None,
+                              "question": "q"}) == {"top_k": 5, "temperature": 1.0, "keep_alive": "30m"}
+    assert _request_settings({"keep_alive": "-1", "top_k": 3.0}) == {"keep_alive": -1, "top_k": 3}
+
+
+@pytest.mark.parametrize("payload", [{"top_k": [1]}, {"top_k": 2.5}, {"temperature": "hot"}, {"ctx_window": True},
+                                     {"model": {"name": "x"}}])
+def test_bad_settings_are_a_bad_request(payload):
+    with pytest.raises(HttpError) as e:
+        _request_settings(payload)
+    assert e.value.status == HTTPStatus.BAD_REQUEST
+
+
+def test_chain_is_built_without_holding_the_lock(monkeypatch):
+    query_server = QueryServer()
+    builds = []
+
+    def chain_dbs(db_names, settings):
+        assert not query_server._chains_lock.locked()
+        builds.append(settings)
+        return object(), "ok"
+
+    monkeypatch.setattr(server, "chain_dbs", chain_dbs)
+    chain = query_server._get_chain(("kb",), {"top_k": 3})
+    assert query_server._get_chain(("kb",), {"top_k": 3}) is chain
+    assert builds == [{"top_k": 3}]
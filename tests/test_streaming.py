@@ -0,0 +1,51 @@
+import pytest
+
+from loc_gist.rag.streaming import RagStream, ThinkTagParser
+
+
+def _parse(chunks):
+    parser = ThinkTagParser()
+    pieces = [piece for chunk in chunks for piece in parser.feed(chunk)] + parser.flush()
+    merged = []
+    for kind, text in pieces:
+        if merged and merged[-1][0] == kind:
+            merged[-1] = (kind, merged[-1][1] + text)
+        else:
+            merged.append((kind, text))
+    return merged
+
+
+def test_think_and_answer_are_split():
+    assert _parse(["<think>hmm</think>The answer"]) == [("think", "hmm"), ("answer", "The answer")]
+
+
+def test_tags_split_across_chunks():
+    text = "<think>let me see</think>Paris."
+    expected = [("think", "let me see"), ("answer", "Paris.")]
+    # Every possible split point, and one character per chunk
+    for cut in range(1, len(text)):
+        assert _parse([text[:cut], text[cut:]]) == expected
+    assert _parse(list(text)) == expected
+
+
+def test_partial_tag_is_held_back_until_resolved():
+    parser = ThinkTagParser()
+    assert parser.feed("Answer <th") == [("answer", "Answer ")]
+    assert parser.feed("ree") == [("answer", "<three")]
+
+
+def test_text_that_only_looks_like_a_tag_is_flushed_at_the_end():
+    assert _parse(["a < b </thi"]) == [("answer", "a < b </thi")]
+    assert _parse(["<think>unfinished </th"]) == [("think", "unfinished </th")]
+
+
+@pytest.mark.parametrize("chunks", [[], [""], ["", ""]])
+def test_empty_input(chunks):
+    assert _parse(chunks) == []
+
+
+def test_stream_records_first_tokens_and_strips_leading_answer_whitespace():
+    stream = RagStream(iter(["<think>x</think>", "\n\n", " Hi", " there"]), record=False)
+    assert list(stream) == [("think", "x"), ("answer", "Hi"), ("answer", " there")]
+    assert stream.tokens == 4
+    assert stream.first_token_s <= stream.first_answer_s <= stream.total_s